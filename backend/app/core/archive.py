@@ -0,0 +1,333 @@
+"""Compressed, time-sorted columnar segment files for archived events."""
+
+import bisect
+import json
+import logging
+import os
+import struct
+import sys
+import zlib
+from array import array
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterator, List, Optional, Sequence
+from uuid import uuid4
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: locks only cover this process
+    fcntl = None
+
+from app.core.config import get_settings
+from app.models.event import Direction, VehicleType
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+SEGMENT_MAGIC = b"SPSEG1\n"
+INDEX_FILE = "index.json"
+# Lock files serializing index.json updates and archival runs across worker processes.
+INDEX_LOCK_FILE = ".index.lock"
+ARCHIVER_LOCK_FILE = ".archiver.lock"
+
+_EPOCH = datetime(1970, 1, 1)
+_HEADER_LENGTH = struct.Struct("<I")
+
+
+@dataclass(frozen=True)
+class ArchivedEvent:
+    """Event row read back from a segment, shaped like the Event model for serialization."""
+
+    id: int
+    camera_id: str
+    floor_id: int
+    track_id: str
+    vehicle_type: VehicleType
+    direction: Direction
+    confidence: float
+    timestamp: datetime
+    created_at: datetime
+
+
+def _to_micros(value: datetime) -> int:
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def _from_micros(value: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=value)
+
+
+def _pack(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return zlib.compress(values.tobytes(), 6)
+
+
+def _unpack(typecode: str, blob: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(zlib.decompress(blob))
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def _encode_ints(values: Sequence[int]) -> bytes:
+    # Delta encoding turns sorted timestamps and ids into small, highly compressible numbers.
+    deltas = array("q", (value - previous for previous, value in zip([0, *values], values)))
+    return _pack(deltas)
+
+
+def _decode_ints(blob: bytes) -> List[int]:
+    values = []
+    total = 0
+    for delta in _unpack("q", blob):
+        total += delta
+        values.append(total)
+    return values
+
+
+def _encode_dictionary(values: Sequence[str]):
+    dictionary: Dict[str, int] = {}
+    codes = array("I", (dictionary.setdefault(value, len(dictionary)) for value in values))
+    return list(dictionary), _pack(codes)
+
+
+def encode_segment(events: Sequence) -> bytes:
+    """Serialize events (sorted by timestamp, id) into a segment file body."""
+    columns = {}
+    meta = {}
+
+    def add(name: str, encoding: str, blob: bytes, **extra):
+        meta[name] = {"encoding": encoding, **extra}
+        columns[name] = blob
+
+    add("id", "delta-int64", _encode_ints([event.id for event in events]))
+    add("timestamp", "delta-int64", _encode_ints([_to_micros(event.timestamp) for event in events]))
+    add("created_at", "delta-int64", _encode_ints([_to_micros(event.created_at) for event in events]))
+    add("floor_id", "delta-int64", _encode_ints([event.floor_id for event in events]))
+    add("confidence", "float64", _pack(array("d", (event.confidence for event in events))))
+    for name in ("camera_id", "track_id", "vehicle_type", "direction"):
+        raw = [getattr(event, name) for event in events]
+        values, codes = _encode_dictionary([getattr(value, "value", value) for value in raw])
+        add(name, "dictionary", codes, values=values)
+
+    offset = 0
+    for name, blob in columns.items():
+        meta[name].update(offset=offset, length=len(blob))
+        offset += len(blob)
+
+    header = json.dumps({
+        "count": len(events),
+        "min_timestamp": events[0].timestamp.isoformat() if events else None,
+        "max_timestamp": events[-1].timestamp.isoformat() if events else None,
+        "columns": meta,
+    }).encode()
+    return SEGMENT_MAGIC + _HEADER_LENGTH.pack(len(header)) + header + b"".join(columns.values())
+
+
+def decode_segment(
+    data: bytes,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> List[ArchivedEvent]:
+    """Read the events of a segment whose timestamp lies in [start, end]."""
+    if not data.startswith(SEGMENT_MAGIC):
+        raise ValueError("Not an event archive segment")
+    position = len(SEGMENT_MAGIC)
+    (header_length,) = _HEADER_LENGTH.unpack_from(data, position)
+    position += _HEADER_LENGTH.size
+    header = json.loads(data[position:position + header_length])
+    body = position + header_length
+
+    def blob(name: str) -> bytes:
+        column = header["columns"][name]
+        return data[body + column["offset"]:body + column["offset"] + column["length"]]
+
+    # Rows are sorted by timestamp, so the time range maps to one contiguous slice.
+    timestamps = _decode_ints(blob("timestamp"))
+    low = bisect.bisect_left(timestamps, _to_micros(start)) if start else 0
+    high = bisect.bisect_right(timestamps, _to_micros(end)) if end else len(timestamps)
+    if low >= high:
+        return []
+
+    def dictionary_column(name: str) -> List[str]:
+        values = header["columns"][name]["values"]
+        return [values[code] for code in _unpack("I", blob(name))[low:high]]
+
+    ids = _decode_ints(blob("id"))[low:high]
+    created = _decode_ints(blob("created_at"))[low:high]
+    floors = _decode_ints(blob("floor_id"))[low:high]
+    confidence = _unpack("d", blob("confidence"))[low:high]
+    cameras = dictionary_column("camera_id")
+    tracks = dictionary_column("track_id")
+    vehicle_types = dictionary_column("vehicle_type")
+    directions = dictionary_column("direction")
+
+    return [
+        ArchivedEvent(
+            id=ids[row],
+            camera_id=cameras[row],
+            floor_id=floors[row],
+            track_id=tracks[row],
+            vehicle_type=VehicleType(vehicle_types[row]),
+            direction=Direction(directions[row]),
+            confidence=confidence[row],
+            timestamp=_from_micros(timestamps[low + row]),
+            created_at=_from_micros(created[row]),
+        )
+        for row in range(high - low)
+    ]
+
+
+class EventArchive:
+    """
+    Directory of immutable segment files plus an index.json of their time ranges.
+
+    Queries only open the segments whose [min_timestamp, max_timestamp] overlaps the
+    requested range. A segment is written before its rows are deleted from the
+    database, so a crash in between leaves rows in both places; readers dedupe them.
+    index.json updates and archival runs are serialized across processes with fcntl
+    locks on files next to the segments.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self._lock = Lock()
+        self._archiver_lock = Lock()
+
+    @contextmanager
+    def _file_lock(self, name: str, blocking: bool = True) -> Iterator[bool]:
+        """Exclusive flock on a lock file in the archive directory; yields whether it was taken."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if fcntl is None:
+            yield True
+            return
+        with open(self.directory / name, "a+b") as lock_file:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    @contextmanager
+    def archiver(self) -> Iterator[bool]:
+        """
+        Claim the right to archive without waiting; yields False when another thread or
+        process is already archiving into this directory, so runs never select the same rows.
+        """
+        if not self._archiver_lock.acquire(blocking=False):
+            yield False
+            return
+        try:
+            with self._file_lock(ARCHIVER_LOCK_FILE, blocking=False) as acquired:
+                yield acquired
+        finally:
+            self._archiver_lock.release()
+
+    @property
+    def index_path(self) -> Path:
+        return self.directory / INDEX_FILE
+
+    def segments(self) -> List[dict]:
+        try:
+            with open(self.index_path, encoding="utf-8") as index_file:
+                return json.load(index_file)["segments"]
+        except FileNotFoundError:
+            return []
+
+    def write_segment(self, events: Sequence) -> dict:
+        """Durably write a segment for events sorted by (timestamp, id) and add it to the index."""
+        if not events:
+            raise ValueError("Cannot archive an empty segment")
+        self.directory.mkdir(parents=True, exist_ok=True)
+        first, last = events[0].timestamp, events[-1].timestamp
+        name = f"events-{first:%Y%m%dT%H%M%S}-{last:%Y%m%dT%H%M%S}-{uuid4().hex[:8]}.seg"
+        entry = {
+            "file": name,
+            "count": len(events),
+            "min_timestamp": first.isoformat(),
+            "max_timestamp": last.isoformat(),
+            "min_id": min(event.id for event in events),
+            "max_id": max(event.id for event in events),
+        }
+
+        self._write_atomically(self.directory / name, encode_segment(events))
+        with self._lock, self._file_lock(INDEX_LOCK_FILE):
+            segments = self.segments()
+            segments.append(entry)
+            segments.sort(key=lambda segment: segment["min_timestamp"])
+            self._write_atomically(
+                self.index_path,
+                json.dumps({"segments": segments}, indent=1).encode(),
+            )
+        logger.info(f"Archived {len(events)} events to {name}")
+        return entry
+
+    @staticmethod
+    def _write_atomically(path: Path, data: bytes) -> None:
+        temporary = path.with_name(path.name + ".tmp")
+        with open(temporary, "wb") as output:
+            output.write(data)
+            output.flush()
+            os.fsync(output.fileno())
+        os.replace(temporary, path)
+
+    def query(
+        self,
+        start: datetime,
+        end: datetime,
+        floor_id: Optional[int] = None,
+        vehicle_type: Optional[str] = None,
+        direction: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[ArchivedEvent]:
+        """
+        Archived events in [start, end] matching the filters, newest first.
+
+        With a limit, segments are read newest first and the scan stops once no
+        remaining segment can contribute to the newest `limit` events.
+        """
+        overlapping = [
+            segment for segment in self.segments()
+            if datetime.fromisoformat(segment["min_timestamp"]) <= end
+            and datetime.fromisoformat(segment["max_timestamp"]) >= start
+        ]
+        overlapping.sort(key=lambda segment: segment["max_timestamp"], reverse=True)
+
+        matches: List[ArchivedEvent] = []
+        for segment in overlapping:
+            if limit is not None and len(matches) >= limit:
+                matches.sort(key=lambda event: (event.timestamp, event.id), reverse=True)
+                del matches[limit:]
+                if datetime.fromisoformat(segment["max_timestamp"]) < matches[-1].timestamp:
+                    break
+            data = (self.directory / segment["file"]).read_bytes()
+            matches.extend(
+                event for event in decode_segment(data, start, end)
+                if (floor_id is None or event.floor_id == floor_id)
+                and (vehicle_type is None or event.vehicle_type == vehicle_type)
+                and (direction is None or event.direction == direction)
+            )
+
+        matches.sort(key=lambda event: (event.timestamp, event.id), reverse=True)
+        return matches[:limit] if limit is not None else matches
+
+    def stats(self) -> dict:
+        segments = self.segments()
+        return {
+            "segments": len(segments),
+            "events": sum(segment["count"] for segment in segments),
+            "oldest": segments[0]["min_timestamp"] if segments else None,
+            "newest": max((segment["max_timestamp"] for segment in segments), default=None),
+        }
+
+
+event_archive = EventArchive(settings.archive_dir)
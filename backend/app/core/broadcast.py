@@ -0,0 +1,114 @@
+"""In-process fan-out of floor changes to WebSocket subscribers."""
+
+import asyncio
+import json
+import logging
+from threading import Lock
+from typing import Optional, Set
+
+from app.core.config import get_settings
+from app.core.floor_cache import FloorSnapshot, floor_cache
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def floor_payload(snapshot: FloorSnapshot) -> dict:
+    """Floor fields that change with occupancy, shaped like FloorResponse."""
+    return {
+        "id": snapshot.id,
+        "name": snapshot.name,
+        "total_slots": snapshot.total_slots,
+        "current_vehicles": snapshot.current_vehicles,
+        "available_slots": snapshot.available_slots,
+        "occupancy_percentage": round(snapshot.occupancy_percentage, 2),
+        "is_active": snapshot.is_active,
+        "updated_at": snapshot.updated_at.isoformat(),
+    }
+
+
+class Subscriber:
+    """One connected client: a bounded queue of serialized messages."""
+
+    def __init__(self, queue_size: int):
+        self.queue: "asyncio.Queue[Optional[str]]" = asyncio.Queue(maxsize=max(1, queue_size))
+        self.overflowed = False
+
+
+class FloorBroadcaster:
+    """
+    Publishes every committed floor change once and fans it out to all subscribers.
+
+    Changes arrive from the floor cache on whichever thread committed them; each is
+    serialized once and handed to the event loop. A subscriber whose queue is full is
+    cut off (its socket is closed so the client reconnects and resyncs) rather than
+    letting one slow reader hold memory or delay everyone else.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscribers: Set[Subscriber] = set()
+        self._lock = Lock()
+        self.published = 0
+        self.dropped_subscribers = 0
+
+    def bind(self, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+        self._loop = loop
+
+    def subscribe(self) -> Subscriber:
+        subscriber = Subscriber(self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def on_floor_change(self, floor_id: int, snapshot: Optional[FloorSnapshot], version: int) -> None:
+        loop = self._loop
+        if loop is None or not self._subscribers:
+            return
+        if snapshot is None:
+            message = {"type": "floor_removed", "version": version, "data": {"floor_id": floor_id}}
+        else:
+            message = {"type": "floor_delta", "version": version, "data": {"floor": floor_payload(snapshot)}}
+        try:
+            loop.call_soon_threadsafe(self._fan_out, json.dumps(message, separators=(",", ":")))
+        except RuntimeError:
+            # Loop already closed during shutdown.
+            pass
+
+    def _fan_out(self, text: str) -> None:
+        self.published += 1
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            if subscriber.overflowed:
+                continue
+            try:
+                subscriber.queue.put_nowait(text)
+            except asyncio.QueueFull:
+                self._drop(subscriber)
+
+    def _drop(self, subscriber: Subscriber) -> None:
+        subscriber.overflowed = True
+        self.dropped_subscribers += 1
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        subscriber.queue.put_nowait(None)
+        logger.warning("Dropping slow WebSocket subscriber")
+
+    def stats(self) -> dict:
+        with self._lock:
+            subscribers = len(self._subscribers)
+        return {
+            "subscribers": subscribers,
+            "published": self.published,
+            "dropped_subscribers": self.dropped_subscribers,
+        }
+
+
+floor_broadcaster = FloorBroadcaster(queue_size=settings.websocket_queue_size)
+floor_cache.add_listener(floor_broadcaster.on_floor_change)
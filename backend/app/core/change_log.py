@@ -0,0 +1,107 @@
+"""Sequenced ring buffer of recent floor and alert changes for resumable clients."""
+
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from threading import Lock
+from typing import List, Optional, Set, Tuple
+from uuid import uuid4
+
+from app.core.broadcast import floor_payload
+from app.core.config import get_settings
+from app.core.floor_cache import FloorSnapshot, floor_cache
+
+settings = get_settings()
+
+
+@dataclass(frozen=True)
+class ChangeEntry:
+    seq: int
+    kind: str
+    data: dict
+
+
+class ChangeLog:
+    """
+    Bounded, in-memory log of changes numbered by a monotonically increasing sequence.
+
+    Clients remember the last sequence they saw and ask for everything after it. The
+    epoch changes with every process start, so a sequence from an older process (or one
+    that has already scrolled out of the buffer) is answered with "resync required".
+    """
+
+    def __init__(self, capacity: int):
+        self.epoch = uuid4().hex[:12]
+        self.capacity = max(1, capacity)
+        self.seq = 0
+        self._entries: "deque[ChangeEntry]" = deque(maxlen=self.capacity)
+        self._lock = Lock()
+        self._waiters: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+
+    def append(self, kind: str, data: dict) -> ChangeEntry:
+        with self._lock:
+            self.seq += 1
+            entry = ChangeEntry(self.seq, kind, data)
+            self._entries.append(entry)
+            waiters = list(self._waiters)
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass
+        return entry
+
+    def since(self, seq: int, kinds: Optional[Set[str]] = None) -> Tuple[List[ChangeEntry], bool]:
+        """Entries after seq (optionally of the given kinds) and whether the caller must resync."""
+        with self._lock:
+            if seq > self.seq:
+                return [], True
+            oldest = self._entries[0].seq if self._entries else self.seq + 1
+            if seq < oldest - 1:
+                return [], True
+            entries = [entry for entry in self._entries if entry.seq > seq]
+        if kinds is not None:
+            entries = [entry for entry in entries if entry.kind in kinds]
+        return entries, False
+
+    async def wait(self, seq: int, timeout: float) -> bool:
+        """Wait until something newer than seq is logged; False on timeout."""
+        event = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), event)
+        with self._lock:
+            if self.seq > seq:
+                return True
+            self._waiters.add(waiter)
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+
+    def parse_cursor(self, cursor: Optional[str]) -> Optional[int]:
+        """Sequence from an "<epoch>-<seq>" cursor issued by this process, else None."""
+        if not cursor:
+            return None
+        epoch, _, seq = cursor.rpartition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        return int(seq)
+
+    def cursor(self, seq: int) -> str:
+        return f"{self.epoch}-{seq}"
+
+
+change_log = ChangeLog(capacity=settings.change_log_size)
+
+
+def _log_floor_change(floor_id: int, snapshot: Optional[FloorSnapshot], _version: int) -> None:
+    if snapshot is None:
+        change_log.append("floor_removed", {"floor_id": floor_id})
+    else:
+        change_log.append("floor_delta", {"floor": floor_payload(snapshot)})
+
+
+floor_cache.add_listener(_log_floor_change)
@@ -0,0 +1,27 @@
+"""Conditional GET helpers (ETag / If-None-Match)."""
+
+from fastapi import Request, Response, status
+
+CACHE_CONTROL = "no-cache"
+
+
+def if_none_match(request: Request, etag: str) -> bool:
+    """True when the request's If-None-Match already names etag (weak comparison)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
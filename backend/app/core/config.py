@@ -5,11 +5,22 @@ from functools import lru_cache
 class Settings(BaseSettings):
     database_url: str = "sqlite:///./smartpark.db"
     database_echo: bool = True
+    database_executor_workers: int = 8
     log_level: str = "INFO"
     log_format: str = "standard"
     log_file: str = "./backend.log"
+    log_queue_enabled: bool = True
+    log_queue_size: int = 10000
+    log_batch_size: int = 256
+    log_sample_access: float = 1.0
+    log_sample_events: float = 1.0
     api_rate_limit: int = 1000
     api_rate_limit_window_seconds: int = 60
+    api_rate_limit_overrides: str = ""
+    shared_state_path: str = ""
+    shared_state_flush_ms: int = 500
+    # Worker count uvicorn and gunicorn read from WEB_CONCURRENCY.
+    web_concurrency: int = 1
     api_key_header: str = "X-API-Key"
     api_keys: str = "smartpark-dev-key"
     cors_allow_origins: str = "*"
@@ -20,9 +31,36 @@ class Settings(BaseSettings):
     sentry_dsn: str = ""
     sentry_environment: str = "development"
     sentry_traces_sample_rate: float = 0.0
-    monitoring_history_size: int = 300
+    floor_cache_enabled: bool = True
+    floor_cache_reconcile_seconds: float = 30.0
+    event_lock_stripes: int = 1024
+    idempotency_cache_enabled: bool = True
+    idempotency_cache_max_entries: int = 100000
+    idempotency_cache_ttl_seconds: float = 300.0
+    idempotency_cache_trust_misses: bool = False
+    rollups_enabled: bool = True
+    events_partitioning: str = "none"
+    events_partitions_ahead: int = 3
+    events_retention_days: int = 0
+    events_cleanup_chunk_size: int = 5000
+    events_maintenance_seconds: float = 3600.0
+    archive_dir: str = "./archive"
+    archive_after_days: int = 0
+    archive_segment_rows: int = 5000
+    export_chunk_size: int = 1000
+    fast_json_responses: bool = True
+    websocket_queue_size: int = 256
+    change_log_size: int = 1024
+    sse_keepalive_seconds: float = 15.0
+    alerts_evaluation_seconds: float = 5.0
+    recommendation_policy: str = "most_free_slots"
+    recommendation_floor_weights: str = ""
+    monitoring_alert_window_seconds: int = 300
+    monitoring_max_routes: int = 200
+    metrics_max_cameras: int = 500
     monitoring_error_rate_threshold: float = 0.1
     monitoring_latency_ms_threshold: float = 500.0
+    monitoring_latency_statistic: str = "p95"
     monitoring_low_availability_threshold: int = 5
     vision_frame_dir: str = "../vision/frames"
 
@@ -1,25 +1,76 @@
 """Database operations and queries"""
 
+import base64
+import binascii
+import json
 import logging
 from collections import defaultdict
+from contextlib import ExitStack
 from threading import Lock
-from typing import List, Optional, Tuple
-from datetime import datetime, timedelta
-from sqlalchemy import and_
+from typing import Iterator, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import and_, func, or_, select
 from sqlalchemy.exc import IntegrityError
+from app.core.archive import event_archive
+from app.core.config import get_settings
 from app.core.database import SessionLocal
+from app.core.db_executor import AsyncOperations
+from app.core.export import EXPORT_COLUMNS
+from app.core.floor_cache import FloorSnapshot, floor_cache
+from app.core.idempotency import Verdict, idempotency_cache
+from app.core.logging import events_logger
+from app.core.metrics import ingestion_metrics
+from app.core.partitions import (
+    drop_expired_partitions, ensure_partitions, is_events_partitioned, partitioning_mode,
+)
+from app.core.recommendation import parse_floor_weights, rank_floors, recommendation_engine
+from app.core.rollups import GRANULARITIES, apply_rollup_samples, upsert_statement
 from app.models.floor import Floor
 from app.models.event import Event, Direction, VehicleType
+from app.models.rollup import OccupancyRollup
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+_BUCKET_SQLITE_FORMATS = {
+    "minute": "%Y-%m-%d %H:%M:00",
+    "hour": "%Y-%m-%d %H:00:00",
+    "day": "%Y-%m-%d 00:00:00",
+}
+
+
+def to_naive_utc(timestamp: datetime) -> datetime:
+    """Convert an aware datetime to the naive UTC form stored in the database."""
+    if timestamp.tzinfo is not None:
+        return timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+
+def encode_event_cursor(timestamp: datetime, event_id: int) -> str:
+    """Opaque keyset cursor pointing just past the given event."""
+    raw = json.dumps([timestamp.isoformat(), event_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_event_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor produced by encode_event_cursor; raises ValueError when malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, event_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(timestamp), int(event_id)
+    except (TypeError, ValueError, binascii.Error) as e:
+        raise ValueError("Invalid pagination cursor") from e
 
 
 class FloorOperations:
     """Operations on Floor model"""
     
     @staticmethod
-    def get_all_active_floors() -> List[Floor]:
-        """Get all active floors"""
+    def get_all_active_floors() -> List[Floor | FloorSnapshot]:
+        """Get all active floors (served from the floor state cache when enabled)"""
+        if settings.floor_cache_enabled:
+            return floor_cache.get_all_active()
         session = SessionLocal()
         try:
             return session.query(Floor).filter(Floor.is_active == True).all()
@@ -27,8 +78,10 @@ class FloorOperations:
             session.close()
     
     @staticmethod
-    def get_floor_by_id(floor_id: int) -> Optional[Floor]:
-        """Get floor by ID"""
+    def get_floor_by_id(floor_id: int) -> Optional[Floor | FloorSnapshot]:
+        """Get floor by ID (served from the floor state cache when enabled)"""
+        if settings.floor_cache_enabled:
+            return floor_cache.get(floor_id)
         session = SessionLocal()
         try:
             return session.query(Floor).filter(Floor.id == floor_id).first()
@@ -45,20 +98,25 @@ class FloorOperations:
             session.close()
     
     @staticmethod
-    def get_recommended_floor() -> Optional[Floor]:
-        """Get floor with most available slots"""
+    def get_recommended_floor() -> Optional[Floor | FloorSnapshot]:
+        """Get the best floor under the configured recommendation policy"""
+        ranked = FloorOperations.get_ranked_floors(limit=1)
+        return ranked[0] if ranked else None
+
+    @staticmethod
+    def get_ranked_floors(limit: int = 4) -> List[Floor | FloorSnapshot]:
+        """Get up to `limit` active floors, best first, under the configured recommendation policy"""
+        if settings.floor_cache_enabled:
+            return recommendation_engine.top(limit)
         session = SessionLocal()
         try:
-            floor = session.query(Floor).filter(
-                Floor.is_active == True
-            ).order_by(
-                (Floor.total_slots - Floor.current_vehicles).desc()
-            ).first()
-            
-            if floor:
-                logger.info(f"Recommended floor: {floor.name} with {floor.available_slots} available slots")
-            
-            return floor
+            floors = session.query(Floor).filter(Floor.is_active == True).all()
+            return rank_floors(
+                floors,
+                settings.recommendation_policy,
+                parse_floor_weights(settings.recommendation_floor_weights),
+                limit,
+            )
         finally:
             session.close()
     
@@ -101,13 +159,17 @@ class FloorOperations:
 class EventOperations:
     """Operations on Event model"""
 
-    _lock_registry_guard = Lock()
-    _event_locks = defaultdict(Lock)
+    # Fixed-size striped lock table: keys hashing to the same stripe share a lock, which
+    # keeps per-key mutual exclusion with memory that does not grow with traffic.
+    _event_locks = [Lock() for _ in range(max(1, settings.event_lock_stripes))]
+
+    @classmethod
+    def _get_event_lock_stripe(cls, key: tuple[str, str, int, str]) -> int:
+        return hash(key) % len(cls._event_locks)
 
     @classmethod
     def _get_event_lock(cls, key: tuple[str, str, int, str]) -> Lock:
-        with cls._lock_registry_guard:
-            return cls._event_locks[key]
+        return cls._event_locks[cls._get_event_lock_stripe(key)]
     
     @staticmethod
     def record_event(
@@ -133,27 +195,37 @@ class EventOperations:
             lock_key = (camera_id, track_id, floor_id, event_direction.value)
             operation_lock = EventOperations._get_event_lock(lock_key)
 
-            with operation_lock:
+            with operation_lock, ExitStack() as floor_write:
+                window_delta = timedelta(seconds=max(0, idempotency_window_seconds))
+                window_start = event_timestamp - window_delta
+                window_end = event_timestamp + window_delta
+
+                verdict, cached = Verdict.unknown, None
+                if settings.idempotency_cache_enabled:
+                    verdict, cached = idempotency_cache.lookup(lock_key, event_timestamp, window_delta)
+                if verdict == Verdict.duplicate:
+                    logger.warning(f"Duplicate event detected (cached): {track_id} ({event_direction.value})")
+                    ingestion_metrics.record([(floor_id, camera_id, event_direction.value, "duplicate")])
+                    return cached, FloorOperations.get_floor_by_id(floor_id), True
+
                 with session.begin():
                     floor = session.query(Floor).filter(Floor.id == floor_id).first()
                     if not floor:
                         raise ValueError(f"Floor {floor_id} not found")
 
-                    window_delta = timedelta(seconds=max(0, idempotency_window_seconds))
-                    window_start = event_timestamp - window_delta
-                    window_end = event_timestamp + window_delta
-
                     # Idempotency check within a small timestamp window to tolerate retry drift.
-                    existing = session.query(Event).filter(
-                        and_(
-                            Event.camera_id == camera_id,
-                            Event.track_id == track_id,
-                            Event.floor_id == floor_id,
-                            Event.direction == event_direction,
-                            Event.timestamp >= window_start,
-                            Event.timestamp <= window_end,
-                        )
-                    ).order_by(Event.timestamp.desc()).first()
+                    existing = None
+                    if verdict == Verdict.unknown:
+                        existing = session.query(Event).filter(
+                            and_(
+                                Event.camera_id == camera_id,
+                                Event.track_id == track_id,
+                                Event.floor_id == floor_id,
+                                Event.direction == event_direction,
+                                Event.timestamp >= window_start,
+                                Event.timestamp <= window_end,
+                            )
+                        ).order_by(Event.timestamp.desc()).first()
 
                     if existing:
                         logger.warning(
@@ -161,9 +233,14 @@ class EventOperations:
                             f"between {window_start.isoformat()} and {window_end.isoformat()}"
                         )
                         session.refresh(floor)
+                        if settings.idempotency_cache_enabled:
+                            idempotency_cache.record(lock_key, existing)
+                        ingestion_metrics.record([(floor_id, camera_id, event_direction.value, "duplicate")])
                         return existing, floor, True
 
-                    # Atomic update protects count accuracy under concurrent requests.
+                    # Atomic update protects count accuracy under concurrent requests; the
+                    # floor write lock is held until the committed row reaches the cache.
+                    floor_write.enter_context(floor_cache.write_lock(floor_id))
                     if event_direction == Direction.entry:
                         updated = session.query(Floor).filter(
                             Floor.id == floor_id,
@@ -202,7 +279,17 @@ class EventOperations:
                     session.refresh(event)
                     session.refresh(floor)
 
-            logger.info(f"Event recorded: {track_id} ({event_direction.value}) at {camera_id}")
+                    if settings.rollups_enabled:
+                        apply_rollup_samples(
+                            session, [(floor_id, event_timestamp, event_direction, floor.current_vehicles)]
+                        )
+
+                if settings.idempotency_cache_enabled:
+                    idempotency_cache.record(lock_key, event)
+                floor_cache.apply(floor, authoritative=True)
+
+            ingestion_metrics.record([(floor_id, camera_id, event_direction.value, "recorded")])
+            events_logger.info("Event recorded: %s (%s) at %s", track_id, event_direction.value, camera_id)
             return event, floor, False
 
         except IntegrityError:
@@ -222,6 +309,7 @@ class EventOperations:
             floor = session.query(Floor).filter(Floor.id == floor_id).first()
             if existing and floor:
                 logger.warning(f"Duplicate event detected by integrity constraint: {track_id}")
+                ingestion_metrics.record([(floor_id, camera_id, event_direction.value, "duplicate")])
                 return existing, floor, True
             raise
         except Exception as e:
@@ -231,6 +319,247 @@ class EventOperations:
         finally:
             session.close()
     
+    @staticmethod
+    def record_events_batch(
+        events: List[dict],
+        idempotency_window_seconds: int = 5,
+    ) -> List[dict]:
+        """
+        Record a batch of parking events in a single transaction.
+
+        Each item holds the keyword arguments accepted by record_event. Items are applied
+        in order, so full/empty checks and duplicate detection see earlier items of the
+        same batch. Returns one outcome per item with keys: status (recorded, duplicate,
+        floor_full, floor_empty, floor_not_found, conflict), event, floor_id,
+        current_vehicles and total_slots.
+        """
+        items = [EventOperations._normalize_batch_item(raw) for raw in events]
+        # Take each stripe once, in index order, so concurrent batches cannot deadlock.
+        stripes = sorted({EventOperations._get_event_lock_stripe(item["lock_key"]) for item in items})
+
+        try:
+            with ExitStack() as stack:
+                for stripe in stripes:
+                    stack.enter_context(EventOperations._event_locks[stripe])
+                outcomes = EventOperations._apply_batch(items, idempotency_window_seconds)
+            # Items replayed through record_event below are counted there instead.
+            ingestion_metrics.record(
+                (item["floor_id"], item["camera_id"], item["direction"].value, outcome["status"])
+                for item, outcome in zip(items, outcomes)
+                if outcome["status"] in ("recorded", "duplicate")
+            )
+        except IntegrityError:
+            # A concurrent writer raced us on the idempotency constraint; replay item by item
+            # so each event still gets a precise outcome.
+            logger.warning("Batch insert hit an integrity conflict, falling back to per-event recording")
+            outcomes = [
+                EventOperations._record_batch_item_individually(item, idempotency_window_seconds)
+                for item in items
+            ]
+
+        recorded = sum(1 for outcome in outcomes if outcome["status"] == "recorded")
+        events_logger.info("Event batch processed: %d/%d recorded", recorded, len(outcomes))
+        return outcomes
+
+    @staticmethod
+    def _normalize_batch_item(raw: dict) -> dict:
+        direction = raw["direction"]
+        vehicle_type = raw["vehicle_type"]
+        event_direction = Direction(direction) if isinstance(direction, str) else direction
+        event_vehicle_type = VehicleType(vehicle_type) if isinstance(vehicle_type, str) else vehicle_type
+        timestamp = to_naive_utc(raw.get("timestamp") or datetime.utcnow())
+        return {
+            "camera_id": raw["camera_id"],
+            "floor_id": raw["floor_id"],
+            "track_id": raw["track_id"],
+            "vehicle_type": event_vehicle_type,
+            "direction": event_direction,
+            "confidence": raw.get("confidence", 0.8),
+            "timestamp": timestamp,
+            "lock_key": (raw["camera_id"], raw["track_id"], raw["floor_id"], event_direction.value),
+        }
+
+    @staticmethod
+    def _apply_batch(items: List[dict], idempotency_window_seconds: int) -> List[dict]:
+        window_delta = timedelta(seconds=max(0, idempotency_window_seconds))
+        session = SessionLocal()
+        floor_ids = {item["floor_id"] for item in items}
+        try:
+            with ExitStack() as floor_write:
+                # Floor write locks are held until the committed rows reach the floor cache.
+                for lock in floor_cache.write_locks(floor_ids):
+                    floor_write.enter_context(lock)
+                outcomes, touched = EventOperations._apply_batch_transaction(
+                    session, items, floor_ids, window_delta
+                )
+                for floor in touched:
+                    floor_cache.apply(floor, authoritative=True)
+
+            if settings.idempotency_cache_enabled:
+                for item, outcome in zip(items, outcomes):
+                    if outcome["event"] is not None:
+                        idempotency_cache.record(item["lock_key"], outcome["event"])
+            return outcomes
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    @staticmethod
+    def _apply_batch_transaction(session, items: List[dict], floor_ids: set, window_delta: timedelta):
+        with session.begin():
+            floors = {
+                floor.id: floor
+                for floor in session.query(Floor).filter(Floor.id.in_(floor_ids)).with_for_update()
+            }
+            counts = {floor_id: floor.current_vehicles for floor_id, floor in floors.items()}
+
+            recent = defaultdict(list)
+            unresolved = []
+            for item in items:
+                verdict, cached = Verdict.unknown, None
+                if settings.idempotency_cache_enabled:
+                    verdict, cached = idempotency_cache.lookup(
+                        item["lock_key"], item["timestamp"], window_delta
+                    )
+                if verdict == Verdict.duplicate:
+                    recent[item["lock_key"]].append(cached)
+                elif verdict == Verdict.unknown:
+                    unresolved.append(item)
+
+            # One range query covers the idempotency check for every item the cache
+            # could not answer.
+            if unresolved:
+                window_start = min(item["timestamp"] for item in unresolved) - window_delta
+                window_end = max(item["timestamp"] for item in unresolved) + window_delta
+                existing_events = session.query(Event).filter(
+                    and_(
+                        Event.camera_id.in_({item["camera_id"] for item in unresolved}),
+                        Event.track_id.in_({item["track_id"] for item in unresolved}),
+                        Event.floor_id.in_({item["floor_id"] for item in unresolved}),
+                        Event.timestamp >= window_start,
+                        Event.timestamp <= window_end,
+                    )
+                ).all()
+                for existing in existing_events:
+                    key = (existing.camera_id, existing.track_id, existing.floor_id, existing.direction.value)
+                    if existing not in recent[key]:
+                        recent[key].append(existing)
+
+            outcomes = []
+            new_events = []
+            rollup_samples = []
+            for item in items:
+                floor = floors.get(item["floor_id"])
+                outcome = {
+                    "status": "recorded",
+                    "event": None,
+                    "floor_id": item["floor_id"],
+                    "current_vehicles": None,
+                    "total_slots": floor.total_slots if floor else None,
+                }
+                outcomes.append(outcome)
+
+                if floor is None:
+                    outcome["status"] = "floor_not_found"
+                    continue
+
+                matches = [
+                    candidate
+                    for candidate in recent[item["lock_key"]]
+                    if abs(candidate.timestamp - item["timestamp"]) <= window_delta
+                ]
+                if matches:
+                    outcome["status"] = "duplicate"
+                    outcome["event"] = max(matches, key=lambda candidate: candidate.timestamp)
+                elif item["direction"] == Direction.entry and counts[floor.id] >= floor.total_slots:
+                    outcome["status"] = "floor_full"
+                elif item["direction"] == Direction.exit and counts[floor.id] <= 0:
+                    outcome["status"] = "floor_empty"
+                else:
+                    counts[floor.id] += 1 if item["direction"] == Direction.entry else -1
+                    event = Event(
+                        camera_id=item["camera_id"],
+                        floor_id=item["floor_id"],
+                        track_id=item["track_id"],
+                        vehicle_type=item["vehicle_type"],
+                        direction=item["direction"],
+                        confidence=item["confidence"],
+                        timestamp=item["timestamp"],
+                    )
+                    new_events.append(event)
+                    recent[item["lock_key"]].append(event)
+                    outcome["event"] = event
+                    rollup_samples.append(
+                        (floor.id, item["timestamp"], item["direction"], counts[floor.id])
+                    )
+
+                outcome["current_vehicles"] = counts[floor.id]
+
+            touched = []
+            for floor_id, floor in floors.items():
+                delta = counts[floor_id] - floor.current_vehicles
+                if delta:
+                    session.query(Floor).filter(Floor.id == floor_id).update(
+                        {Floor.current_vehicles: Floor.current_vehicles + delta},
+                        synchronize_session=False,
+                    )
+                    touched.append(floor)
+
+            session.add_all(new_events)
+            session.flush()
+            for floor in touched:
+                session.refresh(floor)
+            if settings.rollups_enabled:
+                apply_rollup_samples(session, rollup_samples)
+        return outcomes, touched
+
+    @staticmethod
+    def _record_batch_item_individually(item: dict, idempotency_window_seconds: int) -> dict:
+        outcome = {
+            "status": "recorded",
+            "event": None,
+            "floor_id": item["floor_id"],
+            "current_vehicles": None,
+            "total_slots": None,
+        }
+        try:
+            event, floor, is_duplicate = EventOperations.record_event(
+                camera_id=item["camera_id"],
+                floor_id=item["floor_id"],
+                track_id=item["track_id"],
+                vehicle_type=item["vehicle_type"],
+                direction=item["direction"],
+                confidence=item["confidence"],
+                timestamp=item["timestamp"],
+                idempotency_window_seconds=idempotency_window_seconds,
+            )
+        except (ValueError, IntegrityError) as e:
+            message = str(e).lower()
+            if isinstance(e, IntegrityError):
+                # uq_event_idempotency has no floor_id: the same camera/track/direction/timestamp
+                # was already recorded for another floor.
+                logger.warning(f"Batch item conflicts with an event on another floor: {item['track_id']}")
+                outcome["status"] = "conflict"
+            elif "full" in message:
+                outcome["status"] = "floor_full"
+            elif "empty" in message:
+                outcome["status"] = "floor_empty"
+            else:
+                outcome["status"] = "floor_not_found"
+            floor = FloorOperations.get_floor_by_id(item["floor_id"])
+            if floor:
+                outcome["current_vehicles"] = floor.current_vehicles
+                outcome["total_slots"] = floor.total_slots
+            return outcome
+
+        outcome["status"] = "duplicate" if is_duplicate else "recorded"
+        outcome["event"] = event
+        outcome["current_vehicles"] = floor.current_vehicles
+        outcome["total_slots"] = floor.total_slots
+        return outcome
+
     @staticmethod
     def get_events_by_floor(floor_id: int, limit: int = 100) -> List[Event]:
         """Get recent events for a floor"""
@@ -272,6 +601,41 @@ class EventOperations:
         finally:
             session.close()
 
+    @staticmethod
+    def iter_event_rows(
+        start_time: datetime,
+        end_time: datetime,
+        floor_id: Optional[int] = None,
+        vehicle_type: Optional[str] = None,
+        direction: Optional[str] = None,
+        chunk_size: Optional[int] = None,
+    ) -> Iterator[List[tuple]]:
+        """
+        Yield chunks of event row tuples (EXPORT_COLUMNS order) in [start_time, end_time], oldest first.
+
+        Rows come from a server-side cursor (yield_per), so memory stays bounded by one chunk
+        however large the range is. The session is closed when the generator is exhausted or closed.
+        """
+        session = SessionLocal()
+        try:
+            statement = select(*(getattr(Event, name) for name in EXPORT_COLUMNS)).where(
+                Event.timestamp >= start_time,
+                Event.timestamp <= end_time,
+            )
+            if floor_id is not None:
+                statement = statement.where(Event.floor_id == floor_id)
+            if vehicle_type is not None:
+                statement = statement.where(Event.vehicle_type == VehicleType(vehicle_type))
+            if direction is not None:
+                statement = statement.where(Event.direction == Direction(direction))
+            statement = statement.order_by(Event.timestamp, Event.id).execution_options(
+                yield_per=max(1, chunk_size or settings.export_chunk_size)
+            )
+            for partition in session.execute(statement).partitions():
+                yield [tuple(row) for row in partition]
+        finally:
+            session.close()
+
     @staticmethod
     def get_filtered_events(
         hours: int = 24,
@@ -280,8 +644,18 @@ class EventOperations:
         direction: Optional[Direction | str] = None,
         limit: int = 100,
         offset: int = 0,
-    ) -> Tuple[List[Event], int, int]:
-        """Get filtered and paginated events from the last N hours."""
+        cursor: Optional[str] = None,
+        include_counts: bool = True,
+        as_rows: bool = False,
+    ) -> Tuple[List[Event], Optional[int], Optional[int]]:
+        """
+        Get filtered and paginated events from the last N hours, newest first.
+
+        Pass the cursor of the previous page (see encode_event_cursor) to seek past it on
+        (timestamp, id) instead of using OFFSET. With include_counts=False the two COUNT
+        queries are skipped and both counts are returned as None. With as_rows=True plain
+        row tuples in EXPORT_COLUMNS order are returned instead of ORM objects.
+        """
         session = SessionLocal()
         try:
             end_time = datetime.utcnow()
@@ -293,7 +667,7 @@ class EventOperations:
                     Event.timestamp <= end_time,
                 )
             )
-            total_count = base_query.count()
+            total_count = base_query.count() if include_counts else None
 
             filtered_query = base_query
 
@@ -308,8 +682,25 @@ class EventOperations:
                 normalized_direction = Direction(direction) if isinstance(direction, str) else direction
                 filtered_query = filtered_query.filter(Event.direction == normalized_direction)
 
-            filtered_count = filtered_query.count()
-            events = filtered_query.order_by(Event.timestamp.desc()).offset(offset).limit(limit).all()
+            filtered_count = filtered_query.count() if include_counts else None
+
+            page_query = filtered_query
+            if cursor is not None:
+                cursor_timestamp, cursor_id = decode_event_cursor(cursor)
+                page_query = page_query.filter(
+                    or_(
+                        Event.timestamp < cursor_timestamp,
+                        and_(Event.timestamp == cursor_timestamp, Event.id < cursor_id),
+                    )
+                )
+            if as_rows:
+                page_query = page_query.with_entities(*(getattr(Event, name) for name in EXPORT_COLUMNS))
+            events = (
+                page_query.order_by(Event.timestamp.desc(), Event.id.desc())
+                .offset(offset)
+                .limit(limit)
+                .all()
+            )
 
             return events, total_count, filtered_count
         finally:
@@ -318,50 +709,251 @@ class EventOperations:
     @staticmethod
     def get_event_statistics(hours: int = 24) -> dict:
         """Get event statistics for last N hours"""
+        stats = EventOperations.get_event_stats(hours=hours)
+        return {
+            "total_events": stats["total_events"],
+            "entries": stats["entries"],
+            "exits": stats["exits"],
+            "by_vehicle_type": stats["by_vehicle_type"],
+            "by_floor": {floor["floor_name"]: floor["total"] for floor in stats["by_floor"]},
+        }
+
+    @staticmethod
+    def get_event_stats(
+        hours: int = 24,
+        bucket: Optional[str] = None,
+        floor_id: Optional[int] = None,
+        vehicle_type: Optional[VehicleType | str] = None,
+        direction: Optional[Direction | str] = None,
+    ) -> dict:
+        """
+        Aggregate events from the last N hours with grouped SQL queries.
+
+        Returns totals plus direction, vehicle type and floor breakdowns, and when
+        bucket is "minute", "hour" or "day" a time series of entries/exits per bucket.
+        """
         session = SessionLocal()
         try:
-            start_time = datetime.utcnow() - timedelta(hours=hours)
-            
-            events = session.query(Event).filter(
-                Event.timestamp >= start_time
-            ).all()
-            
+            end_time = datetime.utcnow()
+            start_time = end_time - timedelta(hours=hours)
+            filters = [Event.timestamp >= start_time, Event.timestamp <= end_time]
+            if floor_id is not None:
+                filters.append(Event.floor_id == floor_id)
+            if vehicle_type is not None:
+                filters.append(
+                    Event.vehicle_type == (VehicleType(vehicle_type) if isinstance(vehicle_type, str) else vehicle_type)
+                )
+            if direction is not None:
+                filters.append(Event.direction == (Direction(direction) if isinstance(direction, str) else direction))
+
+            # A single grouped query yields every breakdown; its size is bounded by
+            # directions x vehicle types x floors, not by the number of events.
+            grouped = session.query(
+                Event.floor_id, Event.vehicle_type, Event.direction, func.count(Event.id)
+            ).filter(*filters).group_by(Event.floor_id, Event.vehicle_type, Event.direction).all()
+
+            floor_names = dict(session.query(Floor.id, Floor.name).all())
+            by_floor = {
+                fid: {"floor_id": fid, "floor_name": name, "total": 0, "entries": 0, "exits": 0}
+                for fid, name in floor_names.items()
+                if floor_id is None or fid == floor_id
+            }
             stats = {
-                "total_events": len(events),
-                "entries": len([e for e in events if e.direction == Direction.entry]),
-                "exits": len([e for e in events if e.direction == Direction.exit]),
-                "by_vehicle_type": {},
-                "by_floor": {},
+                "total_events": 0,
+                "entries": 0,
+                "exits": 0,
+                "by_direction": {item.value: 0 for item in Direction},
+                "by_vehicle_type": {item.value: 0 for item in VehicleType},
+                "by_floor": [],
+                "buckets": [],
             }
-            
-            # Group by vehicle type
-            for vtype in VehicleType:
-                count = len([e for e in events if e.vehicle_type == vtype])
-                stats["by_vehicle_type"][vtype.value] = count
-            
-            # Group by floor
-            floors = session.query(Floor).all()
-            for floor in floors:
-                count = len([e for e in events if e.floor_id == floor.id])
-                stats["by_floor"][floor.name] = count
-            
+            for row_floor_id, row_vehicle_type, row_direction, count in grouped:
+                direction_key = "entries" if row_direction == Direction.entry else "exits"
+                stats["total_events"] += count
+                stats[direction_key] += count
+                stats["by_direction"][row_direction.value] += count
+                stats["by_vehicle_type"][row_vehicle_type.value] += count
+                floor_stats = by_floor.setdefault(
+                    row_floor_id,
+                    {"floor_id": row_floor_id, "floor_name": None, "total": 0, "entries": 0, "exits": 0},
+                )
+                floor_stats["total"] += count
+                floor_stats[direction_key] += count
+            stats["by_floor"] = [by_floor[fid] for fid in sorted(by_floor)]
+
+            if bucket is not None:
+                bucket_expr = EventOperations._time_bucket_expression(session, bucket).label("bucket_start")
+                series = session.query(
+                    bucket_expr, Event.direction, func.count(Event.id)
+                ).filter(*filters).group_by(bucket_expr, Event.direction).order_by(bucket_expr).all()
+
+                buckets = {}
+                for bucket_start, row_direction, count in series:
+                    if isinstance(bucket_start, str):
+                        bucket_start = datetime.fromisoformat(bucket_start)
+                    entry = buckets.setdefault(
+                        bucket_start, {"bucket_start": bucket_start, "total": 0, "entries": 0, "exits": 0}
+                    )
+                    entry["total"] += count
+                    entry["entries" if row_direction == Direction.entry else "exits"] += count
+                stats["buckets"] = [buckets[key] for key in sorted(buckets)]
+
             return stats
-        
+
         finally:
             session.close()
+
+    @staticmethod
+    def _time_bucket_expression(session, bucket: str):
+        if bucket not in _BUCKET_SQLITE_FORMATS:
+            raise ValueError(f"Unsupported time bucket: {bucket}")
+        if session.get_bind().dialect.name == "postgresql":
+            return func.date_trunc(bucket, Event.timestamp)
+        return func.strftime(_BUCKET_SQLITE_FORMATS[bucket], Event.timestamp)
     
     @staticmethod
-    def cleanup_old_events(days: int = 30):
-        """Delete events older than N days"""
+    def archive_old_events(days: Optional[int] = None, segment_rows: Optional[int] = None) -> int:
+        """
+        Move events older than N days into archive segment files; return the number moved.
+
+        Only one process archives at a time (others return 0 for this run). Each segment
+        is read in one short transaction, written and fsynced with no transaction open,
+        then its rows are deleted in a second short transaction.
+        """
+        days = settings.archive_after_days if days is None else days
+        segment_rows = max(1, segment_rows or settings.archive_segment_rows)
+        cutoff_date = datetime.utcnow() - timedelta(days=days)
+        archived = 0
+        session = SessionLocal()
+        try:
+            with event_archive.archiver() as acquired:
+                if not acquired:
+                    logger.info("Event archival already running in another worker, skipping this run")
+                    return 0
+                while True:
+                    with session.begin():
+                        events = (
+                            session.query(Event)
+                            .filter(Event.timestamp < cutoff_date)
+                            .order_by(Event.timestamp, Event.id)
+                            .limit(segment_rows)
+                            .all()
+                        )
+                    if not events:
+                        break
+                    event_archive.write_segment(events)
+                    with session.begin():
+                        session.query(Event).filter(
+                            Event.id.in_([event.id for event in events])
+                        ).delete(synchronize_session=False)
+                    archived += len(events)
+                    if len(events) < segment_rows:
+                        break
+
+            if archived:
+                logger.info(f"Archived {archived} events older than {days} days")
+            return archived
+
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error archiving events: {e}")
+            raise
+        finally:
+            session.close()
+
+    @staticmethod
+    def get_event_history(
+        start_time: datetime,
+        end_time: datetime,
+        floor_id: Optional[int] = None,
+        vehicle_type: Optional[str] = None,
+        direction: Optional[str] = None,
+        limit: int = 100,
+    ) -> Tuple[List, dict]:
+        """
+        Get the newest events in [start_time, end_time] from the events table and the archive.
+
+        Returns the merged page, newest first and deduplicated on the idempotency key, and
+        how many of its events came from each source.
+        """
+        session = SessionLocal()
+        try:
+            query = session.query(Event).filter(
+                Event.timestamp >= start_time,
+                Event.timestamp <= end_time,
+            )
+            if floor_id is not None:
+                query = query.filter(Event.floor_id == floor_id)
+            if vehicle_type is not None:
+                query = query.filter(Event.vehicle_type == VehicleType(vehicle_type))
+            if direction is not None:
+                query = query.filter(Event.direction == Direction(direction))
+            live = query.order_by(Event.timestamp.desc(), Event.id.desc()).limit(limit).all()
+        finally:
+            session.close()
+
+        archived = event_archive.query(
+            start_time, end_time,
+            floor_id=floor_id, vehicle_type=vehicle_type, direction=direction, limit=limit,
+        )
+
+        # Rows archived but not yet deleted (interrupted archival) appear in both sources.
+        def identity(event):
+            return event.camera_id, event.track_id, event.direction, event.timestamp
+
+        merged = {identity(event): event for event in archived}
+        merged.update((identity(event), event) for event in live)
+        events = sorted(merged.values(), key=lambda event: (event.timestamp, event.id), reverse=True)[:limit]
+        from_database = sum(1 for event in events if isinstance(event, Event))
+        return events, {"database": from_database, "archive": len(events) - from_database}
+
+    @staticmethod
+    def ensure_event_partitions() -> List[str]:
+        """Create upcoming events partitions when partitioning is enabled; return the new ones."""
+        session = SessionLocal()
+        try:
+            with session.begin():
+                connection = session.connection()
+                mode = partitioning_mode(connection)
+                if not mode or not is_events_partitioned(connection):
+                    return []
+                return ensure_partitions(connection, mode, ahead=settings.events_partitions_ahead)
+        finally:
+            session.close()
+
+    @staticmethod
+    def cleanup_old_events(days: int = 30, chunk_size: Optional[int] = None):
+        """
+        Delete events older than N days
+
+        Partitions lying entirely before the cutoff are detached and dropped; the rest
+        is deleted in chunks, each in its own short transaction, so retention never
+        holds long locks on the table ingestion writes to.
+        """
         session = SessionLocal()
         try:
             cutoff_date = datetime.utcnow() - timedelta(days=days)
-            
-            deleted = session.query(Event).filter(
-                Event.timestamp < cutoff_date
-            ).delete()
-            
-            session.commit()
+            chunk_size = max(1, chunk_size or settings.events_cleanup_chunk_size)
+            deleted = 0
+
+            with session.begin():
+                connection = session.connection()
+                partitioned = bool(partitioning_mode(connection)) and is_events_partitioned(connection)
+            if partitioned:
+                # Outside any session transaction: each detach/drop commits on its own.
+                deleted += drop_expired_partitions(session.get_bind(), cutoff_date)
+
+            while True:
+                with session.begin():
+                    chunk_ids = select(Event.id).where(Event.timestamp < cutoff_date).limit(chunk_size)
+                    removed = session.query(Event).filter(
+                        Event.timestamp < cutoff_date,
+                        Event.id.in_(chunk_ids.scalar_subquery()),
+                    ).delete(synchronize_session=False)
+                deleted += removed
+                if removed < chunk_size:
+                    break
+
             logger.info(f"Deleted {deleted} events older than {days} days")
             
             return deleted
@@ -374,6 +966,104 @@ class EventOperations:
             session.close()
 
 
+_FLOOR_CACHE_READS = {
+    "get_all_active_floors",
+    "get_floor_by_id",
+    "get_recommended_floor",
+    "get_ranked_floors",
+}
+
+
+def _served_from_floor_cache(name: str) -> bool:
+    return settings.floor_cache_enabled and floor_cache.is_loaded and name in _FLOOR_CACHE_READS
+
+
+class RollupOperations:
+    """Operations on OccupancyRollup model"""
+
+    @staticmethod
+    def get_occupancy_series(
+        granularity: str = "hour",
+        hours: int = 24,
+        floor_id: Optional[int] = None,
+    ) -> List[OccupancyRollup]:
+        """Get per-floor rollup buckets from the last N hours, oldest first; never touches events."""
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unsupported rollup granularity: {granularity}")
+        session = SessionLocal()
+        try:
+            start_time = datetime.utcnow() - timedelta(hours=hours)
+            query = session.query(OccupancyRollup).filter(
+                OccupancyRollup.granularity == granularity,
+                OccupancyRollup.bucket_start >= start_time,
+            )
+            if floor_id is not None:
+                query = query.filter(OccupancyRollup.floor_id == floor_id)
+            return query.order_by(OccupancyRollup.bucket_start, OccupancyRollup.floor_id).all()
+        finally:
+            session.close()
+
+    @staticmethod
+    def backfill_rollups(hours: int = 24) -> int:
+        """
+        Create missing rollup buckets for the last N hours from the events table.
+
+        Intended for history recorded before rollups existed; buckets that already exist
+        are left alone, and backfilled buckets carry entry/exit counts only.
+        """
+        session = SessionLocal()
+        try:
+            start_time = datetime.utcnow() - timedelta(hours=hours)
+            table = OccupancyRollup.__table__
+            created = 0
+            with session.begin():
+                for granularity in GRANULARITIES:
+                    bucket_expr = EventOperations._time_bucket_expression(session, granularity)
+                    rows = session.query(
+                        Event.floor_id, bucket_expr, Event.direction, func.count(Event.id)
+                    ).filter(Event.timestamp >= start_time).group_by(
+                        Event.floor_id, bucket_expr, Event.direction
+                    ).all()
+
+                    buckets = {}
+                    for floor_id, bucket_start, direction, count in rows:
+                        if isinstance(bucket_start, str):
+                            bucket_start = datetime.fromisoformat(bucket_start)
+                        row = buckets.setdefault(
+                            (floor_id, bucket_start),
+                            {
+                                "floor_id": floor_id,
+                                "granularity": granularity,
+                                "bucket_start": bucket_start,
+                                "entries": 0,
+                                "exits": 0,
+                                "updated_at": datetime.utcnow(),
+                            },
+                        )
+                        row["entries" if direction == Direction.entry else "exits"] += count
+
+                    if buckets:
+                        statement = upsert_statement(session).values(list(buckets.values()))
+                        statement = statement.on_conflict_do_nothing(
+                            index_elements=[table.c.floor_id, table.c.granularity, table.c.bucket_start]
+                        )
+                        created += session.execute(statement).rowcount or 0
+
+            logger.info(f"Backfilled {created} rollup buckets for the last {hours} hours")
+            return created
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error backfilling rollups: {e}")
+            raise
+        finally:
+            session.close()
+
+
+AsyncRollupOperations = AsyncOperations(RollupOperations)
+AsyncFloorOperations = AsyncOperations(FloorOperations, run_inline=_served_from_floor_cache)
+AsyncEventOperations = AsyncOperations(EventOperations)
+
+
 if __name__ == "__main__":
     # Initialize logging
     logging.basicConfig(
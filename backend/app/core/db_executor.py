@@ -0,0 +1,83 @@
+"""Bounded executor that keeps synchronous database work off the event loop."""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _default_worker_count() -> int:
+    if settings.database_executor_workers <= 0:
+        return 0
+    if "sqlite" in settings.database_url:
+        # SQLite runs on a single shared StaticPool connection, so calls must stay serialized.
+        return 1
+    return settings.database_executor_workers
+
+
+def configure_db_executor(max_workers: int) -> None:
+    """
+    (Re)create the database executor.
+
+    max_workers=0 runs database calls inline on the event loop (legacy behavior).
+    """
+    global _executor
+    previous = _executor
+    _executor = (
+        ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="smartpark-db")
+        if max_workers > 0
+        else None
+    )
+    if previous is not None:
+        previous.shutdown(wait=False)
+
+
+def shutdown_db_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+async def run_db(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking database callable on the bounded executor and await its result."""
+    if _executor is None:
+        return func(*args, **kwargs)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(func, *args, **kwargs))
+
+
+class AsyncOperations:
+    """
+    Awaitable facade exposing the same methods as a synchronous operations class.
+
+    run_inline(name) may return True for methods that are currently served from memory,
+    which are then called directly instead of paying for an executor round trip.
+    """
+
+    def __init__(self, operations: type, run_inline: Optional[Callable[[str], bool]] = None):
+        self._operations = operations
+        self._run_inline = run_inline
+
+    def __getattr__(self, name: str):
+        # Resolve on every access so patched/replaced operations are honoured.
+        target = getattr(self._operations, name)
+        if not callable(target):
+            return target
+
+        async def call(*args, **kwargs):
+            if self._run_inline is not None and self._run_inline(name):
+                return target(*args, **kwargs)
+            return await run_db(target, *args, **kwargs)
+
+        call.__name__ = name
+        return call
+
+
+configure_db_executor(_default_worker_count())
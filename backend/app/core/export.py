@@ -0,0 +1,68 @@
+"""Streaming NDJSON/CSV serialization of event exports."""
+
+import csv
+import io
+import json
+import logging
+from typing import AsyncIterator, Callable, Iterator, List, Sequence
+
+from app.core.db_executor import run_db
+
+logger = logging.getLogger(__name__)
+
+EXPORT_COLUMNS = (
+    "id", "camera_id", "floor_id", "track_id", "vehicle_type",
+    "direction", "confidence", "timestamp", "created_at",
+)
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _plain(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return getattr(value, "value", value)
+
+
+def format_ndjson(rows: Sequence[tuple]) -> str:
+    return "".join(
+        json.dumps(dict(zip(EXPORT_COLUMNS, map(_plain, row))), separators=(",", ":")) + "\n"
+        for row in rows
+    )
+
+
+def format_csv(rows: Sequence[tuple]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerows([_plain(value) for value in row] for row in rows)
+    return buffer.getvalue()
+
+
+def csv_header() -> str:
+    return ",".join(EXPORT_COLUMNS) + "\n"
+
+
+async def stream_export(chunks: Iterator[List[tuple]], export_format: str) -> AsyncIterator[str]:
+    """
+    Serialize row chunks as they are fetched.
+
+    Every chunk is pulled through the database executor, so only one chunk is held in
+    memory at a time and the event loop never blocks on the cursor.
+    """
+    formatter: Callable[[Sequence[tuple]], str] = format_csv if export_format == "csv" else format_ndjson
+    try:
+        if export_format == "csv":
+            yield csv_header()
+        while True:
+            chunk = await run_db(next, chunks, None)
+            if chunk is None:
+                break
+            yield formatter(chunk)
+    finally:
+        try:
+            await run_db(chunks.close)
+        except Exception as exc:
+            logger.warning(f"Failed to close export cursor: {exc}")
@@ -0,0 +1,55 @@
+"""Fast JSON responses built from plain rows instead of per-row Pydantic models."""
+
+import json
+from typing import Any, Iterable, Sequence
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without the optional dependency
+    orjson = None
+
+
+def _default(value: Any):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if hasattr(value, "value"):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode with orjson when installed (enums and naive datetimes serialize like Pydantic)."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, default=_default, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(Response):
+    """JSONResponse that skips response_model validation; content must already match the schema."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def floor_to_dict(floor) -> dict:
+    """Same fields as FloorResponse, read straight off a Floor row or FloorSnapshot."""
+    return {
+        "id": floor.id,
+        "name": floor.name,
+        "description": floor.description,
+        "total_slots": floor.total_slots,
+        "current_vehicles": floor.current_vehicles,
+        "available_slots": floor.available_slots,
+        "occupancy_percentage": floor.occupancy_percentage,
+        "is_active": floor.is_active,
+        "created_at": floor.created_at,
+        "updated_at": floor.updated_at,
+    }
+
+
+def rows_to_dicts(columns: Sequence[str], rows: Iterable[Sequence]) -> list:
+    return [dict(zip(columns, row)) for row in rows]
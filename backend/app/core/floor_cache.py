@@ -0,0 +1,277 @@
+"""Process-level floor occupancy cache kept coherent with the floors table."""
+
+import logging
+from contextlib import ExitStack
+from dataclasses import dataclass, fields
+from datetime import datetime
+from threading import Lock, RLock
+from time import monotonic
+from typing import Callable, Dict, List, Optional
+from uuid import uuid4
+
+from sqlalchemy import event, inspect
+
+from app.core.config import get_settings
+from app.core.database import SessionLocal
+from app.models.floor import Floor
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_PENDING_KEY = "floor_cache_pending"
+_WRITE_LOCK_STRIPES = 64
+
+
+@dataclass(frozen=True)
+class FloorSnapshot:
+    """Immutable copy of a floor row, shaped like the Floor model for serialization."""
+
+    id: int
+    name: str
+    description: Optional[str]
+    total_slots: int
+    current_vehicles: int
+    is_active: bool
+    created_at: datetime
+    updated_at: datetime
+    version: int = 0
+
+    @property
+    def available_slots(self) -> int:
+        return max(0, self.total_slots - self.current_vehicles)
+
+    @property
+    def occupancy_percentage(self) -> float:
+        if self.total_slots == 0:
+            return 0.0
+        return (self.current_vehicles / self.total_slots) * 100
+
+    @classmethod
+    def from_floor(cls, floor, version: int = 0) -> "FloorSnapshot":
+        return cls(
+            id=floor.id,
+            name=floor.name,
+            description=floor.description,
+            total_slots=floor.total_slots,
+            current_vehicles=floor.current_vehicles,
+            is_active=floor.is_active,
+            created_at=floor.created_at,
+            updated_at=floor.updated_at,
+            version=version,
+        )
+
+    def same_state(self, other: "FloorSnapshot") -> bool:
+        return all(
+            getattr(self, item.name) == getattr(other, item.name)
+            for item in fields(self)
+            if item.name != "version"
+        )
+
+
+# listener(floor_id, snapshot, version); snapshot is None when the floor was removed.
+FloorListener = Callable[[int, Optional[FloorSnapshot], int], None]
+
+
+class FloorStateCache:
+    """
+    Write-through cache of every floor row.
+
+    The ingestion path applies committed floor rows while holding the floor's
+    write_lock, ORM flushes of Floor objects are applied on commit, and reconcile()
+    periodically re-reads the table, under every write lock, to pick up writes made by
+    other processes. Every change bumps a monotonically increasing
+    version so readers can tell whether anything moved; versions are only comparable
+    within one epoch (one cache instance).
+    """
+
+    def __init__(self, loader: Callable[[], list]):
+        self._loader = loader
+        self.epoch = uuid4().hex[:8]
+        self._lock = RLock()
+        self._floors: Dict[int, FloorSnapshot] = {}
+        # Striped like the event locks so client-supplied floor ids cannot grow the table.
+        self._write_locks = [Lock() for _ in range(_WRITE_LOCK_STRIPES)]
+        self._listeners: List[FloorListener] = []
+        self._loaded = False
+        self.version = 0
+        self.reconciliations = 0
+        self.corrections = 0
+        self.last_reconciled_at: Optional[float] = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    def add_listener(self, listener: FloorListener, replay: bool = False) -> None:
+        """
+        Register a callback invoked on every change; it runs under the cache lock and must not block.
+
+        With replay=True the listener is first called for every cached floor, atomically with
+        registration, so it can build derived state without missing concurrent changes.
+        """
+        with self._lock:
+            if replay:
+                for snapshot in self._floors.values():
+                    listener(snapshot.id, snapshot, self.version)
+            self._listeners.append(listener)
+
+    def _notify(self, floor_id: int, snapshot: Optional[FloorSnapshot]) -> None:
+        for listener in self._listeners:
+            try:
+                listener(floor_id, snapshot, self.version)
+            except Exception as exc:
+                logger.warning(f"Floor cache listener failed: {exc}")
+
+    def write_lock(self, floor_id: int) -> Lock:
+        """
+        Lock that orders this process's writes to a floor with their cache updates.
+
+        Hold it from the floor UPDATE until after apply(): the database row lock already
+        serializes the commits, so applies then happen in commit order. updated_at cannot
+        order them, since it is stamped client-side before commit.
+        """
+        return self._write_locks[floor_id % len(self._write_locks)]
+
+    def write_locks(self, floor_ids) -> List[Lock]:
+        """write_lock() of several floors, each stripe once and in a fixed order to avoid deadlocks."""
+        stripes = sorted({floor_id % len(self._write_locks) for floor_id in floor_ids})
+        return [self._write_locks[stripe] for stripe in stripes]
+
+    def invalidate(self) -> None:
+        """Force a full reload on the next read."""
+        self._loaded = False
+
+    def ensure_loaded(self) -> None:
+        if not self._loaded:
+            self.reconcile()
+
+    def get(self, floor_id: int) -> Optional[FloorSnapshot]:
+        self.ensure_loaded()
+        return self._floors.get(floor_id)
+
+    def get_all_active(self) -> List[FloorSnapshot]:
+        self.ensure_loaded()
+        with self._lock:
+            floors = list(self._floors.values())
+        return sorted((floor for floor in floors if floor.is_active), key=lambda floor: floor.id)
+
+    def apply(self, floor, authoritative: bool = False) -> Optional[FloorSnapshot]:
+        """
+        Store the committed state of a floor and return the cached snapshot.
+
+        Authoritative updates (reconcile, or writers holding write_lock so they arrive in
+        commit order) always win. Other updates older than the cached row (by updated_at)
+        are ignored so they cannot roll the cache back.
+        """
+        with self._lock:
+            current = self._floors.get(floor.id)
+            candidate = FloorSnapshot.from_floor(floor, self.version + 1)
+            if current is not None:
+                if current.same_state(candidate):
+                    return current
+                if not authoritative and candidate.updated_at < current.updated_at:
+                    return current
+
+            self.version += 1
+            self._floors[floor.id] = candidate
+            self._notify(floor.id, candidate)
+            return candidate
+
+    def remove(self, floor_id: int) -> None:
+        with self._lock:
+            if self._floors.pop(floor_id, None) is not None:
+                self.version += 1
+                self._notify(floor_id, None)
+
+    def reconcile(self) -> int:
+        """Re-read the floors table, correct any drift and return the number of corrections."""
+        corrections = 0
+        with ExitStack() as writes:
+            # Every write lock, in stripe order, is held from the load until the rows are
+            # applied, so a write committed in between cannot be rolled back by a stale row.
+            for lock in self._write_locks:
+                writes.enter_context(lock)
+            rows = self._loader()
+            with self._lock:
+                seen = set()
+                for row in rows:
+                    seen.add(row.id)
+                    before = self._floors.get(row.id)
+                    after = self.apply(row, authoritative=True)
+                    if self._loaded and after is not before:
+                        corrections += 1
+                for floor_id in list(self._floors):
+                    if floor_id not in seen:
+                        self.remove(floor_id)
+                        corrections += 1
+
+                self._loaded = True
+                self.reconciliations += 1
+                self.corrections += corrections
+                self.last_reconciled_at = monotonic()
+
+        if corrections:
+            logger.info(f"Floor cache reconciled with {corrections} correction(s)")
+        return corrections
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": settings.floor_cache_enabled,
+                "loaded": self._loaded,
+                "epoch": self.epoch,
+                "version": self.version,
+                "floors": len(self._floors),
+                "reconciliations": self.reconciliations,
+                "corrections": self.corrections,
+            }
+
+
+def _load_floors() -> list:
+    session = SessionLocal()
+    try:
+        return session.query(Floor).all()
+    finally:
+        session.close()
+
+
+floor_cache = FloorStateCache(loader=_load_floors)
+
+
+# Keep the cache coherent with ORM writes made anywhere in this process (seeding,
+# admin scripts, update_vehicle_count). Snapshots are taken at flush time, when the
+# instance state is current, and only published once the transaction commits.
+@event.listens_for(SessionLocal, "after_flush")
+def _collect_floor_changes(session, _flush_context):
+    pending = session.info.setdefault(_PENDING_KEY, {})
+    for instance in list(session.new) + list(session.dirty):
+        if not isinstance(instance, Floor):
+            continue
+        state = inspect(instance)
+        if any(item.name not in state.dict for item in fields(FloorSnapshot) if item.name != "version"):
+            pending[instance.id] = None
+            continue
+        pending[instance.id] = FloorSnapshot.from_floor(instance)
+    for instance in session.deleted:
+        if isinstance(instance, Floor):
+            pending[instance.id] = False
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _publish_floor_changes(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    for floor_id, snapshot in pending.items():
+        if snapshot is False:
+            floor_cache.remove(floor_id)
+        elif snapshot is None:
+            # Expired attributes: fall back to a reload on the next read.
+            floor_cache.invalidate()
+        else:
+            floor_cache.apply(snapshot)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_floor_changes(session):
+    session.info.pop(_PENDING_KEY, None)
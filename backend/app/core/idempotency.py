@@ -0,0 +1,128 @@
+"""In-process fast path for event idempotency checks."""
+
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from enum import Enum
+from threading import Lock
+from time import monotonic
+from typing import List, Optional, Tuple
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+IdempotencyKey = Tuple[str, str, int, str]
+
+_MAX_EVENTS_PER_KEY = 4
+
+
+class Verdict(str, Enum):
+    duplicate = "duplicate"
+    new = "new"
+    unknown = "unknown"
+
+
+class IdempotencyCache:
+    """
+    Bounded TTL cache of events committed by this process, keyed like the event locks.
+
+    A lookup answers "duplicate" when a cached event falls inside the idempotency window,
+    and "new" when the whole window lies after the point from which the cache has seen
+    every commit (process start, pushed forward by evictions). Anything else is "unknown"
+    and must be checked against the events table.
+
+    "new" is only sound when this process sees every commit, i.e. a single worker; with
+    trust_misses off every miss falls back to the database.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, trust_misses: bool = False):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.trust_misses = trust_misses
+        self._lock = Lock()
+        self._entries: "OrderedDict[IdempotencyKey, Tuple[float, List]]" = OrderedDict()
+        self._complete_since = datetime.utcnow()
+        self.hits = 0
+        self.misses = 0
+        self.fallbacks = 0
+        self.evictions = 0
+
+    def lookup(self, key: IdempotencyKey, timestamp: datetime, window: timedelta) -> Tuple[Verdict, Optional[object]]:
+        window_start = timestamp - window
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                matches = [event for event in entry[1] if abs(event.timestamp - timestamp) <= window]
+                if matches:
+                    self.hits += 1
+                    return Verdict.duplicate, max(matches, key=lambda event: event.timestamp)
+
+            if self.trust_misses and window_start > self._complete_since:
+                self.misses += 1
+                return Verdict.new, None
+
+            self.fallbacks += 1
+            return Verdict.unknown, None
+
+    def record(self, key: IdempotencyKey, event) -> None:
+        """Remember a committed event; call while still holding the key's event lock."""
+        now = monotonic()
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            events = entry[1] if entry is not None else []
+            events.append(event)
+            if len(events) > _MAX_EVENTS_PER_KEY:
+                self._forget(events.pop(0))
+            self._entries[key] = (now, events)
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        while self._entries:
+            key, (inserted_at, events) = next(iter(self._entries.items()))
+            if len(self._entries) <= self.max_entries and now - inserted_at < self.ttl_seconds:
+                break
+            del self._entries[key]
+            self.evictions += 1
+            for event in events:
+                self._forget(event)
+
+    def _forget(self, event) -> None:
+        # Once an event leaves the cache, windows reaching back to it can no longer be
+        # answered from memory.
+        if event.timestamp >= self._complete_since:
+            self._complete_since = event.timestamp
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.fallbacks
+            return {
+                "enabled": settings.idempotency_cache_enabled,
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "fallbacks": self.fallbacks,
+                "evictions": self.evictions,
+                "db_lookups_avoided_ratio": round((self.hits + self.misses) / lookups, 4) if lookups else 0.0,
+            }
+
+
+def trust_misses_enabled() -> bool:
+    """IDEMPOTENCY_CACHE_TRUST_MISSES, forced off whenever more than one worker may be ingesting."""
+    if not settings.idempotency_cache_trust_misses:
+        return False
+    if settings.shared_state_path or settings.web_concurrency > 1:
+        logger.warning(
+            "IDEMPOTENCY_CACHE_TRUST_MISSES ignored: several workers (SHARED_STATE_PATH or "
+            "WEB_CONCURRENCY > 1) each see only their own commits"
+        )
+        return False
+    return True
+
+
+idempotency_cache = IdempotencyCache(
+    max_entries=settings.idempotency_cache_max_entries,
+    ttl_seconds=settings.idempotency_cache_ttl_seconds,
+    trust_misses=trust_misses_enabled(),
+)
@@ -1,11 +1,23 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 import sys
+import threading
+from typing import Dict, List, Optional
 
 from app.core.config import get_settings
 
 settings = get_settings()
 
+# High-volume INFO loggers that LOG_SAMPLE_* settings thin out.
+ACCESS_LOGGER_NAME = "app.access"
+EVENTS_LOGGER_NAME = "app.events"
+
+# How long a warning or error waits for room in a full log queue before it is dropped.
+WARNING_ENQUEUE_TIMEOUT_SECONDS = 1.0
+
 
 def _build_formatter() -> logging.Formatter:
     if settings.log_format.lower() == "json":
@@ -21,16 +33,194 @@ def _build_formatter() -> logging.Formatter:
     return logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 
 
+class SamplingFilter(logging.Filter):
+    """
+    Keep roughly `rate` of the INFO (and lower) records of a logger; warnings always pass.
+
+    Sampling is credit based rather than random, so a rate of 0.1 keeps exactly every
+    tenth record. Attached to the logger itself, dropped records are never formatted.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = min(1.0, max(0.0, rate))
+        self._lock = threading.Lock()
+        self._credit = 0.0
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO or self.rate >= 1.0:
+            return True
+        with self._lock:
+            self._credit += self.rate
+            if self._credit >= 1.0:
+                self._credit -= 1.0
+                return True
+            self.dropped += 1
+            return False
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that drops (and counts) INFO and lower records instead of blocking when
+    the queue is full. Warnings and errors wait up to WARNING_ENQUEUE_TIMEOUT_SECONDS for
+    the writer to make room and are only dropped (and counted) if it never does.
+    """
+
+    def __init__(self, log_queue: "queue.Queue"):
+        super().__init__(log_queue)
+        self._lock = threading.Lock()
+        self.dropped = 0
+        self.listener: Optional["BatchingQueueListener"] = None
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Records stay in this process, so skip the stdlib copy-and-format step and leave all
+        # message formatting to the writer thread.
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            if record.levelno < logging.WARNING:
+                self.queue.put_nowait(record)
+            else:
+                self.queue.put(record, timeout=WARNING_ENQUEUE_TIMEOUT_SECONDS)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+
+class BatchingQueueListener:
+    """
+    Background thread that drains the log queue and hands records to the real handlers.
+
+    After the first record of a batch arrives the thread lingers briefly so a burst is
+    collected, then writes up to batch_size records: stream and file handlers get the whole
+    batch in one write followed by a single flush, so formatting and disk I/O happen off
+    the request path and in large chunks.
+    """
+
+    _sentinel = None
+
+    def __init__(
+        self,
+        log_queue: "queue.Queue",
+        handlers: List[logging.Handler],
+        batch_size: int,
+        linger_seconds: float = 0.05,
+    ):
+        self.queue = log_queue
+        self.handlers = handlers
+        self.batch_size = max(1, batch_size)
+        self.linger_seconds = linger_seconds
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Flush everything already queued, then stop the thread."""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self.queue.put(self._sentinel)
+        self._thread.join()
+        self._thread = None
+        for handler in self.handlers:
+            handler.close()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self.queue.get()]
+            # Linger for a burst only when there is no backlog to drain already.
+            if batch[0] is not self._sentinel and self.linger_seconds > 0 and self.queue.qsize() < self.batch_size:
+                self._stopping.wait(self.linger_seconds)
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = self._sentinel in batch
+            records = [record for record in batch if record is not self._sentinel]
+            if records:
+                self._write(records)
+            if stopping:
+                return
+
+    def _write(self, records: List[logging.LogRecord]) -> None:
+        # Handlers sharing a formatter (stdout and the log file) reuse one formatted batch.
+        formatted: Dict[int, str] = {}
+        for handler in self.handlers:
+            accepted = [record for record in records if record.levelno >= handler.level and handler.filter(record)]
+            if not accepted:
+                continue
+            if not isinstance(handler, logging.StreamHandler):
+                for record in accepted:
+                    handler.handle(record)
+                continue
+            if getattr(handler.stream, "closed", False):
+                # Records drained at interpreter exit can outlive a replaced or closed stdout.
+                continue
+            try:
+                if len(accepted) == len(records) and id(handler.formatter) in formatted:
+                    text = formatted[id(handler.formatter)]
+                else:
+                    text = "".join(handler.format(record) + handler.terminator for record in accepted)
+                    if len(accepted) == len(records):
+                        formatted[id(handler.formatter)] = text
+                with handler.lock:
+                    handler.stream.write(text)
+                    handler.flush()
+            except Exception:
+                handler.handleError(accepted[0])
+
+
+def dropped_log_records() -> Dict[str, int]:
+    """Records dropped so far, by reason: a full log queue or LOG_SAMPLE_* sampling."""
+    queue_full = sum(
+        handler.dropped for handler in logging.getLogger().handlers if isinstance(handler, DroppingQueueHandler)
+    )
+    sampled = sum(
+        sampler.dropped
+        for name in (ACCESS_LOGGER_NAME, EVENTS_LOGGER_NAME)
+        for sampler in logging.getLogger(name).filters
+        if isinstance(sampler, SamplingFilter)
+    )
+    return {"queue_full": queue_full, "sampled": sampled}
+
+
+def _stop_previous_listeners(root_logger: logging.Logger) -> None:
+    for handler in root_logger.handlers:
+        listener = getattr(handler, "listener", None)
+        if listener is not None:
+            listener.stop()
+
+
+def _configure_sampling() -> None:
+    for name, rate in (
+        (ACCESS_LOGGER_NAME, settings.log_sample_access),
+        (EVENTS_LOGGER_NAME, settings.log_sample_events),
+    ):
+        sampled_logger = logging.getLogger(name)
+        for existing in [f for f in sampled_logger.filters if isinstance(f, SamplingFilter)]:
+            sampled_logger.removeFilter(existing)
+        if rate < 1.0:
+            sampled_logger.addFilter(SamplingFilter(rate))
+
+
 def _configure_logging() -> None:
     root_logger = logging.getLogger()
+    _stop_previous_listeners(root_logger)
     root_logger.handlers.clear()
     root_logger.setLevel(getattr(logging, settings.log_level.upper(), logging.INFO))
 
     formatter = _build_formatter()
+    handlers: List[logging.Handler] = []
 
     stream_handler = logging.StreamHandler(sys.stdout)
     stream_handler.setFormatter(formatter)
-    root_logger.addHandler(stream_handler)
+    handlers.append(stream_handler)
 
     if settings.log_file:
         log_dir = os.path.dirname(settings.log_file)
@@ -38,8 +228,22 @@ def _configure_logging() -> None:
             os.makedirs(log_dir, exist_ok=True)
         file_handler = logging.FileHandler(settings.log_file)
         file_handler.setFormatter(formatter)
-        root_logger.addHandler(file_handler)
+        handlers.append(file_handler)
+
+    if settings.log_queue_enabled:
+        queue_handler = DroppingQueueHandler(queue.Queue(maxsize=max(1, settings.log_queue_size)))
+        queue_handler.listener = BatchingQueueListener(queue_handler.queue, handlers, settings.log_batch_size)
+        queue_handler.listener.start()
+        atexit.register(queue_handler.listener.stop)
+        root_logger.addHandler(queue_handler)
+    else:
+        for handler in handlers:
+            root_logger.addHandler(handler)
+
+    _configure_sampling()
 
 
 _configure_logging()
 logger = logging.getLogger(__name__)
+access_logger = logging.getLogger(ACCESS_LOGGER_NAME)
+events_logger = logging.getLogger(EVENTS_LOGGER_NAME)
@@ -0,0 +1,117 @@
+"""Preaggregated database and ingestion metrics for the Prometheus endpoint."""
+
+import logging
+from collections import Counter
+from threading import Lock
+from time import perf_counter
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import event
+
+from app.core.config import get_settings
+from app.core.database import engine
+from app.core.monitoring import LatencyHistogram
+from app.core.shared_state import SharedStateStore, shared_state
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+QUERY_OPERATIONS = ("select", "insert", "update", "delete")
+OTHER_CAMERAS = "<other>"
+
+# (floor_id, camera_id, direction, result)
+IngestionKey = Tuple[int, str, str, str]
+
+
+class QueryMetrics:
+    """Per-operation latency histograms of every statement the engine executes."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._histograms: Dict[str, LatencyHistogram] = {}
+
+    def instrument(self, bind) -> None:
+        event.listen(bind, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(bind, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(self, _conn, _cursor, _statement, _parameters, context, _executemany) -> None:
+        if context is not None:
+            context._smartpark_query_started = perf_counter()
+
+    def _after_cursor_execute(self, _conn, _cursor, statement, _parameters, context, _executemany) -> None:
+        started = getattr(context, "_smartpark_query_started", None)
+        if started is None:
+            return
+        duration_ms = (perf_counter() - started) * 1000
+        operation = statement.lstrip()[:6].lower()
+        if operation not in QUERY_OPERATIONS:
+            operation = "other"
+        with self._lock:
+            histogram = self._histograms.get(operation)
+            if histogram is None:
+                histogram = self._histograms[operation] = LatencyHistogram()
+            histogram.record(duration_ms)
+
+    def histograms(self) -> Dict[str, LatencyHistogram]:
+        with self._lock:
+            return {operation: histogram.copy() for operation, histogram in self._histograms.items()}
+
+
+class IngestionMetrics:
+    """
+    Event counts by floor, camera, direction and result (recorded or duplicate).
+
+    Camera ids come from clients, so at most max_cameras distinct ids are labelled; the
+    rest are counted under "<other>". With a SharedStateStore the counts are buffered
+    into the store and shared by all workers once flushed.
+    """
+
+    def __init__(self, max_cameras: int, shared_store: Optional[SharedStateStore] = None):
+        self.max_cameras = max(1, max_cameras)
+        self.shared_store = shared_store
+        self._lock = Lock()
+        self._counts: Counter = Counter()
+        self._cameras: set[str] = set()
+
+    def _camera_label(self, camera_id: str) -> str:
+        if camera_id in self._cameras:
+            return camera_id
+        with self._lock:
+            if len(self._cameras) >= self.max_cameras:
+                return OTHER_CAMERAS
+            self._cameras.add(camera_id)
+        return camera_id
+
+    def record(self, entries: Iterable[Tuple[int, str, str, str]]) -> None:
+        counts = Counter(
+            (floor_id, self._camera_label(camera_id), direction, result)
+            for floor_id, camera_id, direction, result in entries
+        )
+        if not counts:
+            return
+        if self.shared_store is not None:
+            self.shared_store.buffer(
+                counters=(
+                    (f"ingest:{floor_id}|{camera_id}|{direction}|{result}", count)
+                    for (floor_id, camera_id, direction, result), count in counts.items()
+                )
+            )
+            return
+        with self._lock:
+            self._counts.update(counts)
+
+    def counts(self) -> Dict[IngestionKey, int]:
+        if self.shared_store is not None:
+            counts = {}
+            for name, count in self.shared_store.counters("ingest:").items():
+                parts = name.split("|")
+                camera_id = "|".join(parts[1:-2])
+                counts[(int(parts[0]), camera_id, parts[-2], parts[-1])] = int(count)
+            return counts
+        with self._lock:
+            return dict(self._counts)
+
+
+query_metrics = QueryMetrics()
+query_metrics.instrument(engine)
+ingestion_metrics = IngestionMetrics(max_cameras=settings.metrics_max_cameras, shared_store=shared_state)
@@ -0,0 +1,128 @@
+"""Pure ASGI middleware for API-key auth, rate limiting, request metrics and access logs."""
+
+import logging
+from time import perf_counter
+from typing import Sequence
+
+from fastapi import status
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.logging import access_logger
+from app.core.monitoring import MonitoringState, route_template
+from app.core.security import InMemoryRateLimiter, is_public_path, is_valid_api_key
+from app.schemas import ErrorResponse
+
+logger = logging.getLogger(__name__)
+
+
+def _error_response(error: str, detail: str, status_code: int, headers=None) -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        content=ErrorResponse(error=error, detail=detail, status_code=status_code).model_dump(),
+        headers=headers,
+    )
+
+
+def client_identifier(scope: Scope, headers: Headers) -> str:
+    """Best-effort client identifier for rate limiting (scope counterpart of get_client_identifier)."""
+    forwarded_for = headers.get("x-forwarded-for")
+    if forwarded_for:
+        return forwarded_for.split(",")[0].strip()
+    client = scope.get("client")
+    if client and client[0]:
+        return client[0]
+    return "unknown"
+
+
+class RequestSecurityMiddleware:
+    """
+    Authenticate, rate limit, time and log every HTTP request.
+
+    Written against raw ASGI rather than BaseHTTPMiddleware, so a request costs one
+    wrapped `send` instead of an extra task and a re-streamed response body, and
+    streaming responses pass through untouched. Latency is measured to the response
+    start, the point at which call_next used to return. WebSocket and lifespan
+    scopes are passed straight to the app.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        rate_limiter: InMemoryRateLimiter,
+        monitoring: MonitoringState,
+        api_key_header: str,
+        routes: Sequence = (),
+    ):
+        self.app = app
+        self.rate_limiter = rate_limiter
+        self.monitoring = monitoring
+        self.api_key_header = api_key_header
+        self.routes = routes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = perf_counter()
+        headers = Headers(scope=scope)
+        path = scope["path"]
+        method = scope["method"]
+        client = client_identifier(scope, headers)
+        status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+        response_started_at = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_started_at
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                response_started_at = perf_counter()
+            await send(message)
+
+        try:
+            response = await self._reject(method, path, client, headers)
+            if response is not None:
+                await response(scope, receive, send_wrapper)
+            else:
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            duration_ms = ((response_started_at or perf_counter()) - start) * 1000
+            self.monitoring.record_request(
+                method=method,
+                route=route_template(scope, self.routes),
+                status_code=status_code,
+                duration_ms=duration_ms,
+            )
+            access_logger.info(
+                "%s %s status=%s duration_ms=%.2f client=%s request_id=%s",
+                method, path, status_code, duration_ms, client, headers.get("x-request-id", "n/a"),
+            )
+
+    async def _reject(self, method: str, path: str, client: str, headers: Headers):
+        """Return the 401/429 response for a request that must not reach the app, else None."""
+        if method == "OPTIONS" or is_public_path(path):
+            return None
+
+        api_key = headers.get(self.api_key_header)
+        if not is_valid_api_key(api_key):
+            return _error_response(
+                "Authentication Error", "Invalid or missing API key", status.HTTP_401_UNAUTHORIZED
+            )
+
+        if self.rate_limiter.blocking:
+            allowed, retry_after = await run_in_threadpool(self.rate_limiter.check, client, budget_key=api_key)
+        else:
+            allowed, retry_after = self.rate_limiter.check(client, budget_key=api_key)
+        if allowed:
+            return None
+        logger.warning(f"Rate limit exceeded: client={client} path={path} retry_after={retry_after}s")
+        return _error_response(
+            "Too Many Requests",
+            "Rate limit exceeded",
+            status.HTTP_429_TOO_MANY_REQUESTS,
+            headers={"Retry-After": str(retry_after)},
+        )
@@ -2,24 +2,70 @@
 
 import logging
 from sqlalchemy import inspect, text
+from app.core.config import get_settings
 from app.core.database import engine, Base, SessionLocal
+from app.core.partitions import (
+    create_partitioned_events_table, ensure_partitions, is_events_partitioned, partitioning_mode,
+)
 from app.models.floor import Floor
 from app.models.event import Event
+from app.models.rollup import OccupancyRollup
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 
 def create_tables():
     """Create all database tables"""
     try:
         logger.info("Creating database tables...")
-        Base.metadata.create_all(bind=engine)
+        with engine.begin() as connection:
+            mode = partitioning_mode(connection)
+            if mode and not inspect(connection).has_table(Event.__tablename__):
+                Floor.__table__.create(connection, checkfirst=True)
+                create_partitioned_events_table(connection)
+            Base.metadata.create_all(bind=connection)
+            if mode:
+                if is_events_partitioned(connection):
+                    ensure_partitions(connection, mode, ahead=settings.events_partitions_ahead)
+                else:
+                    logger.warning(
+                        "EVENTS_PARTITIONING is set but the existing events table is not partitioned; "
+                        "migrate it manually to enable partition-drop retention"
+                    )
         logger.info("Database tables created successfully")
     except Exception as e:
         logger.error(f"Error creating database tables: {e}")
         raise
 
 
+def ensure_indexes() -> list:
+    """
+    Create model indexes missing from tables that already exist and return their names.
+
+    create_all() skips existing tables entirely, so indexes added to a model later
+    (e.g. ix_event_timestamp_id for keyset pagination) would otherwise never reach
+    databases created before them.
+    """
+    created = []
+    try:
+        with engine.begin() as connection:
+            inspector = inspect(connection)
+            for table in Base.metadata.sorted_tables:
+                if not inspector.has_table(table.name):
+                    continue
+                existing = {index["name"] for index in inspector.get_indexes(table.name)}
+                for index in table.indexes:
+                    if index.name not in existing:
+                        logger.info(f"Creating missing index {index.name} on {table.name}...")
+                        index.create(connection, checkfirst=True)
+                        created.append(index.name)
+        return created
+    except Exception as e:
+        logger.error(f"Error creating missing indexes: {e}")
+        raise
+
+
 def drop_tables():
     """Drop all database tables (Use with caution!)"""
     try:
@@ -32,11 +78,11 @@ def drop_tables():
 
 
 def check_tables_exist() -> bool:
-    """Check if tables exist in database"""
+    """Check if every model table exists in database"""
     try:
         inspector = inspect(engine)
         tables = inspector.get_table_names()
-        return len(tables) > 0
+        return set(Base.metadata.tables).issubset(tables)
     except Exception as e:
         logger.error(f"Error checking tables: {e}")
         return False
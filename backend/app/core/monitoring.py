@@ -1,96 +1,426 @@
 """Runtime monitoring and simple alerting for backend API."""
 
-from collections import Counter, deque
+import logging
+import math
+from collections import Counter
 from dataclasses import dataclass
 from threading import Lock
-from typing import Deque
+from time import time
+from typing import Dict, Iterable, Optional
 from datetime import datetime
 
+from starlette.routing import Match
+
+from app.core.shared_state import SharedStateStore
+
+logger = logging.getLogger(__name__)
+
+
+LATENCY_STATISTICS = ("mean", "p50", "p95", "p99", "max")
+
+UNMATCHED_ROUTE = "<unmatched>"
+OTHER_ROUTES = "<other>"
+
+WINDOWS = {"1m": 60, "5m": 300, "15m": 900}
+WINDOW_BUCKET_SECONDS = 10
+WINDOW_SLOTS = max(WINDOWS.values()) // WINDOW_BUCKET_SECONDS
+
+# Bucket i covers (MIN * GROWTH**(i-1), MIN * GROWTH**i] ms: 8 buckets per doubling from
+# 10us to ~2 minutes, so any percentile is reported within ~9% of the true value.
+_LATENCY_MIN_MS = 0.01
+_LATENCY_GROWTH = 2 ** 0.125
+_LATENCY_BUCKETS = 190
+_LOG_GROWTH = math.log(_LATENCY_GROWTH)
+_LATENCY_UPPER_MS = [_LATENCY_MIN_MS * _LATENCY_GROWTH ** index for index in range(_LATENCY_BUCKETS)]
+
 
 @dataclass
 class MonitoringThresholds:
     error_rate_threshold: float
     latency_ms_threshold: float
     low_availability_threshold: int
+    latency_statistic: str = "p95"
+
+
+def route_template(scope: dict, routes: Iterable = ()) -> str:
+    """
+    Path template of the route that handled (or would handle) a request.
+
+    FastAPI stores the matched route in the scope while routing. Requests answered before
+    routing (auth failures, rate limiting) are matched against routes here instead, so
+    /floors/1 and /floors/2 both report as /floors/{floor_id}.
+    """
+    route = scope.get("route")
+    if route is None:
+        for candidate in routes:
+            match, _ = candidate.matches(scope)
+            if match != Match.NONE:
+                route = candidate
+                break
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+def _window_name(seconds: int) -> str:
+    """Smallest standard window covering seconds (the largest if none does)."""
+    for name, window_seconds in WINDOWS.items():
+        if seconds <= window_seconds:
+            return name
+    return name
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram with O(1) updates and mergeable bucket counts."""
+
+    __slots__ = ("counts", "count", "total_ms", "max_ms")
+
+    def __init__(self):
+        self.counts = [0] * _LATENCY_BUCKETS
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    @staticmethod
+    def bucket_index(duration_ms: float) -> int:
+        if duration_ms <= _LATENCY_MIN_MS:
+            return 0
+        index = math.ceil(math.log(duration_ms / _LATENCY_MIN_MS) / _LOG_GROWTH)
+        return min(index, _LATENCY_BUCKETS - 1)
+
+    @staticmethod
+    def bucket_upper_ms(index: int) -> float:
+        return _LATENCY_UPPER_MS[index]
+
+    def record(self, duration_ms: float) -> None:
+        self.counts[self.bucket_index(duration_ms)] += 1
+        self.count += 1
+        self.total_ms += duration_ms
+        if duration_ms > self.max_ms:
+            self.max_ms = duration_ms
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        if not other.count:
+            return
+        self.counts = [mine + theirs for mine, theirs in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total_ms += other.total_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+
+    def copy(self) -> "LatencyHistogram":
+        histogram = LatencyHistogram()
+        histogram.merge(self)
+        return histogram
+
+    def cumulative_counts(self, bounds_ms: Iterable[float]) -> list[int]:
+        """Samples at or below each bound, counting only buckets that end at or below it."""
+        counts = []
+        seen = 0
+        index = 0
+        for bound in bounds_ms:
+            while index < _LATENCY_BUCKETS and _LATENCY_UPPER_MS[index] <= bound:
+                seen += self.counts[index]
+                index += 1
+            counts.append(seen)
+        return counts
+
+    @classmethod
+    def from_buckets(cls, buckets: Dict[int, int], total_ms: float, max_ms: float) -> "LatencyHistogram":
+        histogram = cls()
+        for index, bucket_count in buckets.items():
+            histogram.counts[index] += bucket_count
+            histogram.count += bucket_count
+        histogram.total_ms = total_ms
+        histogram.max_ms = max_ms
+        return histogram
+
+    def percentile(self, fraction: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(fraction * self.count))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(self.bucket_upper_ms(index), self.max_ms)
+        return self.max_ms
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "p50": round(self.percentile(0.50), 2),
+            "p95": round(self.percentile(0.95), 2),
+            "p99": round(self.percentile(0.99), 2),
+            "max": round(self.max_ms, 2),
+        }
+
+
+class _TimeBucket:
+    """Request totals for one WINDOW_BUCKET_SECONDS slice of wall-clock time."""
+
+    __slots__ = ("index", "requests", "errors_5xx", "errors_4xx", "latency")
+
+    def __init__(self, index: int = -1):
+        self.index = index
+        self.requests = 0
+        self.errors_5xx = 0
+        self.errors_4xx = 0
+        self.latency = LatencyHistogram()
+
+    def add(self, status_code: int, duration_ms: float) -> None:
+        self.requests += 1
+        if status_code >= 500:
+            self.errors_5xx += 1
+        elif status_code >= 400:
+            self.errors_4xx += 1
+        self.latency.record(duration_ms)
+
+
+def summarize_windows(buckets: Iterable[_TimeBucket], now_index: int) -> Dict[str, dict]:
+    """Fold time buckets into the 1m/5m/15m windows ending at now_index."""
+    totals = {name: _TimeBucket() for name in WINDOWS}
+    for bucket in buckets:
+        age = (now_index - bucket.index) * WINDOW_BUCKET_SECONDS
+        if age < 0 or not bucket.requests:
+            continue
+        for name, seconds in WINDOWS.items():
+            if age < seconds:
+                total = totals[name]
+                total.requests += bucket.requests
+                total.errors_5xx += bucket.errors_5xx
+                total.errors_4xx += bucket.errors_4xx
+                total.latency.merge(bucket.latency)
+
+    summaries = {}
+    for name, seconds in WINDOWS.items():
+        total = totals[name]
+        summaries[name] = {
+            "seconds": seconds,
+            "requests": total.requests,
+            "requests_per_second": round(total.requests / seconds, 3),
+            "5xx_count": total.errors_5xx,
+            "4xx_count": total.errors_4xx,
+            "error_rate": round(total.errors_5xx / total.requests, 4) if total.requests else 0.0,
+            "latency_ms": total.latency.summary(),
+        }
+    return summaries
 
 
 class MonitoringState:
-    """In-memory metrics aggregator for operational observability."""
+    """
+    Metrics aggregator for operational observability.
 
-    def __init__(self, history_size: int, thresholds: MonitoringThresholds):
-        self.history_size = max(50, history_size)
+    Requests are folded into fixed time buckets as they are recorded, so snapshots and
+    alert checks merge at most WINDOW_SLOTS buckets instead of rescanning request history.
+    Per-route metrics are keyed by route template and capped at max_routes keys, so
+    scanners probing random paths cannot grow memory without bound.
+    Metrics are kept in process memory unless a SharedStateStore is given, in which case
+    every worker buffers its requests into the store and snapshots read the shared totals
+    as of each worker's last flush.
+    """
+
+    def __init__(
+        self,
+        thresholds: MonitoringThresholds,
+        alert_window_seconds: int = 300,
+        shared_store: Optional[SharedStateStore] = None,
+        max_routes: int = 200,
+    ):
         self.thresholds = thresholds
+        self.max_routes = max(1, max_routes)
+        self.alert_window = _window_name(alert_window_seconds)
+        self.shared_store = shared_store
         self._lock = Lock()
-        self.request_history: Deque[dict] = deque(maxlen=self.history_size)
+        self._buckets = [_TimeBucket() for _ in range(WINDOW_SLOTS)]
+        self._pruned_before = 0
         self.route_counts: Counter = Counter()
+        self.route_status_counts: Counter = Counter()
         self.status_counts: Counter = Counter()
         self.error_counts: Counter = Counter()
+        self.route_latency: Dict[str, LatencyHistogram] = {}
+        self._route_keys: set[str] = set()
         self.started_at = datetime.utcnow().isoformat()
 
-    def record_request(self, *, method: str, path: str, status_code: int, duration_ms: float) -> None:
+    def _route_key(self, method: str, route: str) -> str:
+        """Metric key for a route template, folding anything past max_routes into one bucket."""
+        key = UNMATCHED_ROUTE if route == UNMATCHED_ROUTE else f"{method} {route}"
+        if key in self._route_keys:
+            return key
         with self._lock:
-            self.request_history.append(
-                {
-                    "method": method,
-                    "path": path,
-                    "status_code": status_code,
-                    "duration_ms": duration_ms,
-                }
-            )
-            self.route_counts[f"{method} {path}"] += 1
+            if len(self._route_keys) >= self.max_routes:
+                return OTHER_ROUTES
+            self._route_keys.add(key)
+        return key
+
+    def record_request(self, *, method: str, route: str, status_code: int, duration_ms: float) -> None:
+        """Record one request; route is the matched path template (see route_template)."""
+        route = self._route_key(method, route)
+        bucket_index = int(time() // WINDOW_BUCKET_SECONDS)
+        if self.shared_store is not None:
+            self._record_shared(route, status_code, duration_ms, bucket_index)
+            return
+
+        with self._lock:
+            bucket = self._buckets[bucket_index % WINDOW_SLOTS]
+            if bucket.index != bucket_index:
+                bucket = self._buckets[bucket_index % WINDOW_SLOTS] = _TimeBucket(bucket_index)
+            bucket.add(status_code, duration_ms)
+            route_latency = self.route_latency.get(route)
+            if route_latency is None:
+                route_latency = self.route_latency[route] = LatencyHistogram()
+            route_latency.record(duration_ms)
+            self.route_counts[route] += 1
+            self.route_status_counts[(route, status_code)] += 1
             self.status_counts[str(status_code)] += 1
             if status_code >= 500:
                 self.error_counts["5xx"] += 1
             elif status_code >= 400:
                 self.error_counts["4xx"] += 1
 
-    def snapshot(self) -> dict:
-        with self._lock:
-            recent = list(self.request_history)
-
-        total_requests = len(recent)
-        total_errors = sum(1 for item in recent if int(item["status_code"]) >= 500)
-        avg_latency = (
-            sum(float(item["duration_ms"]) for item in recent) / total_requests
-            if total_requests
-            else 0.0
+    def _record_shared(self, route: str, status_code: int, duration_ms: float, bucket_index: int) -> None:
+        latency_index = LatencyHistogram.bucket_index(duration_ms)
+        counters = [
+            (f"route:{route}", 1),
+            (f"route_status:{route}|{status_code}", 1),
+            (f"status:{status_code}", 1),
+            (f"latency:{route}|{latency_index}", 1),
+            (f"latency_sum:{route}", duration_ms),
+        ]
+        window_counters = [
+            (bucket_index, "requests", 1),
+            (bucket_index, f"latency|{latency_index}", 1),
+            (bucket_index, "latency_sum", duration_ms),
+        ]
+        if status_code >= 500:
+            counters.append(("error:5xx", 1))
+            window_counters.append((bucket_index, "5xx", 1))
+        elif status_code >= 400:
+            counters.append(("error:4xx", 1))
+            window_counters.append((bucket_index, "4xx", 1))
+        self.shared_store.buffer(
+            counters=counters,
+            maxima=[(f"latency_max:{route}", duration_ms)],
+            window_counters=window_counters,
+            window_maxima=[(bucket_index, "latency_max", duration_ms)],
         )
-        error_rate = (total_errors / total_requests) if total_requests else 0.0
+        if bucket_index - WINDOW_SLOTS >= self._pruned_before:
+            self._pruned_before = bucket_index - WINDOW_SLOTS + 1
+            self.shared_store.buffer_prune_windows(self._pruned_before)
+
+    def _shared_buckets(self, now_index: int) -> list[_TimeBucket]:
+        buckets = []
+        for index, values in self.shared_store.window_counters(now_index - WINDOW_SLOTS + 1).items():
+            bucket = _TimeBucket(index)
+            bucket.requests = int(values.get("requests", 0))
+            bucket.errors_5xx = int(values.get("5xx", 0))
+            bucket.errors_4xx = int(values.get("4xx", 0))
+            latency_buckets = {
+                int(name.partition("|")[2]): int(count)
+                for name, count in values.items()
+                if name.startswith("latency|")
+            }
+            bucket.latency = LatencyHistogram.from_buckets(
+                latency_buckets, values.get("latency_sum", 0.0), values.get("latency_max", 0.0)
+            )
+            buckets.append(bucket)
+        return buckets
+
+    def _shared_route_histograms(self) -> Dict[str, LatencyHistogram]:
+        store = self.shared_store
+        buckets: Dict[str, Dict[int, int]] = {}
+        for name, count in store.counters("latency:").items():
+            route, _, index = name.rpartition("|")
+            buckets.setdefault(route, {})[int(index)] = int(count)
+        sums = store.counters("latency_sum:")
+        maxima = store.counters("latency_max:")
+        return {
+            route: LatencyHistogram.from_buckets(route_buckets, sums.get(route, 0.0), maxima.get(route, 0.0))
+            for route, route_buckets in buckets.items()
+        }
+
+    def route_series(self) -> tuple[Counter, Dict[str, LatencyHistogram]]:
+        """Lifetime request counts by (route, status code) and latency histograms by route."""
+        if self.shared_store is not None:
+            route_status_counts = Counter()
+            for name, count in self.shared_store.counters("route_status:").items():
+                route, _, status_code = name.rpartition("|")
+                route_status_counts[(route, int(status_code))] = int(count)
+            return route_status_counts, self._shared_route_histograms()
+        with self._lock:
+            route_latency = {}
+            for route, histogram in self.route_latency.items():
+                route_latency[route] = histogram.copy()
+            return self.route_status_counts.copy(), route_latency
+
+    def _shared_route_view(self) -> tuple[dict, Counter, Dict[str, dict], str]:
+        store = self.shared_store
+        status_counts = {code: int(count) for code, count in store.counters("status:").items()}
+        route_counts = Counter({route: int(count) for route, count in store.counters("route:").items()})
+        route_latency = {route: histogram.summary() for route, histogram in self._shared_route_histograms().items()}
+        started_at = store.get_meta("started_at") or self.started_at
+        return status_counts, route_counts, route_latency, started_at
+
+    def windows(self) -> Dict[str, dict]:
+        """Request, error and latency totals over the last 1, 5 and 15 minutes."""
+        now_index = int(time() // WINDOW_BUCKET_SECONDS)
+        if self.shared_store is not None:
+            return summarize_windows(self._shared_buckets(now_index), now_index)
+        with self._lock:
+            return summarize_windows(self._buckets, now_index)
+
+    def snapshot(self) -> dict:
+        windows = self.windows()
+        if self.shared_store is not None:
+            status_counts, route_counts, route_latency, started_at = self._shared_route_view()
+        else:
+            with self._lock:
+                status_counts = dict(self.status_counts)
+                route_counts = self.route_counts.copy()
+                route_latency = {route: histogram.summary() for route, histogram in self.route_latency.items()}
+            started_at = self.started_at
 
+        recent = windows[self.alert_window]
         return {
-            "started_at": self.started_at,
-            "history_window_size": self.history_size,
-            "recent_request_count": total_requests,
-            "recent_5xx_count": total_errors,
-            "recent_error_rate": round(error_rate, 4),
-            "recent_avg_latency_ms": round(avg_latency, 2),
-            "status_counts": dict(self.status_counts),
-            "top_routes": self.route_counts.most_common(10),
+            "started_at": started_at,
+            "state_backend": "shared" if self.shared_store is not None else "memory",
+            "recent_window_seconds": recent["seconds"],
+            "recent_request_count": recent["requests"],
+            "recent_5xx_count": recent["5xx_count"],
+            "recent_error_rate": recent["error_rate"],
+            "recent_avg_latency_ms": recent["latency_ms"]["mean"],
+            "recent_latency_ms": recent["latency_ms"],
+            "windows": windows,
+            "route_latency_ms": route_latency,
+            "status_counts": status_counts,
+            "top_routes": route_counts.most_common(10),
         }
 
     def evaluate_alerts(self, *, low_availability_floors: list[dict] | None = None) -> list[dict]:
-        snapshot = self.snapshot()
+        recent = self.windows()[self.alert_window]
         alerts: list[dict] = []
 
-        if snapshot["recent_error_rate"] >= self.thresholds.error_rate_threshold:
+        if recent["requests"] and recent["error_rate"] >= self.thresholds.error_rate_threshold:
             alerts.append(
                 {
                     "code": "HIGH_ERROR_RATE",
                     "severity": "high",
                     "message": (
-                        f"Recent 5xx error rate {snapshot['recent_error_rate']:.2%} "
+                        f"Recent 5xx error rate {recent['error_rate']:.2%} "
                         f"exceeds threshold {self.thresholds.error_rate_threshold:.2%}"
                     ),
                 }
             )
 
-        if snapshot["recent_avg_latency_ms"] >= self.thresholds.latency_ms_threshold:
+        statistic = self.thresholds.latency_statistic
+        if statistic not in LATENCY_STATISTICS:
+            statistic = "mean"
+        latency = recent["latency_ms"][statistic]
+        if recent["requests"] and latency >= self.thresholds.latency_ms_threshold:
             alerts.append(
                 {
                     "code": "HIGH_LATENCY",
                     "severity": "medium",
                     "message": (
-                        f"Recent average latency {snapshot['recent_avg_latency_ms']:.2f}ms "
+                        f"Recent {statistic} latency {latency:.2f}ms "
                         f"exceeds threshold {self.thresholds.latency_ms_threshold:.2f}ms"
                     ),
                 }
@@ -0,0 +1,200 @@
+"""Optional time-range partitioning of the events table on PostgreSQL."""
+
+import logging
+import re
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from app.core.config import get_settings
+from app.models.event import Event
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+PARTITION_GRANULARITIES = ("monthly", "daily")
+# How long a plain DETACH may wait for its lock on events before giving up for this run.
+DETACH_LOCK_TIMEOUT = "5s"
+
+_TABLE = Event.__tablename__
+_PARTITION_NAME = re.compile(rf"^{_TABLE}_p(\d{{4}})_(\d{{2}})(?:_(\d{{2}}))?$")
+
+
+def partitioning_mode(connection) -> Optional[str]:
+    """Configured granularity when partitioning applies to this database, else None."""
+    mode = settings.events_partitioning.strip().lower()
+    if mode in ("", "none") or connection.dialect.name != "postgresql":
+        return None
+    if mode not in PARTITION_GRANULARITIES:
+        logger.warning(f"Unknown events partitioning mode {mode!r}, partitioning disabled")
+        return None
+    return mode
+
+
+def period_start(timestamp: datetime, granularity: str) -> datetime:
+    if granularity == "monthly":
+        return datetime(timestamp.year, timestamp.month, 1)
+    return datetime(timestamp.year, timestamp.month, timestamp.day)
+
+
+def next_period(start: datetime, granularity: str) -> datetime:
+    if granularity == "monthly":
+        return datetime(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return start + timedelta(days=1)
+
+
+def partition_name(start: datetime, granularity: str) -> str:
+    if granularity == "monthly":
+        return f"{_TABLE}_p{start:%Y_%m}"
+    return f"{_TABLE}_p{start:%Y_%m_%d}"
+
+
+def partition_range(name: str) -> Optional[Tuple[datetime, datetime]]:
+    """[start, end) covered by a partition created by this module, from its name."""
+    match = _PARTITION_NAME.match(name)
+    if not match:
+        return None
+    year, month, day = match.groups()
+    if day is None:
+        start = datetime(int(year), int(month), 1)
+        return start, next_period(start, "monthly")
+    start = datetime(int(year), int(month), int(day))
+    return start, next_period(start, "daily")
+
+
+def is_events_partitioned(connection) -> bool:
+    return connection.execute(
+        text(
+            "SELECT 1 FROM pg_partitioned_table p "
+            "JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = :table AND pg_table_is_visible(c.oid)"
+        ),
+        {"table": _TABLE},
+    ).first() is not None
+
+
+def list_partitions(connection) -> List[str]:
+    rows = connection.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits i "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "JOIN pg_class child ON child.oid = i.inhrelid "
+            "WHERE parent.relname = :table AND pg_table_is_visible(parent.oid)"
+        ),
+        {"table": _TABLE},
+    )
+    return sorted(row[0] for row in rows)
+
+
+def create_partitioned_events_table(connection) -> None:
+    """
+    Create `events` as a RANGE-partitioned table with a DEFAULT partition.
+
+    PostgreSQL requires unique constraints on a partitioned table to include the
+    partition key, so the primary key becomes (id, timestamp); the idempotency
+    constraint already contains timestamp.
+    """
+    table = Event.__table__
+    vehicle_type = table.c.vehicle_type.type
+    direction = table.c.direction.type
+    vehicle_type.create(connection, checkfirst=True)
+    direction.create(connection, checkfirst=True)
+
+    connection.execute(text(f"""
+        CREATE TABLE {_TABLE} (
+            id SERIAL NOT NULL,
+            camera_id VARCHAR(100) NOT NULL,
+            floor_id INTEGER NOT NULL REFERENCES floors (id),
+            track_id VARCHAR(100) NOT NULL,
+            vehicle_type {vehicle_type.name} NOT NULL,
+            direction {direction.name} NOT NULL,
+            confidence FLOAT NOT NULL,
+            timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            PRIMARY KEY (id, timestamp),
+            CONSTRAINT uq_event_idempotency UNIQUE (camera_id, track_id, direction, timestamp),
+            CONSTRAINT ck_confidence_range CHECK (confidence >= 0 AND confidence <= 1)
+        ) PARTITION BY RANGE (timestamp)
+    """))
+    connection.execute(text(f"CREATE TABLE {_TABLE}_default PARTITION OF {_TABLE} DEFAULT"))
+    for index in table.indexes:
+        index.create(connection)
+    logger.info(f"Created partitioned {_TABLE} table")
+
+
+def ensure_partitions(connection, granularity: str, now: Optional[datetime] = None, ahead: int = 3) -> List[str]:
+    """Create the partitions for the current period and `ahead` future periods; return the new ones."""
+    existing = set(list_partitions(connection))
+    start = period_start(now or datetime.utcnow(), granularity)
+    created = []
+    for _ in range(ahead + 1):
+        end = next_period(start, granularity)
+        name = partition_name(start, granularity)
+        if name not in existing:
+            connection.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {_TABLE} "
+                f"FOR VALUES FROM ('{start.isoformat(sep=' ')}') TO ('{end.isoformat(sep=' ')}')"
+            ))
+            created.append(name)
+        start = end
+    if created:
+        logger.info(f"Created event partitions: {', '.join(created)}")
+    return created
+
+
+def _estimated_rows(connection, name: str) -> int:
+    # Planner estimate instead of count(*): an exact count would scan the whole partition.
+    estimate = connection.execute(
+        text("SELECT reltuples FROM pg_class WHERE relname = :name AND pg_table_is_visible(oid)"),
+        {"name": name},
+    ).scalar()
+    return max(0, int(estimate or 0))
+
+
+def drop_expired_partitions(engine, cutoff: datetime) -> int:
+    """
+    Detach and drop every partition whose whole range lies before cutoff; return the
+    estimated number of rows removed (pg_class.reltuples).
+
+    Every statement runs in its own autocommit transaction, so the lock DETACH takes on
+    `events` is held only for that statement and never piles up across partitions. On
+    PostgreSQL 14+ without a DEFAULT partition the detach is CONCURRENTLY; otherwise
+    lock_timeout keeps it from queueing behind long queries, and a partition that
+    cannot be locked in time is left for the next run.
+    """
+    dropped = []
+    rows = 0
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        partitions = list_partitions(connection)
+        concurrently = (
+            int(connection.execute(text("SHOW server_version_num")).scalar()) >= 140000
+            and f"{_TABLE}_default" not in partitions
+        )
+        if not concurrently:
+            connection.execute(text(f"SET lock_timeout = '{DETACH_LOCK_TIMEOUT}'"))
+        try:
+            for name in partitions:
+                bounds = partition_range(name)
+                if bounds is None or bounds[1] > cutoff:
+                    continue
+                estimate = _estimated_rows(connection, name)
+                try:
+                    connection.execute(text(
+                        f"ALTER TABLE {_TABLE} DETACH PARTITION {name}{' CONCURRENTLY' if concurrently else ''}"
+                    ))
+                except DBAPIError as exc:
+                    connection.rollback()
+                    logger.warning(f"Could not detach expired partition {name}, retrying next run: {exc}")
+                    continue
+                connection.execute(text(f"DROP TABLE {name}"))
+                rows += estimate
+                dropped.append(name)
+        finally:
+            # lock_timeout is a session setting; the pooled connection must not keep it.
+            if not concurrently:
+                connection.execute(text("RESET lock_timeout"))
+    if dropped:
+        logger.info(f"Dropped expired event partitions: {', '.join(dropped)} (~{rows} events)")
+    return rows
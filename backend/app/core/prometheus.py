@@ -0,0 +1,177 @@
+"""Prometheus text exposition (format 0.0.4) of backend metrics."""
+
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.monitoring import LatencyHistogram
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Histogram bucket bounds in seconds, exported from the finer log-bucketed histograms.
+LATENCY_BOUNDS_SECONDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_LATENCY_BOUNDS_MS = [bound * 1000 for bound in LATENCY_BOUNDS_SECONDS]
+
+Labels = Dict[str, object]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        if value.is_integer():
+            return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _format_labels(labels: Optional[Labels]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+class PrometheusWriter:
+    """Accumulates metric families and samples, one HELP/TYPE header per family."""
+
+    def __init__(self):
+        self._lines: List[str] = []
+
+    def family(self, name: str, metric_type: str, help_text: str) -> None:
+        self._lines.append(f"# HELP {name} {help_text}")
+        self._lines.append(f"# TYPE {name} {metric_type}")
+
+    def sample(self, name: str, value, labels: Optional[Labels] = None) -> None:
+        self._lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+    def samples(self, name: str, metric_type: str, help_text: str, series: Iterable[Tuple[Labels, object]]) -> None:
+        self.family(name, metric_type, help_text)
+        for labels, value in series:
+            self.sample(name, value, labels)
+
+    def histogram(self, name: str, labels: Labels, histogram: LatencyHistogram) -> None:
+        """Write one latency histogram (milliseconds internally) in seconds."""
+        for bound, count in zip(LATENCY_BOUNDS_SECONDS, histogram.cumulative_counts(_LATENCY_BOUNDS_MS)):
+            self.sample(f"{name}_bucket", count, {**labels, "le": bound})
+        self.sample(f"{name}_bucket", histogram.count, {**labels, "le": "+Inf"})
+        self.sample(f"{name}_sum", round(histogram.total_ms / 1000, 6), labels)
+        self.sample(f"{name}_count", histogram.count, labels)
+
+    def render(self) -> str:
+        return "\n".join(self._lines) + "\n"
+
+
+def split_route_key(route_key: str) -> Labels:
+    """'GET /floors/{floor_id}' -> method/route labels; '<unmatched>' and '<other>' keep an empty method."""
+    method, _, route = route_key.partition(" ")
+    if not route:
+        return {"method": "", "route": route_key}
+    return {"method": method, "route": route}
+
+
+def render_metrics(
+    *,
+    monitoring,
+    query_histograms: Dict[str, LatencyHistogram],
+    ingestion_counts: Dict[Tuple[int, str, str, str], int],
+    floors: Iterable,
+    idempotency_stats: Optional[dict] = None,
+    floor_cache_stats: Optional[dict] = None,
+    websocket_stats: Optional[dict] = None,
+    rate_limited_clients: Optional[int] = None,
+    dropped_log_records: Optional[Dict[str, int]] = None,
+) -> str:
+    """Render every backend metric family from already-aggregated state."""
+    writer = PrometheusWriter()
+    route_status_counts, route_latency = monitoring.route_series()
+
+    writer.samples(
+        "smartpark_http_requests_total",
+        "counter",
+        "HTTP requests by route template and status code.",
+        (
+            ({**split_route_key(route), "status": status_code}, count)
+            for (route, status_code), count in sorted(route_status_counts.items())
+        ),
+    )
+    writer.family(
+        "smartpark_http_request_duration_seconds", "histogram", "HTTP request latency by route template."
+    )
+    for route, histogram in sorted(route_latency.items()):
+        writer.histogram("smartpark_http_request_duration_seconds", split_route_key(route), histogram)
+
+    writer.family("smartpark_db_query_duration_seconds", "histogram", "Database statement latency by operation.")
+    for operation, histogram in sorted(query_histograms.items()):
+        writer.histogram("smartpark_db_query_duration_seconds", {"operation": operation}, histogram)
+
+    writer.samples(
+        "smartpark_events_ingested_total",
+        "counter",
+        "Parking events received by floor, camera, direction and result (recorded or duplicate).",
+        (
+            ({"floor_id": floor_id, "camera_id": camera_id, "direction": direction, "result": result}, count)
+            for (floor_id, camera_id, direction, result), count in sorted(ingestion_counts.items())
+        ),
+    )
+
+    if idempotency_stats is not None:
+        for key in ("hits", "misses", "fallbacks", "evictions"):
+            writer.samples(
+                f"smartpark_idempotency_cache_{key}_total",
+                "counter",
+                f"Idempotency cache {key}.",
+                [({}, idempotency_stats[key])],
+            )
+        writer.samples(
+            "smartpark_idempotency_cache_entries", "gauge", "Keys held by the idempotency cache.",
+            [({}, idempotency_stats["size"])],
+        )
+
+    floors = list(floors)
+    for name, attribute, help_text in (
+        ("smartpark_floor_vehicles", "current_vehicles", "Vehicles currently parked on the floor."),
+        ("smartpark_floor_total_slots", "total_slots", "Parking slots on the floor."),
+        ("smartpark_floor_available_slots", "available_slots", "Free parking slots on the floor."),
+    ):
+        writer.samples(
+            name, "gauge", help_text,
+            (({"floor_id": floor.id, "floor": floor.name}, getattr(floor, attribute)) for floor in floors),
+        )
+    writer.samples(
+        "smartpark_floor_occupancy_ratio", "gauge", "Occupied share of the floor's slots (0-1).",
+        (
+            ({"floor_id": floor.id, "floor": floor.name}, round(floor.occupancy_percentage / 100, 4))
+            for floor in floors
+        ),
+    )
+
+    if floor_cache_stats is not None:
+        writer.samples(
+            "smartpark_floor_cache_version", "gauge", "Floor cache version (bumps on every change).",
+            [({}, floor_cache_stats["version"])],
+        )
+        writer.samples(
+            "smartpark_floor_cache_corrections_total", "counter", "Floor cache entries corrected by reconciliation.",
+            [({}, floor_cache_stats["corrections"])],
+        )
+    if websocket_stats is not None:
+        writer.samples(
+            "smartpark_websocket_subscribers", "gauge", "Connected WebSocket subscribers.",
+            [({}, websocket_stats["subscribers"])],
+        )
+    if rate_limited_clients is not None:
+        writer.samples(
+            "smartpark_rate_limiter_tracked_clients", "gauge", "Clients with a live rate-limit bucket.",
+            [({}, rate_limited_clients)],
+        )
+    if dropped_log_records is not None:
+        writer.samples(
+            "smartpark_log_records_dropped_total", "counter",
+            "Log records dropped, by reason (queue_full or sampled).",
+            (({"reason": reason}, count) for reason, count in sorted(dropped_log_records.items())),
+        )
+    return writer.render()
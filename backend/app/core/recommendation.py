@@ -0,0 +1,117 @@
+"""Floor recommendation ranking kept up to date incrementally from the floor cache."""
+
+import heapq
+import logging
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.core.floor_cache import FloorSnapshot, floor_cache
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# A ranking key orders floors ascending: the smallest key is the best recommendation.
+RankingKey = Callable[[object, Dict[int, float]], tuple]
+
+RANKING_POLICIES: Dict[str, RankingKey] = {
+    "most_free_slots": lambda floor, _weights: (
+        -floor.available_slots,
+        floor.occupancy_percentage,
+        floor.id,
+    ),
+    "lowest_occupancy": lambda floor, _weights: (
+        floor.occupancy_percentage,
+        -floor.available_slots,
+        floor.id,
+    ),
+    "weighted_preference": lambda floor, weights: (
+        -floor.available_slots * weights.get(floor.id, 1.0),
+        floor.occupancy_percentage,
+        floor.id,
+    ),
+}
+DEFAULT_POLICY = "most_free_slots"
+
+
+def parse_floor_weights(raw_value: str) -> Dict[int, float]:
+    """Parse "floor_id:weight" CSV pairs, e.g. "1:1.0,2:0.8"."""
+    weights: Dict[int, float] = {}
+    for item in settings.parse_csv_setting(raw_value):
+        floor_id, _, weight = item.partition(":")
+        try:
+            weights[int(floor_id)] = float(weight)
+        except ValueError:
+            logger.warning(f"Ignoring invalid floor weight entry: {item!r}")
+    return weights
+
+
+def resolve_policy(name: str) -> str:
+    if name in RANKING_POLICIES:
+        return name
+    logger.warning(f"Unknown recommendation policy {name!r}, using {DEFAULT_POLICY}")
+    return DEFAULT_POLICY
+
+
+def rank_floors(floors: List, policy: str, weights: Dict[int, float], limit: int) -> List:
+    """Rank a list of floors with the given policy (used when the floor cache is disabled)."""
+    key = RANKING_POLICIES[resolve_policy(policy)]
+    active = [floor for floor in floors if floor.is_active]
+    return heapq.nsmallest(limit, active, key=lambda floor: key(floor, weights))
+
+
+class RecommendationEngine:
+    """
+    Heap of active floors keyed on the configured ranking policy.
+
+    Floor changes push a fresh heap entry and supersede the previous one lazily, so
+    updates are O(log n) and top(k) only pops the stale entries it runs into.
+    """
+
+    def __init__(self, policy: str = DEFAULT_POLICY, floor_weights: Optional[Dict[int, float]] = None):
+        self.policy = resolve_policy(policy)
+        self._key = RANKING_POLICIES[self.policy]
+        self._weights = floor_weights or {}
+        self._lock = Lock()
+        self._heap: List[Tuple[tuple, int, int]] = []
+        self._entries: Dict[int, Tuple[tuple, int, FloorSnapshot]] = {}
+        self._sequence = 0
+
+    def on_floor_change(self, floor_id: int, snapshot: Optional[FloorSnapshot], _version: int) -> None:
+        with self._lock:
+            if snapshot is None or not snapshot.is_active:
+                self._entries.pop(floor_id, None)
+                return
+
+            self._sequence += 1
+            key = self._key(snapshot, self._weights)
+            self._entries[floor_id] = (key, self._sequence, snapshot)
+            heapq.heappush(self._heap, (key, self._sequence, floor_id))
+
+            if len(self._heap) > 4 * len(self._entries) + 16:
+                self._heap = [(key, seq, fid) for fid, (key, seq, _snapshot) in self._entries.items()]
+                heapq.heapify(self._heap)
+
+    def _is_current(self, entry: Tuple[tuple, int, int]) -> bool:
+        current = self._entries.get(entry[2])
+        return current is not None and current[1] == entry[1]
+
+    def top(self, k: int) -> List[FloorSnapshot]:
+        """Return the k best floors in ranking order."""
+        floor_cache.ensure_loaded()
+        with self._lock:
+            best: List[Tuple[tuple, int, int]] = []
+            while self._heap and len(best) < k:
+                entry = heapq.heappop(self._heap)
+                if self._is_current(entry):
+                    best.append(entry)
+            for entry in best:
+                heapq.heappush(self._heap, entry)
+            return [self._entries[floor_id][2] for _key, _seq, floor_id in best]
+
+
+recommendation_engine = RecommendationEngine(
+    policy=settings.recommendation_policy,
+    floor_weights=parse_floor_weights(settings.recommendation_floor_weights),
+)
+floor_cache.add_listener(recommendation_engine.on_floor_change, replay=True)
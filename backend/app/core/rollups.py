@@ -0,0 +1,93 @@
+"""Incrementally maintained per-floor occupancy rollups."""
+
+from datetime import datetime
+from typing import Iterable, Tuple
+
+from sqlalchemy import case, func
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.models.event import Direction
+from app.models.rollup import OccupancyRollup
+
+GRANULARITIES = ("minute", "hour")
+
+# (floor_id, event timestamp, direction, floor occupancy after the event)
+RollupSample = Tuple[int, datetime, Direction, int]
+
+
+def truncate_timestamp(timestamp: datetime, granularity: str) -> datetime:
+    if granularity == "minute":
+        return timestamp.replace(second=0, microsecond=0)
+    if granularity == "hour":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unsupported rollup granularity: {granularity}")
+
+
+def upsert_statement(session):
+    """Dialect-specific INSERT supporting ON CONFLICT for the session's database."""
+    if session.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(OccupancyRollup.__table__)
+    return sqlite.insert(OccupancyRollup.__table__)
+
+
+def apply_rollup_samples(session, samples: Iterable[RollupSample]) -> None:
+    """
+    Fold event samples into the rollup rows inside the caller's transaction.
+
+    Samples are pre-aggregated per bucket so a batch costs one multi-row upsert. The
+    occupancy carried by a sample is the floor's count now, so it only describes the
+    current bucket: backdated events add to their bucket's entries/exits and leave its
+    occupancy columns alone.
+    """
+    now = datetime.utcnow()
+    current_buckets = {granularity: truncate_timestamp(now, granularity) for granularity in GRANULARITIES}
+    aggregated = {}
+    for floor_id, timestamp, direction, occupancy in samples:
+        for granularity in GRANULARITIES:
+            key = (floor_id, granularity, truncate_timestamp(timestamp, granularity))
+            row = aggregated.get(key)
+            if row is None:
+                row = aggregated[key] = {
+                    "floor_id": key[0],
+                    "granularity": key[1],
+                    "bucket_start": key[2],
+                    "entries": 0,
+                    "exits": 0,
+                    "occupancy_min": None,
+                    "occupancy_max": None,
+                    "occupancy_end": None,
+                    "updated_at": now,
+                }
+            row["entries" if direction == Direction.entry else "exits"] += 1
+            if key[2] < current_buckets[granularity]:
+                continue
+            row["occupancy_min"] = occupancy if row["occupancy_min"] is None else min(row["occupancy_min"], occupancy)
+            row["occupancy_max"] = occupancy if row["occupancy_max"] is None else max(row["occupancy_max"], occupancy)
+            row["occupancy_end"] = occupancy
+
+    if not aggregated:
+        return
+
+    table = OccupancyRollup.__table__
+    statement = upsert_statement(session).values(list(aggregated.values()))
+    excluded = statement.excluded
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.floor_id, table.c.granularity, table.c.bucket_start],
+        set_={
+            "entries": table.c.entries + excluded.entries,
+            "exits": table.c.exits + excluded.exits,
+            "occupancy_min": case(
+                (table.c.occupancy_min.is_(None), excluded.occupancy_min),
+                (excluded.occupancy_min < table.c.occupancy_min, excluded.occupancy_min),
+                else_=table.c.occupancy_min,
+            ),
+            "occupancy_max": case(
+                (table.c.occupancy_max.is_(None), excluded.occupancy_max),
+                (excluded.occupancy_max > table.c.occupancy_max, excluded.occupancy_max),
+                else_=table.c.occupancy_max,
+            ),
+            "occupancy_end": func.coalesce(excluded.occupancy_end, table.c.occupancy_end),
+            "updated_at": excluded.updated_at,
+        },
+    )
+    session.execute(statement)
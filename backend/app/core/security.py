@@ -1,43 +1,153 @@
 """Security utilities: API key auth and in-memory rate limiting."""
 
-from collections import defaultdict, deque
+import logging
+import sqlite3
+from math import ceil
 from threading import Lock
 from time import monotonic
-from typing import Deque, Dict, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from fastapi import HTTPException, Request, status
 
 from app.core.config import get_settings
+from app.core.shared_state import SharedStateStore
 
+logger = logging.getLogger(__name__)
+
+
+class _Shard:
+    __slots__ = ("lock", "buckets", "last_sweep")
+
+    def __init__(self, now: float):
+        self.lock = Lock()
+        # key -> [tokens, last_refill]
+        self.buckets: Dict[str, List[float]] = {}
+        self.last_sweep = now
 
-class InMemoryRateLimiter:
-    """Simple per-client in-memory sliding-window rate limiter."""
 
-    def __init__(self, max_requests: int, window_seconds: int):
+class InMemoryRateLimiter:
+    """
+    Per-client token-bucket rate limiter.
+
+    Each client holds at most max_requests tokens, refilled continuously at
+    max_requests per window_seconds, so state is O(1) per client. Clients are spread
+    over independently locked shards by key hash, and buckets that have refilled
+    completely (idle for a full window) are evicted by a periodic per-shard sweep.
+    """
+
+    # True when check() does blocking I/O, so the middleware runs it on a worker thread
+    # instead of the event loop; this limiter only touches process memory.
+    blocking = False
+
+    def __init__(
+        self,
+        max_requests: int,
+        window_seconds: int,
+        overrides: Optional[Dict[str, int]] = None,
+        shards: int = 64,
+    ):
         self.max_requests = max_requests
         self.window_seconds = window_seconds
-        self._requests: Dict[str, Deque[float]] = defaultdict(deque)
-        self._lock = Lock()
+        self.overrides = overrides or {}
+        now = monotonic()
+        self._shards = [_Shard(now) for _ in range(max(1, shards))]
 
-    def check(self, key: str) -> Tuple[bool, int]:
+    def _capacity(self, key: str, budget_key: Optional[str]) -> int:
+        if budget_key is not None and budget_key in self.overrides:
+            return self.overrides[budget_key]
+        return self.overrides.get(key, self.max_requests)
+
+    def check(self, key: str, budget_key: Optional[str] = None) -> Tuple[bool, int]:
         """
         Return (allowed, retry_after_seconds).
         retry_after_seconds is 0 when allowed.
+
+        budget_key (e.g. the caller's API key) selects a per-client override from
+        API_RATE_LIMIT_OVERRIDES; otherwise the override for key itself or the default applies.
         """
+        capacity = self._capacity(key, budget_key)
+        refill_rate = capacity / self.window_seconds
         now = monotonic()
+        shard = self._shards[hash(key) % len(self._shards)]
 
-        with self._lock:
-            bucket = self._requests[key]
-            while bucket and (now - bucket[0]) >= self.window_seconds:
-                bucket.popleft()
+        with shard.lock:
+            if now - shard.last_sweep >= self.window_seconds:
+                self._sweep(shard, now)
 
-            if len(bucket) >= self.max_requests:
-                retry_after = int(max(1, self.window_seconds - (now - bucket[0])))
+            bucket = shard.buckets.get(key)
+            if bucket is None:
+                bucket = shard.buckets[key] = [float(capacity), now]
+            else:
+                bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * refill_rate)
+                bucket[1] = now
+
+            if bucket[0] < 1:
+                retry_after = int(max(1, ceil((1 - bucket[0]) / refill_rate)))
                 return False, retry_after
 
-            bucket.append(now)
+            bucket[0] -= 1
+            return True, 0
+
+    def _sweep(self, shard: _Shard, now: float) -> None:
+        # A bucket untouched for a whole window is full again, so forgetting it is lossless.
+        idle = [key for key, (_tokens, last) in shard.buckets.items() if now - last >= self.window_seconds]
+        for key in idle:
+            del shard.buckets[key]
+        shard.last_sweep = now
+
+    def tracked_clients(self) -> int:
+        return sum(len(shard.buckets) for shard in self._shards)
+
+
+class SharedRateLimiter(InMemoryRateLimiter):
+    """
+    Token-bucket limiter whose buckets live in a SharedStateStore.
+
+    All uvicorn workers pointing at the same file draw from the same bucket per client,
+    so the configured limit holds regardless of the worker count. Each check is a write
+    transaction on the shared file, so the middleware runs it on a worker thread. If the
+    store cannot be reached the request is let through rather than failing the API.
+    """
+
+    # check() waits on the shared file lock, so it must not run on the event loop.
+    blocking = True
+
+    def __init__(
+        self,
+        store: SharedStateStore,
+        max_requests: int,
+        window_seconds: int,
+        overrides: Optional[Dict[str, int]] = None,
+    ):
+        super().__init__(max_requests, window_seconds, overrides=overrides, shards=1)
+        self.store = store
+        self._last_prune = monotonic()
+
+    def check(self, key: str, budget_key: Optional[str] = None) -> Tuple[bool, int]:
+        try:
+            if monotonic() - self._last_prune >= self.window_seconds:
+                self._last_prune = monotonic()
+                self.store.prune_rate_buckets(self.window_seconds)
+            return self.store.take_token(key, self._capacity(key, budget_key), self.window_seconds)
+        except sqlite3.Error as exc:
+            logger.warning(f"Shared rate limiter unavailable, allowing request: {exc}")
             return True, 0
 
+    def tracked_clients(self) -> int:
+        return self.store.rate_bucket_count()
+
+
+def parse_rate_limit_overrides(raw_value: str) -> Dict[str, int]:
+    """Parse "client_or_api_key:limit" CSV pairs, e.g. "camera-key:20000,10.0.0.7:5000"."""
+    overrides: Dict[str, int] = {}
+    for item in get_settings().parse_csv_setting(raw_value):
+        key, _, limit = item.rpartition(":")
+        try:
+            overrides[key] = int(limit)
+        except ValueError:
+            continue
+    return overrides
+
 
 settings = get_settings()
 _api_keys = set(settings.parse_csv_setting(settings.api_keys))
@@ -68,13 +178,17 @@ def get_client_identifier(request: Request) -> str:
     return "unknown"
 
 
+def is_valid_api_key(provided_key: str | None) -> bool:
+    return bool(provided_key) and provided_key in _api_keys
+
+
 def require_api_key(request: Request) -> None:
     """Raise HTTP 401 when API key is missing/invalid on protected routes."""
     if is_public_path(request.url.path):
         return
 
     provided_key = request.headers.get(settings.api_key_header)
-    if not provided_key or provided_key not in _api_keys:
+    if not is_valid_api_key(provided_key):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or missing API key",
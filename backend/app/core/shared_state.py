@@ -0,0 +1,257 @@
+"""SQLite-backed state shared by all worker processes on one host."""
+
+import sqlite3
+import threading
+from collections import Counter
+from datetime import datetime
+from math import ceil
+from pathlib import Path
+from time import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rate_buckets (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS window_counters (
+    bucket INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (bucket, name)
+);
+"""
+
+_INCREMENT = (
+    "INSERT INTO counters (name, value) VALUES (?, ?) "
+    "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value"
+)
+
+_WINDOW_INCREMENT = (
+    "INSERT INTO window_counters (bucket, name, value) VALUES (?, ?, ?) "
+    "ON CONFLICT(bucket, name) DO UPDATE SET value = value + excluded.value"
+)
+
+_WINDOW_MAXIMUM = (
+    "INSERT INTO window_counters (bucket, name, value) VALUES (?, ?, ?) "
+    "ON CONFLICT(bucket, name) DO UPDATE SET value = max(value, excluded.value)"
+)
+
+_MAXIMUM = (
+    "INSERT INTO counters (name, value) VALUES (?, ?) "
+    "ON CONFLICT(name) DO UPDATE SET value = max(value, excluded.value)"
+)
+
+
+class SharedStateStore:
+    """
+    Counters, time-bucketed window counters and token buckets in one local SQLite file.
+
+    Every uvicorn worker opens the same file; each thread gets its own connection and
+    every update runs in a single write transaction, so increments and token takes are
+    atomic across processes without an external service. Request and ingestion metrics
+    are buffered in process with buffer() and written by a periodic flush(), so the
+    request path never waits on the file lock. The file outlives restarts; delete it to
+    reset limits and counters.
+    """
+
+    def __init__(self, path: str, busy_timeout_ms: int = 5000):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._pending_lock = threading.Lock()
+        self._pending_counters: Counter = Counter()
+        self._pending_maxima: Dict[str, float] = {}
+        self._pending_window_counters: Counter = Counter()
+        self._pending_window_maxima: Dict[Tuple[int, str], float] = {}
+        self._prune_windows_before = 0
+        self._pruned_before = 0
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        connection = self._connection()
+        connection.executescript(_SCHEMA)
+        connection.execute(
+            "INSERT OR IGNORE INTO meta (name, value) VALUES ('started_at', ?)",
+            (datetime.utcnow().isoformat(),),
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _write(self):
+        return _WriteTransaction(self._connection())
+
+    def get_meta(self, name: str) -> Optional[str]:
+        row = self._connection().execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def increment(self, amounts: Iterable[Tuple[str, float]]) -> None:
+        with self._write() as connection:
+            connection.executemany(_INCREMENT, list(amounts))
+
+    def counters(self, prefix: str = "") -> Dict[str, float]:
+        rows = self._connection().execute(
+            "SELECT name, value FROM counters WHERE substr(name, 1, ?) = ?",
+            (len(prefix), prefix),
+        ).fetchall()
+        return {name[len(prefix):]: value for name, value in rows}
+
+    def take_token(self, key: str, capacity: int, window_seconds: float) -> Tuple[bool, int]:
+        """Token-bucket take for key, shared by every process using this file."""
+        refill_rate = capacity / window_seconds
+        with self._write() as connection:
+            now = time()
+            row = connection.execute("SELECT tokens, updated FROM rate_buckets WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                tokens = float(capacity)
+            else:
+                tokens = min(capacity, row[0] + max(0.0, now - row[1]) * refill_rate)
+
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            connection.execute(
+                "INSERT INTO rate_buckets (key, tokens, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                (key, tokens, now),
+            )
+        if allowed:
+            return True, 0
+        return False, int(max(1, ceil((1 - tokens) / refill_rate)))
+
+    def prune_rate_buckets(self, idle_seconds: float) -> int:
+        with self._write() as connection:
+            cursor = connection.execute("DELETE FROM rate_buckets WHERE updated < ?", (time() - idle_seconds,))
+        return cursor.rowcount
+
+    def rate_bucket_count(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM rate_buckets").fetchone()[0]
+
+    def window_counters(self, since_bucket: int) -> Dict[int, Dict[str, float]]:
+        rows = self._connection().execute(
+            "SELECT bucket, name, value FROM window_counters WHERE bucket >= ?",
+            (since_bucket,),
+        ).fetchall()
+        buckets: Dict[int, Dict[str, float]] = {}
+        for bucket, name, value in rows:
+            buckets.setdefault(bucket, {})[name] = value
+        return buckets
+
+    def buffer(
+        self,
+        *,
+        counters: Iterable[Tuple[str, float]] = (),
+        maxima: Iterable[Tuple[str, float]] = (),
+        window_counters: Iterable[Tuple[int, str, float]] = (),
+        window_maxima: Iterable[Tuple[int, str, float]] = (),
+    ) -> None:
+        """Queue counter updates in process memory; flush() writes them to the file."""
+        with self._pending_lock:
+            for name, value in counters:
+                self._pending_counters[name] += value
+            _merge_maxima(self._pending_maxima, maxima)
+            for bucket, name, value in window_counters:
+                self._pending_window_counters[(bucket, name)] += value
+            _merge_maxima(
+                self._pending_window_maxima, (((bucket, name), value) for bucket, name, value in window_maxima)
+            )
+
+    def buffer_prune_windows(self, before_bucket: int) -> None:
+        """Drop window buckets older than before_bucket on the next flush."""
+        with self._pending_lock:
+            self._prune_windows_before = max(self._prune_windows_before, before_bucket)
+
+    def flush(self) -> None:
+        """
+        Write everything buffered since the last flush in one transaction.
+
+        If the file cannot be written the updates stay buffered for the next flush and
+        the sqlite3.Error is raised to the caller.
+        """
+        with self._pending_lock:
+            counters, self._pending_counters = self._pending_counters, Counter()
+            maxima, self._pending_maxima = self._pending_maxima, {}
+            window_counters, self._pending_window_counters = self._pending_window_counters, Counter()
+            window_maxima, self._pending_window_maxima = self._pending_window_maxima, {}
+            prune_before = self._prune_windows_before
+        if not (counters or maxima or window_counters or window_maxima or prune_before > self._pruned_before):
+            return
+
+        try:
+            with self._write() as connection:
+                connection.executemany(_INCREMENT, list(counters.items()))
+                connection.executemany(_MAXIMUM, list(maxima.items()))
+                connection.executemany(
+                    _WINDOW_INCREMENT,
+                    [(bucket, name, value) for (bucket, name), value in window_counters.items() if bucket >= prune_before],
+                )
+                connection.executemany(
+                    _WINDOW_MAXIMUM,
+                    [(bucket, name, value) for (bucket, name), value in window_maxima.items() if bucket >= prune_before],
+                )
+                if prune_before > self._pruned_before:
+                    connection.execute("DELETE FROM window_counters WHERE bucket < ?", (prune_before,))
+        except sqlite3.Error:
+            with self._pending_lock:
+                self._pending_counters.update(counters)
+                _merge_maxima(self._pending_maxima, maxima.items())
+                self._pending_window_counters.update(
+                    {key: value for key, value in window_counters.items() if key[0] >= self._prune_windows_before}
+                )
+                _merge_maxima(
+                    self._pending_window_maxima,
+                    ((key, value) for key, value in window_maxima.items() if key[0] >= self._prune_windows_before),
+                )
+            raise
+        self._pruned_before = prune_before
+
+    def close(self) -> None:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+def _merge_maxima(target: dict, items: Iterable[tuple]) -> None:
+    for key, value in items:
+        current = target.get(key)
+        if current is None or value > current:
+            target[key] = value
+
+
+class _WriteTransaction:
+    """BEGIN IMMEDIATE ... COMMIT: takes the write lock up front so read-modify-write is atomic."""
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.connection.execute("BEGIN IMMEDIATE")
+        return self.connection
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.connection.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+# With SHARED_STATE_PATH set, every worker process shares rate limits and metrics through one SQLite file.
+shared_state: Optional[SharedStateStore] = (
+    SharedStateStore(settings.shared_state_path) if settings.shared_state_path else None
+)
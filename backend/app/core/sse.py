@@ -0,0 +1,49 @@
+"""Server-Sent Events stream of floor and alert changes."""
+
+import json
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+from app.core.change_log import ChangeLog
+
+
+def format_sse(event: str, data: dict, event_id: Optional[str] = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def change_event_stream(
+    log: ChangeLog,
+    snapshot: Callable[[], Awaitable[dict]],
+    last_event_id: Optional[str],
+    is_disconnected: Callable[[], Awaitable[bool]],
+    keepalive_seconds: float = 15.0,
+) -> AsyncIterator[str]:
+    """
+    Yield SSE frames for every logged change, resuming after last_event_id when possible.
+
+    A client whose Last-Event-ID is unknown, from another process or already out of the
+    ring buffer first receives a full `snapshot` event, then live changes.
+    """
+    seq = log.parse_cursor(last_event_id)
+    resync = seq is None
+    while True:
+        if not resync:
+            entries, resync = log.since(seq)
+        if resync:
+            seq = log.seq
+            yield format_sse("snapshot", await snapshot(), log.cursor(seq))
+            resync = False
+            continue
+
+        for entry in entries:
+            seq = entry.seq
+            yield format_sse(entry.kind, entry.data, log.cursor(entry.seq))
+
+        if await is_disconnected():
+            return
+        if not entries and not await log.wait(seq, keepalive_seconds):
+            yield ": keepalive\n\n"
@@ -1,4 +1,5 @@
 from app.models.floor import Floor
 from app.models.event import Event
+from app.models.rollup import OccupancyRollup
 
-__all__ = ["Floor", "Event"]
+__all__ = ["Floor", "Event", "OccupancyRollup"]
@@ -32,7 +32,10 @@ class Event(Base):
         Index('ix_event_camera_floor_timestamp', 'camera_id', 'floor_id', 'timestamp'),
         Index('ix_event_track_direction', 'track_id', 'direction'),
         Index('ix_event_timestamp', 'timestamp'),
+        Index('ix_event_timestamp_id', 'timestamp', 'id'),
         CheckConstraint('confidence >= 0 AND confidence <= 1', name='ck_confidence_range'),
+        # Never reuse ids of archived/deleted rows
+        {'sqlite_autoincrement': True},
     )
 
     id = Column(Integer, primary_key=True, index=True)
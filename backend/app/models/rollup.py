@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint, Index
+from datetime import datetime
+from app.core.database import Base
+
+
+class OccupancyRollup(Base):
+    __tablename__ = "occupancy_rollups"
+
+    # One row per floor, granularity and bucket; maintained incrementally on ingest
+    __table_args__ = (
+        UniqueConstraint('floor_id', 'granularity', 'bucket_start', name='uq_rollup_bucket'),
+        Index('ix_rollup_granularity_bucket', 'granularity', 'bucket_start'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    floor_id = Column(Integer, ForeignKey("floors.id"), nullable=False)
+    granularity = Column(String(10), nullable=False)  # "minute" or "hour"
+    bucket_start = Column(DateTime, nullable=False)
+    entries = Column(Integer, default=0, nullable=False)
+    exits = Column(Integer, default=0, nullable=False)
+    # Floor occupancy after each event in the bucket; NULL for buckets backfilled from events
+    occupancy_min = Column(Integer, nullable=True)
+    occupancy_max = Column(Integer, nullable=True)
+    occupancy_end = Column(Integer, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<OccupancyRollup(floor_id={self.floor_id}, granularity={self.granularity}, bucket_start={self.bucket_start}, entries={self.entries}, exits={self.exits})>"
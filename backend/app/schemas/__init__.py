@@ -20,8 +20,33 @@ class Direction(str, Enum):
     exit = "exit"
 
 
+class CountMode(str, Enum):
+    """Whether list endpoints compute total/filtered counts"""
+    exact = "exact"
+    none = "none"
+
+
+class TimeBucket(str, Enum):
+    """Time-series bucket width for event statistics"""
+    minute = "minute"
+    hour = "hour"
+    day = "day"
+
+
 # ============= REQUEST SCHEMAS =============
 
+class ExportFormat(str, Enum):
+    """Serialization of GET /events/export"""
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+class RollupGranularity(str, Enum):
+    """Bucket width of the occupancy rollup tables"""
+    minute = "minute"
+    hour = "hour"
+
+
 class EventCreateRequest(BaseModel):
     """Schema for POST /event - Record a parking event"""
     camera_id: str = Field(..., min_length=1, max_length=50, description="Camera identifier")
@@ -44,6 +69,36 @@ class EventCreateRequest(BaseModel):
         }
     )
 
+class EventBatchItem(EventCreateRequest):
+    """Schema for a single event inside POST /events/batch"""
+    timestamp: Optional[datetime] = Field(
+        default=None,
+        description="Capture time of the crossing (defaults to server receive time)",
+    )
+
+
+class EventBatchCreateRequest(BaseModel):
+    """Schema for POST /events/batch - Record many parking events at once"""
+    events: List[EventBatchItem] = Field(..., min_length=1, max_length=1000, description="Events in capture order")
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "events": [
+                    {
+                        "camera_id": "cam_001",
+                        "floor_id": 1,
+                        "track_id": "track_12345",
+                        "vehicle_type": "car",
+                        "direction": "entry",
+                        "confidence": 0.95,
+                        "timestamp": "2026-02-12T12:30:00"
+                    }
+                ]
+            }
+        }
+    )
+
 class EventFilterRequest(BaseModel):
     """Schema for GET /events - Filter parameters"""
     floor_id: Optional[int] = Field(None, description="Filter by floor ID")
@@ -52,6 +107,8 @@ class EventFilterRequest(BaseModel):
     hours: int = Field(default=24, ge=1, le=365*24, description="Events from last N hours")
     limit: int = Field(default=100, ge=1, le=1000, description="Max results")
     offset: int = Field(default=0, ge=0, description="Pagination offset")
+    cursor: Optional[str] = Field(None, description="Keyset cursor from a previous page's next_cursor")
+    counts: CountMode = Field(default=CountMode.exact, description="Compute total/filtered counts or skip them")
     
     model_config = ConfigDict(
         json_schema_extra={
@@ -61,7 +118,8 @@ class EventFilterRequest(BaseModel):
                 "direction": "entry",
                 "hours": 24,
                 "limit": 100,
-                "offset": 0
+                "offset": 0,
+                "counts": "exact"
             }
         }
     )
@@ -156,6 +214,60 @@ class EventCreateResponse(BaseModel):
     )
 
 
+class BatchItemStatus(str, Enum):
+    """Outcome of a single item in POST /events/batch"""
+    recorded = "recorded"
+    duplicate = "duplicate"
+    floor_full = "floor_full"
+    floor_empty = "floor_empty"
+    floor_not_found = "floor_not_found"
+    conflict = "conflict"
+
+
+class EventBatchItemResult(BaseModel):
+    """Schema for the outcome of one event in a batch"""
+    index: int
+    status: BatchItemStatus
+    event_id: Optional[int] = None
+    floor_id: int
+    current_vehicles: Optional[int] = None
+    available_slots: Optional[int] = None
+    occupancy_percentage: Optional[float] = None
+
+
+class EventBatchCreateResponse(BaseModel):
+    """Schema for POST /events/batch response"""
+    success: bool
+    total: int
+    recorded: int
+    duplicates: int
+    rejected: int
+    results: List[EventBatchItemResult]
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "success": True,
+                "total": 2,
+                "recorded": 1,
+                "duplicates": 1,
+                "rejected": 0,
+                "results": [
+                    {
+                        "index": 0,
+                        "status": "recorded",
+                        "event_id": 42,
+                        "floor_id": 1,
+                        "current_vehicles": 36,
+                        "available_slots": 14,
+                        "occupancy_percentage": 72.0
+                    }
+                ]
+            }
+        }
+    )
+
+
 class FloorsListResponse(BaseModel):
     """Schema for GET /floors response"""
     success: bool
@@ -181,6 +293,50 @@ class FloorsListResponse(BaseModel):
     )
 
 
+class FloorChange(BaseModel):
+    """One floor mutation from the change log"""
+    seq: int
+    type: str
+    floor: Optional[dict] = None
+    floor_id: Optional[int] = None
+
+
+class FloorChangesResponse(BaseModel):
+    """Schema for GET /floors/changes response"""
+    success: bool
+    epoch: str
+    seq: int
+    resync_required: bool
+    changes: List[FloorChange]
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "success": True,
+                "epoch": "3f2a9c1b7d4e",
+                "seq": 42,
+                "resync_required": False,
+                "changes": [
+                    {
+                        "seq": 42,
+                        "type": "floor_delta",
+                        "floor": {
+                            "id": 1,
+                            "name": "Ground Floor",
+                            "total_slots": 50,
+                            "current_vehicles": 36,
+                            "available_slots": 14,
+                            "occupancy_percentage": 72.0,
+                            "is_active": True,
+                            "updated_at": "2026-02-12T12:30:00"
+                        }
+                    }
+                ]
+            }
+        }
+    )
+
+
 class RecommendationResponse(BaseModel):
     """Schema for GET /recommend response"""
     success: bool
@@ -203,10 +359,11 @@ class RecommendationResponse(BaseModel):
 class EventsListResponse(BaseModel):
     """Schema for GET /events response"""
     success: bool
-    total_count: int
-    filtered_count: int
+    total_count: Optional[int] = None
+    filtered_count: Optional[int] = None
     limit: int
     offset: int
+    next_cursor: Optional[str] = None
     events: List[EventResponse]
     
     model_config = ConfigDict(
@@ -217,12 +374,130 @@ class EventsListResponse(BaseModel):
                 "filtered_count": 50,
                 "limit": 100,
                 "offset": 0,
+                "next_cursor": "WyIyMDI2LTAyLTEyVDEyOjMwOjAwIiw0Ml0",
                 "events": []
             }
         }
     )
 
 
+class EventHistoryResponse(BaseModel):
+    """Schema for GET /events/history response"""
+    success: bool
+    start: datetime
+    end: datetime
+    limit: int
+    sources: dict
+    events: List[EventResponse]
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "success": True,
+                "start": "2025-01-01T00:00:00",
+                "end": "2025-02-01T00:00:00",
+                "limit": 100,
+                "sources": {"database": 0, "archive": 100},
+                "events": []
+            }
+        }
+    )
+
+
+class FloorEventStats(BaseModel):
+    """Per-floor event counts"""
+    floor_id: int
+    floor_name: Optional[str] = None
+    total: int
+    entries: int
+    exits: int
+
+
+class EventStatsBucket(BaseModel):
+    """Event counts for one time bucket"""
+    bucket_start: datetime
+    total: int
+    entries: int
+    exits: int
+
+
+class EventStatsResponse(BaseModel):
+    """Schema for GET /events/stats response"""
+    success: bool
+    hours: int
+    bucket: Optional[TimeBucket] = None
+    total_events: int
+    entries: int
+    exits: int
+    by_direction: dict
+    by_vehicle_type: dict
+    by_floor: List[FloorEventStats]
+    buckets: List[EventStatsBucket]
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "success": True,
+                "hours": 24,
+                "bucket": "hour",
+                "total_events": 120,
+                "entries": 64,
+                "exits": 56,
+                "by_direction": {"entry": 64, "exit": 56},
+                "by_vehicle_type": {"car": 100, "motorcycle": 12, "truck": 5, "bus": 3},
+                "by_floor": [
+                    {"floor_id": 1, "floor_name": "Ground Floor", "total": 70, "entries": 38, "exits": 32}
+                ],
+                "buckets": [
+                    {"bucket_start": "2026-02-12T12:00:00", "total": 14, "entries": 8, "exits": 6}
+                ]
+            }
+        }
+    )
+
+
+class OccupancyRollupPoint(BaseModel):
+    """Occupancy and traffic of one floor in one rollup bucket"""
+    floor_id: int
+    bucket_start: datetime
+    entries: int
+    exits: int
+    occupancy_min: Optional[int] = None
+    occupancy_max: Optional[int] = None
+    occupancy_end: Optional[int] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class OccupancyReportResponse(BaseModel):
+    """Schema for GET /reports/occupancy response"""
+    success: bool
+    granularity: RollupGranularity
+    hours: int
+    points: List[OccupancyRollupPoint]
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "success": True,
+                "granularity": "hour",
+                "hours": 24,
+                "points": [
+                    {
+                        "floor_id": 1,
+                        "bucket_start": "2026-02-12T12:00:00",
+                        "entries": 8,
+                        "exits": 6,
+                        "occupancy_min": 40,
+                        "occupancy_max": 45,
+                        "occupancy_end": 42
+                    }
+                ]
+            }
+        }
+    )
+
+
 class ErrorResponse(BaseModel):
     """Schema for error responses"""
     success: bool = False
@@ -288,10 +563,13 @@ from app.schemas.floor import FloorSchema, FloorResponseSchema
 from app.schemas.event import EventSchema, EventResponseSchema
 
 __all__ = [
-    "VehicleType", "Direction",
-    "EventCreateRequest", "EventFilterRequest",
+    "VehicleType", "Direction", "CountMode", "TimeBucket", "RollupGranularity", "ExportFormat",
+    "EventCreateRequest", "EventFilterRequest", "EventBatchItem", "EventBatchCreateRequest",
     "FloorResponse", "EventResponse", "EventCreateResponse",
-    "FloorsListResponse", "RecommendationResponse", "EventsListResponse",
+    "BatchItemStatus", "EventBatchItemResult", "EventBatchCreateResponse",
+    "FloorsListResponse", "FloorChange", "FloorChangesResponse", "RecommendationResponse", "EventsListResponse", "EventHistoryResponse",
+    "FloorEventStats", "EventStatsBucket", "EventStatsResponse",
+    "OccupancyRollupPoint", "OccupancyReportResponse",
     "ErrorResponse", "HealthCheckResponse", "RootResponse",
     "FloorSchema", "FloorResponseSchema", "EventSchema", "EventResponseSchema"
 ]
@@ -0,0 +1,36 @@
+"""Shared helpers for loading an isolated backend instance in benchmarks."""
+
+import importlib
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+BENCH_API_KEY = "bench-api-key"
+AUTH_HEADERS = {"X-API-Key": BENCH_API_KEY}
+
+
+def load_app(**env_overrides):
+    """Import a fresh `main` module bound to a throwaway SQLite database."""
+    db_path = Path(tempfile.mkdtemp(prefix="smartpark_bench_")) / "bench.db"
+    env = {
+        "DATABASE_URL": f"sqlite:///{db_path.as_posix()}",
+        "DATABASE_ECHO": "False",
+        "API_KEYS": BENCH_API_KEY,
+        "API_RATE_LIMIT": "100000000",
+        "LOG_LEVEL": "WARNING",
+        "LOG_FILE": "",
+    }
+    env.update({key: str(value) for key, value in env_overrides.items()})
+    os.environ.update(env)
+
+    for module_name in list(sys.modules):
+        if module_name == "main" or module_name.startswith("app."):
+            sys.modules.pop(module_name, None)
+
+    main_module = importlib.import_module("main")
+    if main_module.create_tables and not main_module.check_tables_exist():
+        main_module.create_tables()
+    if main_module.seed_floors:
+        main_module.seed_floors()
+    return main_module
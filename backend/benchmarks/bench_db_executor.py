@@ -0,0 +1,65 @@
+"""
+Concurrent-request throughput with inline vs executor-dispatched database calls.
+
+A fixed delay is injected into EventOperations.get_filtered_events to model the
+network round trip of a remote PostgreSQL server; the benchmark then fires
+concurrent GET /events requests and reports requests per second.
+
+Usage (from backend/):
+    python -m benchmarks.bench_db_executor [--requests 64] [--latency-ms 20] [--workers 8]
+"""
+
+import argparse
+import asyncio
+import time
+from time import perf_counter
+
+from httpx import ASGITransport, AsyncClient
+
+from benchmarks._app import AUTH_HEADERS, load_app
+
+
+async def _fire(app, total_requests: int) -> float:
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = perf_counter()
+        responses = await asyncio.gather(
+            *[client.get("/events?limit=10", headers=AUTH_HEADERS) for _ in range(total_requests)]
+        )
+        elapsed = perf_counter() - start
+    assert all(response.status_code == 200 for response in responses)
+    return elapsed
+
+def _run(app, total_requests: int) -> float:
+    return asyncio.run(_fire(app, total_requests))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    main_module = load_app()
+    from app.core import db_executor  # pylint: disable=import-outside-toplevel
+
+    operations = main_module.EventOperations
+    original = operations.get_filtered_events
+
+    def remote_filtered_events(**kwargs):
+        time.sleep(args.latency_ms / 1000)
+        return original(**kwargs)
+
+    operations.get_filtered_events = staticmethod(remote_filtered_events)
+
+    print(f"{args.requests} concurrent GET /events, {args.latency_ms:.0f}ms simulated DB latency")
+    for label, workers in (("inline (before)", 0), (f"executor x{args.workers} (after)", args.workers)):
+        db_executor.configure_db_executor(workers)
+        elapsed = _run(main_module.app, args.requests)
+        print(f"  {label:<24} {elapsed * 1000:8.1f} ms total  {args.requests / elapsed:8.1f} req/s")
+    db_executor.shutdown_db_executor()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Per-row serialization cost of GET /events?limit=1000, Pydantic vs fast JSON path.
+
+Seeds 1000 events, then times repeated full-page requests with
+FAST_JSON_RESPONSES off (ORM objects -> model_validate -> response_model
+re-validation) and on (row tuples -> orjson).
+
+Usage (from backend/):
+    python -m benchmarks.bench_json_responses [--rows 1000] [--repeat 30]
+"""
+
+import argparse
+from datetime import datetime, timedelta
+from time import perf_counter
+
+from fastapi.testclient import TestClient
+
+from benchmarks._app import AUTH_HEADERS, load_app
+
+
+def _seed(main_module, rows: int) -> None:
+    start = datetime.utcnow() - timedelta(hours=1)
+    events = [
+        {
+            "camera_id": f"cam_bench_{idx % 8}",
+            "floor_id": 1 + (idx // 2) % 4,
+            "track_id": f"track_bench_{idx}",
+            "vehicle_type": "car",
+            "direction": "entry" if idx % 2 == 0 else "exit",
+            "confidence": 0.9,
+            "timestamp": start + timedelta(milliseconds=idx),
+        }
+        for idx in range(rows)
+    ]
+    main_module.EventOperations.record_events_batch(events)
+
+
+def _time(client: TestClient, path: str, repeat: int) -> float:
+    client.get(path, headers=AUTH_HEADERS)
+    start = perf_counter()
+    for _ in range(repeat):
+        response = client.get(path, headers=AUTH_HEADERS)
+        assert response.status_code == 200
+    return (perf_counter() - start) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    main_module = load_app(ROLLUPS_ENABLED="False")
+    _seed(main_module, args.rows)
+    settings = main_module.settings
+    path = f"/events?hours=2&limit={min(args.rows, 1000)}&counts=none"
+
+    print(f"GET {path} ({args.repeat} requests)")
+    with TestClient(main_module.app) as client:
+        rows = len(client.get(path, headers=AUTH_HEADERS).json()["events"])
+        for label, fast in (("pydantic (before)", False), ("fast json (after)", True)):
+            settings.fast_json_responses = fast
+            elapsed = _time(client, path, args.repeat)
+            print(f"  {label:<20} {elapsed * 1000:8.2f} ms/request  {elapsed / rows * 1e6:7.2f} us/row")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Request-path logging cost: synchronous handlers vs queue + batching writer thread.
+
+Runs with LOG_LEVEL=INFO and a real LOG_FILE, and for each configuration times:
+  * the caller-side cost of one access-log line (what the middleware pays),
+  * process CPU per line including the writer thread draining the queue, and
+  * full GET /health/live requests through the middleware.
+--lines should stay below LOG_QUEUE_SIZE, or the burst overflows the queue and is dropped.
+Stdout logging goes to /dev/null so the terminal does not skew the numbers.
+
+Usage (from backend/):
+    python -m benchmarks.bench_logging [--lines 5000] [--requests 2000]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+from pathlib import Path
+from time import perf_counter, process_time, sleep
+
+from fastapi.testclient import TestClient
+
+from benchmarks._app import AUTH_HEADERS, load_app
+
+CONFIGURATIONS = (
+    ("sync handlers (before)", {"LOG_QUEUE_ENABLED": "False"}),
+    ("queue + batching", {"LOG_QUEUE_ENABLED": "True"}),
+    ("queue + 10% access sample", {"LOG_QUEUE_ENABLED": "True", "LOG_SAMPLE_ACCESS": "0.1"}),
+)
+
+
+def _load(env: dict, log_file: Path):
+    real_stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    try:
+        return load_app(LOG_LEVEL="INFO", LOG_FILE=log_file.as_posix(), **env)
+    finally:
+        sys.stdout = real_stdout
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    log_dir = Path(tempfile.mkdtemp(prefix="smartpark_bench_logs_"))
+    print(f"{args.lines} access-log calls, {args.requests} GET /health/live requests")
+    for label, env in CONFIGURATIONS:
+        main_module = _load(env, log_dir / f"{len(os.listdir(log_dir))}.log")
+        access_logger = main_module.access_logger
+
+        start = perf_counter()
+        start_cpu = process_time()
+        for idx in range(args.lines):
+            access_logger.info(
+                "%s %s status=%s duration_ms=%.2f client=%s request_id=%s",
+                "GET", "/floors", 200, 1.25, "127.0.0.1", idx,
+            )
+        per_line = (perf_counter() - start) / args.lines
+        # Include the writer thread catching up, so moved (not saved) work is visible.
+        queues = [handler.queue for handler in logging.getLogger().handlers if hasattr(handler, "queue")]
+        while any(not log_queue.empty() for log_queue in queues):
+            sleep(0.001)
+        cpu_per_line = (process_time() - start_cpu) / args.lines
+
+        with TestClient(main_module.app) as client:
+            client.get("/health/live", headers=AUTH_HEADERS)
+            start = perf_counter()
+            for _ in range(args.requests):
+                client.get("/health/live", headers=AUTH_HEADERS)
+            per_request = (perf_counter() - start) / args.requests
+
+        dropped = sum(getattr(handler, "dropped", 0) for handler in logging.getLogger().handlers)
+        print(
+            f"  {label:<27} {per_line * 1e6:6.2f} us/line caller  {cpu_per_line * 1e6:6.2f} us/line cpu incl. writer"
+            f"  {per_request * 1000:6.3f} ms/request  dropped={dropped}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Per-request middleware overhead on POST /event and GET /floors: BaseHTTPMiddleware vs pure ASGI.
+
+Requests are driven straight into the ASGI app from one event loop (no TestClient
+or HTTP transport), so the numbers are dominated by the app and its middleware.
+Three stacks are timed with the same auth, rate-limit, metrics and access-log work:
+  * the previous @app.middleware("http") wrapper, rebuilt on BaseHTTPMiddleware,
+  * RequestSecurityMiddleware (pure ASGI), and
+  * no security middleware at all, as the floor.
+
+Usage (from backend/):
+    python -m benchmarks.bench_middleware [--requests 2000]
+"""
+
+import argparse
+import asyncio
+import json
+from time import perf_counter
+
+from starlette.datastructures import Headers
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from benchmarks._app import AUTH_HEADERS, load_app
+
+
+def _stacks():
+    """(label, middleware class) pairs, built after load_app() has imported a fresh app package."""
+    # pylint: disable=import-outside-toplevel
+    from app.core.logging import access_logger
+    from app.core.middleware import RequestSecurityMiddleware, client_identifier
+    from app.core.monitoring import route_template
+
+    class BaseHTTPSecurityMiddleware(BaseHTTPMiddleware):
+        """The former call_next-based middleware, doing the same work as RequestSecurityMiddleware."""
+
+        def __init__(self, app, **options):
+            super().__init__(app)
+            self.checks = RequestSecurityMiddleware(app, **options)
+
+        async def dispatch(self, request, call_next):
+            start = perf_counter()
+            headers = Headers(scope=request.scope)
+            client = client_identifier(request.scope, headers)
+            status_code = 500
+            try:
+                response = await self.checks._reject(request.method, request.url.path, client, headers)
+                if response is None:
+                    response = await call_next(request)
+                status_code = response.status_code
+                return response
+            finally:
+                duration_ms = (perf_counter() - start) * 1000
+                self.checks.monitoring.record_request(
+                    method=request.method,
+                    route=route_template(request.scope, self.checks.routes),
+                    status_code=status_code,
+                    duration_ms=duration_ms,
+                )
+                access_logger.info(
+                    "%s %s status=%s duration_ms=%.2f client=%s request_id=%s",
+                    request.method, request.url.path, status_code, duration_ms, client,
+                    headers.get("x-request-id", "n/a"),
+                )
+
+    return (
+        ("BaseHTTPMiddleware (before)", BaseHTTPSecurityMiddleware),
+        ("pure ASGI (after)", RequestSecurityMiddleware),
+        ("no security middleware", None),
+    )
+
+
+def _use_stack(app, options: dict, middleware_cls) -> None:
+    # The security middleware is the only one configured with routes=.
+    app.user_middleware = [m for m in app.user_middleware if "routes" not in m.options]
+    if middleware_cls is not None:
+        app.user_middleware.append(Middleware(middleware_cls, **options))
+    app.middleware_stack = None
+
+
+async def _request(app, method: str, path: str, body: bytes = b"") -> int:
+    headers = [(name.lower().encode(), value.encode()) for name, value in AUTH_HEADERS.items()]
+    if body:
+        headers.append((b"content-type", b"application/json"))
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    received = False
+    status_code = 0
+
+    async def receive():
+        nonlocal received
+        if received:
+            return {"type": "http.disconnect"}
+        received = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal status_code
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+
+    await app(scope, receive, send)
+    return status_code
+
+
+async def _time(app, requests: int, make_request) -> float:
+    await make_request(app, -2)
+    await make_request(app, -1)
+    start = perf_counter()
+    for idx in range(requests):
+        await make_request(app, idx)
+    return (perf_counter() - start) / requests
+
+
+async def _run(main_module, requests: int) -> None:
+    app = main_module.app
+    options = next(m.options for m in app.user_middleware if "routes" in m.options)
+    await main_module.startup_event()
+    run = 0
+
+    async def get_floors(app, _idx):
+        assert await _request(app, "GET", "/floors") == 200
+
+    async def post_event(app, idx):
+        payload = {
+            "camera_id": "cam_bench_mw",
+            "floor_id": 1,
+            # Entry then exit of each track keeps the floor from filling up.
+            "track_id": f"track_mw_{run}_{idx // 2}",
+            "vehicle_type": "car",
+            "direction": "entry" if idx % 2 == 0 else "exit",
+            "confidence": 0.9,
+        }
+        assert await _request(app, "POST", "/event", json.dumps(payload).encode()) == 200
+
+    try:
+        for label, middleware_cls in _stacks():
+            _use_stack(app, options, middleware_cls)
+            run += 1
+            floors = await _time(app, requests, get_floors)
+            events = await _time(app, requests, post_event)
+            print(f"  {label:<28} GET /floors {floors * 1e6:8.1f} us/request   POST /event {events * 1e6:8.1f} us/request")
+    finally:
+        await main_module.shutdown_event()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    main_module = load_app(ROLLUPS_ENABLED="False")
+    print(f"{args.requests} requests per route, driven directly through ASGI")
+    asyncio.run(_run(main_module, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,27 @@
-from time import perf_counter
+import asyncio
 
-from fastapi import FastAPI, HTTPException, Path, Query, Request, status
+from fastapi import FastAPI, HTTPException, Path, Query, Request, Response, WebSocket, WebSocketDisconnect, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from fastapi.exceptions import RequestValidationError
 from app.core.config import get_settings
-from app.core.logging import logger
+from app.core.logging import dropped_log_records, logger
 from app.core.security import (
     InMemoryRateLimiter,
-    get_client_identifier,
-    is_public_path,
-    require_api_key,
+    SharedRateLimiter,
+    is_valid_api_key,
+    parse_rate_limit_overrides,
 )
+from app.core.middleware import RequestSecurityMiddleware
 from app.core.monitoring import MonitoringState, MonitoringThresholds
+from app.core.shared_state import shared_state
+from app.core.conditional import if_none_match, not_modified, set_etag
+from app.core.db_executor import run_db, shutdown_db_executor
+from app.core.export import EXPORT_COLUMNS, EXPORT_MEDIA_TYPES, stream_export
+from app.core.fast_json import FastJSONResponse, floor_to_dict, rows_to_dicts
+from app.core.prometheus import PROMETHEUS_CONTENT_TYPE, render_metrics
+from app.core.sse import change_event_stream
+from starlette.concurrency import run_in_threadpool
 from datetime import datetime
 from sqlalchemy import text
 from pathlib import Path as FilePath
@@ -23,15 +32,36 @@ seed_floors = None
 seed_sample_events = None
 FloorOperations = None
 EventOperations = None
+RollupOperations = None
+AsyncFloorOperations = None
+AsyncEventOperations = None
+AsyncRollupOperations = None
+encode_event_cursor = None
+to_naive_utc = None
+floor_cache = None
+idempotency_cache = None
+floor_broadcaster = None
+change_log = None
+query_metrics = None
+ingestion_metrics = None
 create_tables = None
 check_tables_exist = None
 engine = None
 
 try:
     from app.core.database import Base, engine
-    from app.core.migrations import create_tables, check_tables_exist, get_database_stats
+    from app.core.migrations import create_tables, check_tables_exist, ensure_indexes, get_database_stats
     from app.core.seed import seed_floors, seed_sample_events
-    from app.core.database_ops import FloorOperations, EventOperations
+    from app.core.database_ops import (
+        FloorOperations, EventOperations, RollupOperations,
+        AsyncFloorOperations, AsyncEventOperations, AsyncRollupOperations,
+        encode_event_cursor, to_naive_utc,
+    )
+    from app.core.floor_cache import floor_cache
+    from app.core.idempotency import idempotency_cache
+    from app.core.broadcast import floor_broadcaster
+    from app.core.change_log import change_log
+    from app.core.metrics import ingestion_metrics, query_metrics
     
     # Initialize database
     if check_tables_exist and not check_tables_exist():
@@ -40,6 +70,7 @@ try:
         logger.info("Database tables created")
     elif check_tables_exist:
         logger.info("Database tables already exist")
+        ensure_indexes()
 except (ImportError, AssertionError) as e:
     logger.warning(f"Database initialization warning: {type(e).__name__}: {e}")
 except Exception as e:
@@ -48,8 +79,11 @@ except Exception as e:
 # Import schemas
 from app.schemas import (
     EventCreateRequest, EventCreateResponse, FloorsListResponse,
-    RecommendationResponse, EventsListResponse, FloorResponse, EventResponse,
-    VehicleType, Direction, ErrorResponse, HealthCheckResponse, RootResponse
+    EventBatchCreateRequest, EventBatchCreateResponse, EventBatchItemResult, BatchItemStatus,
+    RecommendationResponse, EventsListResponse, EventHistoryResponse, FloorResponse, EventResponse,
+    VehicleType, Direction, CountMode, TimeBucket, EventStatsResponse, ErrorResponse, HealthCheckResponse, RootResponse,
+    RollupGranularity, OccupancyRollupPoint, OccupancyReportResponse, ExportFormat,
+    FloorChange, FloorChangesResponse
 )
 
 settings = get_settings()
@@ -68,17 +102,30 @@ if settings.sentry_dsn:
     except Exception as exc:
         logger.warning(f"Sentry initialization skipped: {exc}")
 
-rate_limiter = InMemoryRateLimiter(
-    max_requests=settings.api_rate_limit,
-    window_seconds=settings.api_rate_limit_window_seconds,
-)
+rate_limit_overrides = parse_rate_limit_overrides(settings.api_rate_limit_overrides)
+if shared_state is not None:
+    rate_limiter = SharedRateLimiter(
+        shared_state,
+        max_requests=settings.api_rate_limit,
+        window_seconds=settings.api_rate_limit_window_seconds,
+        overrides=rate_limit_overrides,
+    )
+else:
+    rate_limiter = InMemoryRateLimiter(
+        max_requests=settings.api_rate_limit,
+        window_seconds=settings.api_rate_limit_window_seconds,
+        overrides=rate_limit_overrides,
+    )
 monitoring = MonitoringState(
-    history_size=settings.monitoring_history_size,
     thresholds=MonitoringThresholds(
         error_rate_threshold=settings.monitoring_error_rate_threshold,
         latency_ms_threshold=settings.monitoring_latency_ms_threshold,
+        latency_statistic=settings.monitoring_latency_statistic,
         low_availability_threshold=settings.monitoring_low_availability_threshold,
     ),
+    alert_window_seconds=settings.monitoring_alert_window_seconds,
+    shared_store=shared_state,
+    max_routes=settings.monitoring_max_routes,
 )
 cors_origins = settings.parse_csv_setting(settings.cors_allow_origins)
 cors_methods = settings.parse_csv_setting(settings.cors_allow_methods)
@@ -112,62 +159,13 @@ app.add_middleware(
 )
 
 
-@app.middleware("http")
-async def request_security_and_logging_middleware(request: Request, call_next):
-    start = perf_counter()
-    request_id = request.headers.get("X-Request-ID", "n/a")
-    path = request.url.path
-    method = request.method
-    client = get_client_identifier(request)
-    status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
-
-    try:
-        if method != "OPTIONS":
-            try:
-                require_api_key(request)
-            except HTTPException as exc:
-                status_code = exc.status_code
-                return JSONResponse(
-                    status_code=exc.status_code,
-                    content=ErrorResponse(
-                        error="Authentication Error",
-                        detail=str(exc.detail),
-                        status_code=exc.status_code,
-                    ).model_dump(),
-                )
-
-            if not is_public_path(path):
-                allowed, retry_after = rate_limiter.check(client)
-                if not allowed:
-                    status_code = status.HTTP_429_TOO_MANY_REQUESTS
-                    logger.warning(
-                        f"Rate limit exceeded: client={client} path={path} retry_after={retry_after}s"
-                    )
-                    return JSONResponse(
-                        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                        content=ErrorResponse(
-                            error="Too Many Requests",
-                            detail="Rate limit exceeded",
-                            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                        ).model_dump(),
-                        headers={"Retry-After": str(retry_after)},
-                    )
-
-        response = await call_next(request)
-        status_code = response.status_code
-        return response
-    finally:
-        duration_ms = (perf_counter() - start) * 1000
-        monitoring.record_request(
-            method=method,
-            path=path,
-            status_code=status_code,
-            duration_ms=duration_ms,
-        )
-        logger.info(
-            f"{method} {path} status={status_code} duration_ms={duration_ms:.2f} "
-            f"client={client} request_id={request_id}"
-        )
+app.add_middleware(
+    RequestSecurityMiddleware,
+    rate_limiter=rate_limiter,
+    monitoring=monitoring,
+    api_key_header=settings.api_key_header,
+    routes=app.router.routes,
+)
 
 
 @app.exception_handler(HTTPException)
@@ -208,6 +206,53 @@ async def unhandled_exception_handler(request: Request, exc: Exception):
     )
 
 
+background_tasks: list[asyncio.Task] = []
+
+
+async def reconcile_floor_cache_periodically():
+    """Re-read the floors table so writes from other workers reach this process's cache."""
+    while True:
+        await asyncio.sleep(settings.floor_cache_reconcile_seconds)
+        try:
+            await run_db(floor_cache.reconcile)
+        except Exception as exc:
+            logger.warning(f"Floor cache reconciliation failed: {exc}")
+
+
+async def maintain_events_periodically():
+    """Create upcoming event partitions, archive cold events and apply the retention policy."""
+    while True:
+        try:
+            await run_db(EventOperations.ensure_event_partitions)
+            if settings.archive_after_days > 0:
+                await run_db(EventOperations.archive_old_events, settings.archive_after_days)
+            if settings.events_retention_days > 0:
+                await run_db(EventOperations.cleanup_old_events, settings.events_retention_days)
+        except Exception as exc:
+            logger.warning(f"Event maintenance failed: {exc}")
+        await asyncio.sleep(settings.events_maintenance_seconds)
+
+
+async def flush_shared_state_periodically():
+    """Write this worker's buffered request and ingestion metrics to the shared state file."""
+    while True:
+        await asyncio.sleep(settings.shared_state_flush_ms / 1000)
+        try:
+            await run_in_threadpool(shared_state.flush)
+        except Exception as exc:
+            logger.warning(f"Shared state flush failed: {exc}")
+
+
+async def watch_alerts_periodically():
+    """Re-evaluate alerts so SSE clients see transitions without anyone polling /monitoring/alerts."""
+    while True:
+        await asyncio.sleep(settings.alerts_evaluation_seconds)
+        try:
+            publish_alert_transitions(await evaluate_alerts())
+        except Exception as exc:
+            logger.warning(f"Alert evaluation failed: {exc}")
+
+
 @app.on_event("startup")
 async def startup_event():
     logger.info(f"Starting {settings.project_name}")
@@ -224,10 +269,45 @@ async def startup_event():
     except Exception as e:
         logger.warning(f"Database seeding warning: {e}")
 
+    if floor_broadcaster:
+        floor_broadcaster.bind(asyncio.get_running_loop())
+
+    if floor_cache and settings.floor_cache_enabled:
+        try:
+            await run_db(floor_cache.reconcile)
+            logger.info(f"Floor cache warmed at version {floor_cache.version}")
+        except Exception as e:
+            logger.warning(f"Floor cache warm-up warning: {e}")
+        background_tasks.append(asyncio.create_task(reconcile_floor_cache_periodically()))
+
+    if shared_state is not None:
+        background_tasks.append(asyncio.create_task(flush_shared_state_periodically()))
+
+    if change_log:
+        background_tasks.append(asyncio.create_task(watch_alerts_periodically()))
+
+    if EventOperations and (
+        settings.events_partitioning != "none"
+        or settings.archive_after_days > 0
+        or settings.events_retention_days > 0
+    ):
+        background_tasks.append(asyncio.create_task(maintain_events_periodically()))
+
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info(f"Shutting down {settings.project_name}")
+    if floor_broadcaster:
+        floor_broadcaster.bind(None)
+    for task in background_tasks:
+        task.cancel()
+    background_tasks.clear()
+    if shared_state is not None:
+        try:
+            await run_in_threadpool(shared_state.flush)
+        except Exception as exc:
+            logger.warning(f"Final shared state flush failed: {exc}")
+    shutdown_db_executor()
 
 
 @app.get("/health", response_model=HealthCheckResponse)
@@ -246,7 +326,7 @@ async def health_check():
         }
         
         if get_database_stats:
-            stats = get_database_stats()
+            stats = await run_db(get_database_stats)
             response["database"]["floors"] = stats.get('floors_count', 0)
             response["database"]["events"] = stats.get('events_count', 0)
             response["database"]["tables_exist"] = True
@@ -292,9 +372,12 @@ async def readiness_check():
             },
         )
 
-    try:
+    def ping_database():
         with engine.connect() as connection:
             connection.execute(text("SELECT 1"))
+
+    try:
+        await run_db(ping_database)
         return {
             "status": "ready",
             "timestamp": datetime.now().isoformat(),
@@ -319,17 +402,23 @@ async def readiness_check():
 async def monitoring_metrics():
     """Operational metrics snapshot for dashboards."""
     payload = monitoring.snapshot()
+    if floor_cache:
+        payload["floor_cache"] = floor_cache.stats()
+    if idempotency_cache:
+        payload["idempotency_cache"] = idempotency_cache.stats()
+    if floor_broadcaster:
+        payload["websocket"] = floor_broadcaster.stats()
+    payload["rate_limiter"] = {"tracked_clients": rate_limiter.tracked_clients()}
+    payload["logging"] = {"dropped_records": dropped_log_records()}
     payload["timestamp"] = datetime.now().isoformat()
     return payload
 
 
-@app.get("/monitoring/alerts")
-async def monitoring_alerts():
-    """Evaluate live alert conditions for anomalies."""
+async def evaluate_alerts() -> list[dict]:
     low_availability_floors = []
     if FloorOperations:
         try:
-            floors = FloorOperations.get_all_active_floors()
+            floors = await AsyncFloorOperations.get_all_active_floors()
             low_availability_floors = [
                 {"id": floor.id, "name": floor.name, "available_slots": floor.available_slots}
                 for floor in floors
@@ -338,7 +427,31 @@ async def monitoring_alerts():
         except Exception as exc:
             logger.warning(f"Unable to evaluate floor availability alert state: {exc}")
 
-    alerts = monitoring.evaluate_alerts(low_availability_floors=low_availability_floors)
+    return monitoring.evaluate_alerts(low_availability_floors=low_availability_floors)
+
+
+active_alerts: dict[str, dict] = {}
+
+
+def publish_alert_transitions(alerts: list[dict]) -> None:
+    """Log alert_raised/alert_cleared changes relative to the previous evaluation."""
+    if not change_log:
+        return
+    current = {alert["code"]: alert for alert in alerts}
+    for code, alert in current.items():
+        if code not in active_alerts:
+            change_log.append("alert_raised", alert)
+    for code in active_alerts.keys() - current.keys():
+        change_log.append("alert_cleared", {"code": code})
+    active_alerts.clear()
+    active_alerts.update(current)
+
+
+@app.get("/monitoring/alerts")
+async def monitoring_alerts():
+    """Evaluate live alert conditions for anomalies."""
+    alerts = await evaluate_alerts()
+    publish_alert_transitions(alerts)
     return {
         "timestamp": datetime.now().isoformat(),
         "active_alert_count": len(alerts),
@@ -346,6 +459,30 @@ async def monitoring_alerts():
     }
 
 
+@app.get("/metrics", response_class=Response)
+async def prometheus_metrics():
+    """Prometheus text exposition of request, database, ingestion and occupancy metrics."""
+
+    def render() -> str:
+        return render_metrics(
+            monitoring=monitoring,
+            query_histograms=query_metrics.histograms() if query_metrics else {},
+            ingestion_counts=ingestion_metrics.counts() if ingestion_metrics else {},
+            floors=FloorOperations.get_all_active_floors() if FloorOperations else [],
+            idempotency_stats=idempotency_cache.stats() if idempotency_cache else None,
+            floor_cache_stats=floor_cache.stats() if floor_cache else None,
+            websocket_stats=floor_broadcaster.stats() if floor_broadcaster else None,
+            rate_limited_clients=rate_limiter.tracked_clients(),
+            dropped_log_records=dropped_log_records(),
+        )
+
+    try:
+        return Response(content=await run_db(render), media_type=PROMETHEUS_CONTENT_TYPE)
+    except Exception as e:
+        logger.error(f"Error rendering Prometheus metrics: {e}")
+        raise HTTPException(status_code=500, detail="Error rendering metrics")
+
+
 @app.get("/camera/latest-frame")
 async def latest_camera_frame():
     """
@@ -394,7 +531,7 @@ async def record_event(event: EventCreateRequest):
     
     try:
         # Record the event with idempotency and atomic floor count update.
-        db_event, floor, is_duplicate = EventOperations.record_event(
+        db_event, floor, is_duplicate = await AsyncEventOperations.record_event(
             camera_id=event.camera_id,
             floor_id=event.floor_id,
             track_id=event.track_id,
@@ -433,18 +570,108 @@ async def record_event(event: EventCreateRequest):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@app.post("/events/batch", response_model=EventBatchCreateResponse)
+async def record_events_batch(batch: EventBatchCreateRequest):
+    """
+    Record many parking events in a single transaction
+
+    Items are applied in order and each gets its own outcome (recorded, duplicate,
+    floor_full, floor_empty, floor_not_found, conflict); rejected items do not fail the batch.
+    """
+    if not (EventOperations and FloorOperations):
+        raise HTTPException(status_code=503, detail="Database not initialized")
+
+    try:
+        outcomes = await AsyncEventOperations.record_events_batch(
+            [
+                {
+                    "camera_id": item.camera_id,
+                    "floor_id": item.floor_id,
+                    "track_id": item.track_id,
+                    "vehicle_type": item.vehicle_type.value,
+                    "direction": item.direction.value,
+                    "confidence": item.confidence,
+                    "timestamp": item.timestamp,
+                }
+                for item in batch.events
+            ]
+        )
+
+        results = []
+        for index, outcome in enumerate(outcomes):
+            current = outcome["current_vehicles"]
+            total_slots = outcome["total_slots"]
+            has_floor = current is not None and total_slots is not None
+            results.append(
+                EventBatchItemResult(
+                    index=index,
+                    status=outcome["status"],
+                    event_id=outcome["event"].id if outcome["event"] is not None else None,
+                    floor_id=outcome["floor_id"],
+                    current_vehicles=current,
+                    available_slots=max(0, total_slots - current) if has_floor else None,
+                    occupancy_percentage=(
+                        (current / total_slots * 100 if total_slots else 0.0) if has_floor else None
+                    ),
+                )
+            )
+
+        recorded = sum(1 for result in results if result.status == BatchItemStatus.recorded)
+        duplicates = sum(1 for result in results if result.status == BatchItemStatus.duplicate)
+
+        return EventBatchCreateResponse(
+            success=True,
+            total=len(results),
+            recorded=recorded,
+            duplicates=duplicates,
+            rejected=len(results) - recorded - duplicates,
+            results=results,
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error recording event batch: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+def floor_state_etag(scope: str, floor_id: int | None = None) -> str | None:
+    """
+    ETag for a response derived only from the floor cache, or None when the cache is not serving reads.
+
+    Whole-table responses use the cache version; single floors use that floor's own version.
+    """
+    if not floor_cache or not settings.floor_cache_enabled or not floor_cache.is_loaded:
+        return None
+    if floor_id is None:
+        version = floor_cache.version
+    else:
+        snapshot = floor_cache.get(floor_id)
+        if snapshot is None:
+            return None
+        version = snapshot.version
+    return f'"{scope}-{floor_cache.epoch}-{version}"'
+
+
 @app.get("/floors", response_model=FloorsListResponse)
-async def get_floors():
+async def get_floors(request: Request, response: Response):
     """
     Get all active floors with current occupancy information
     
     Returns list of all floors with capacity, occupancy, and availability data.
+    Supports conditional requests: a matching `If-None-Match` gets `304 Not Modified`.
     """
     if not FloorOperations:
         raise HTTPException(status_code=503, detail="Database not initialized")
+
+    etag = floor_state_etag("floors")
+    if etag:
+        if if_none_match(request, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
     
     try:
-        floors = FloorOperations.get_all_active_floors()
+        floors = await AsyncFloorOperations.get_all_active_floors()
         
         if not floors:
             logger.warning("No active floors found")
@@ -457,6 +684,20 @@ async def get_floors():
         average_occupancy = (total_vehicles / total_capacity * 100) if total_capacity > 0 else 0
         
         logger.info(f"Retrieved {len(floors)} active floors")
+
+        if settings.fast_json_responses:
+            fast_response = FastJSONResponse({
+                "success": True,
+                "total_floors": len(floors),
+                "total_capacity": total_capacity,
+                "total_vehicles": total_vehicles,
+                "total_available": total_available,
+                "average_occupancy": round(average_occupancy, 2),
+                "floors": [floor_to_dict(floor) for floor in floors],
+            })
+            if etag:
+                set_etag(fast_response, etag)
+            return fast_response
         
         return FloorsListResponse(
             success=True,
@@ -475,16 +716,72 @@ async def get_floors():
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+FLOOR_CHANGE_KINDS = {"floor_delta", "floor_removed"}
+
+
+@app.get("/floors/changes", response_model=FloorChangesResponse)
+async def get_floor_changes(
+    since: int | None = Query(default=None, ge=0, description="Last change sequence already applied"),
+    epoch: str | None = Query(default=None, description="Epoch returned with that sequence (required with since)"),
+    wait: float = Query(0, ge=0, le=30, description="Long-poll up to N seconds when nothing has changed"),
+):
+    """
+    Get floor changes after a sequence number
+
+    Returns only the floor deltas logged after `since`. When `since` or `epoch` is
+    missing, the epoch is another process's (server restart) or `since` has fallen
+    out of the change log, `resync_required` is true: reload `/floors`, then
+    continue from `seq`. Sequences restart at 0 with every process, so `since`
+    without its epoch cannot be trusted.
+    """
+    if not change_log:
+        raise HTTPException(status_code=503, detail="Database not initialized")
+
+    def collect():
+        if since is None or epoch != change_log.epoch:
+            return [], True
+        return change_log.since(since, kinds=FLOOR_CHANGE_KINDS)
+
+    seq = change_log.seq
+    changes, resync = collect()
+    if wait and not changes and not resync:
+        deadline = asyncio.get_running_loop().time() + wait
+        while not changes and not resync:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0 or not await change_log.wait(seq, remaining):
+                break
+            seq = change_log.seq
+            changes, resync = collect()
+
+    if changes:
+        seq = max(seq, changes[-1].seq)
+    return FloorChangesResponse(
+        success=True,
+        epoch=change_log.epoch,
+        seq=seq,
+        resync_required=resync,
+        changes=[FloorChange(seq=entry.seq, type=entry.kind, **entry.data) for entry in changes],
+    )
+
+
 @app.get("/floors/{floor_id}", response_model=FloorResponse)
-async def get_floor(floor_id: int = Path(..., gt=0, description="Floor ID")):
+async def get_floor(request: Request, response: Response, floor_id: int = Path(..., gt=0, description="Floor ID")):
     """
     Get specific floor by ID with current occupancy
+
+    The ETag only changes when this floor changes.
     """
     if not FloorOperations:
         raise HTTPException(status_code=503, detail="Database not initialized")
+
+    etag = floor_state_etag("floor", floor_id)
+    if etag:
+        if if_none_match(request, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
     
     try:
-        floor = FloorOperations.get_floor_by_id(floor_id)
+        floor = await AsyncFloorOperations.get_floor_by_id(floor_id)
         
         if not floor:
             logger.warning(f"Floor {floor_id} not found")
@@ -500,25 +797,29 @@ async def get_floor(floor_id: int = Path(..., gt=0, description="Floor ID")):
 
 
 @app.get("/recommend", response_model=RecommendationResponse)
-async def get_recommendation():
+async def get_recommendation(request: Request, response: Response):
     """
     Get recommended floor for parking based on occupancy rates
     
-    Returns the floor with the lowest occupancy percentage, along with alternatives.
+    Returns the best floor under the configured ranking policy
+    (RECOMMENDATION_POLICY), along with the next-ranked alternatives.
+    Supports conditional requests like `/floors`.
     """
     if not FloorOperations:
         raise HTTPException(status_code=503, detail="Database not initialized")
+
+    etag = floor_state_etag("recommend")
+    if etag:
+        if if_none_match(request, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
     
     try:
-        recommended = FloorOperations.get_recommended_floor()
-        if not recommended:
+        ranked = await AsyncFloorOperations.get_ranked_floors(limit=4)
+        if not ranked:
             raise HTTPException(status_code=404, detail="No suitable floor found")
         
-        all_floors = FloorOperations.get_all_active_floors()
-        
-        # Get alternatives (other floors sorted by occupancy)
-        alternatives = [f for f in sorted(all_floors, key=lambda x: x.occupancy_percentage) 
-                       if f.id != recommended.id][:3]
+        recommended, alternatives = ranked[0], ranked[1:]
         
         occupancy = recommended.occupancy_percentage
         if occupancy < 30:
@@ -553,27 +854,53 @@ async def get_events(
     direction: Direction | None = Query(default=None, description="Filter by direction (entry/exit)"),
     hours: int = Query(24, ge=1, le=365*24, description="Events from last N hours"),
     limit: int = Query(100, ge=1, le=1000, description="Max results"),
-    offset: int = Query(0, ge=0, description="Pagination offset")
+    offset: int = Query(0, ge=0, description="Pagination offset"),
+    cursor: str | None = Query(default=None, description="Keyset cursor from a previous page's next_cursor"),
+    counts: CountMode = Query(CountMode.exact, description="Compute total/filtered counts or skip them"),
 ):
     """
     Get event logs with optional filtering
     
     Supports filtering by floor, vehicle type, direction, and time range.
+    Pages can be walked with `cursor`/`next_cursor` (keyset on timestamp, id),
+    which keeps deep pages as cheap as the first one; `counts=none` skips the COUNT queries.
+    With FAST_JSON_RESPONSES the page is encoded straight from row tuples.
     """
     if not EventOperations:
         raise HTTPException(status_code=503, detail="Database not initialized")
+    if cursor is not None and offset:
+        raise HTTPException(status_code=400, detail="cursor and offset cannot be combined")
     
     try:
-        paginated_events, total_count, filtered_count = EventOperations.get_filtered_events(
+        paginated_events, total_count, filtered_count = await AsyncEventOperations.get_filtered_events(
             hours=hours,
             floor_id=floor_id,
             vehicle_type=vehicle_type.value if vehicle_type else None,
             direction=direction.value if direction else None,
             limit=limit,
             offset=offset,
+            cursor=cursor,
+            include_counts=counts == CountMode.exact,
+            as_rows=settings.fast_json_responses,
         )
 
         logger.info(f"Retrieved {len(paginated_events)} events (total after filters: {filtered_count})")
+
+        next_cursor = None
+        if len(paginated_events) == limit:
+            last_event = paginated_events[-1]
+            next_cursor = encode_event_cursor(last_event.timestamp, last_event.id)
+
+        if settings.fast_json_responses:
+            return FastJSONResponse({
+                "success": True,
+                "total_count": total_count,
+                "filtered_count": filtered_count,
+                "limit": limit,
+                "offset": offset,
+                "next_cursor": next_cursor,
+                "events": rows_to_dicts(EXPORT_COLUMNS, paginated_events),
+            })
         
         return EventsListResponse(
             success=True,
@@ -581,16 +908,280 @@ async def get_events(
             filtered_count=filtered_count,
             limit=limit,
             offset=offset,
+            next_cursor=next_cursor,
             events=[_serialize_event(event) for event in paginated_events]
         )
     
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error retrieving events: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+
+MAX_STATS_BUCKETS = 10080
+BUCKET_MINUTES = {TimeBucket.minute: 1, TimeBucket.hour: 60, TimeBucket.day: 1440}
+
+
+@app.get("/events/stats", response_model=EventStatsResponse)
+async def get_event_stats(
+    hours: int = Query(24, ge=1, le=365*24, description="Events from last N hours"),
+    bucket: TimeBucket | None = Query(default=None, description="Time-series bucket width"),
+    floor_id: int | None = Query(default=None, gt=0, description="Filter by floor ID"),
+    vehicle_type: VehicleType | None = Query(default=None, description="Filter by vehicle type"),
+    direction: Direction | None = Query(default=None, description="Filter by direction (entry/exit)"),
+):
+    """
+    Get aggregated event statistics
+
+    Totals with direction, vehicle type and floor breakdowns, plus an optional
+    minute/hour/day time series, computed with grouped SQL queries.
+    """
+    if not EventOperations:
+        raise HTTPException(status_code=503, detail="Database not initialized")
+    if bucket is not None and hours * 60 // BUCKET_MINUTES[bucket] > MAX_STATS_BUCKETS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many {bucket.value} buckets for {hours} hours (max {MAX_STATS_BUCKETS})",
+        )
+
+    try:
+        stats = await AsyncEventOperations.get_event_stats(
+            hours=hours,
+            bucket=bucket.value if bucket else None,
+            floor_id=floor_id,
+            vehicle_type=vehicle_type.value if vehicle_type else None,
+            direction=direction.value if direction else None,
+        )
+        return EventStatsResponse(success=True, hours=hours, bucket=bucket, **stats)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error computing event statistics: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@app.get("/events/history", response_model=EventHistoryResponse)
+async def get_event_history(
+    start: datetime = Query(..., description="Start of the time range (UTC)"),
+    end: datetime | None = Query(default=None, description="End of the time range (UTC), defaults to now"),
+    floor_id: int | None = Query(default=None, gt=0, description="Filter by floor ID"),
+    vehicle_type: VehicleType | None = Query(default=None, description="Filter by vehicle type"),
+    direction: Direction | None = Query(default=None, description="Filter by direction (entry/exit)"),
+    limit: int = Query(100, ge=1, le=1000, description="Max results"),
+):
+    """
+    Get the newest events in a time range, including archived events
+
+    Reads the events table and every archive segment overlapping the range,
+    and merges them newest first.
+    """
+    if not EventOperations:
+        raise HTTPException(status_code=503, detail="Database not initialized")
+    start = to_naive_utc(start)
+    end = to_naive_utc(end) if end is not None else datetime.utcnow()
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+
+    try:
+        events, sources = await AsyncEventOperations.get_event_history(
+            start_time=start,
+            end_time=end,
+            floor_id=floor_id,
+            vehicle_type=vehicle_type.value if vehicle_type else None,
+            direction=direction.value if direction else None,
+            limit=limit,
+        )
+        return EventHistoryResponse(
+            success=True,
+            start=start,
+            end=end,
+            limit=limit,
+            sources=sources,
+            events=[EventResponse.model_validate(event) for event in events],
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error reading event history: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@app.get("/events/export")
+async def export_events(
+    start: datetime = Query(..., description="Start of the time range (UTC)"),
+    end: datetime | None = Query(default=None, description="End of the time range (UTC), defaults to now"),
+    format: ExportFormat = Query(default=ExportFormat.ndjson, description="ndjson or csv"),
+    floor_id: int | None = Query(default=None, gt=0, description="Filter by floor ID"),
+    vehicle_type: VehicleType | None = Query(default=None, description="Filter by vehicle type"),
+    direction: Direction | None = Query(default=None, description="Filter by direction (entry/exit)"),
+):
+    """
+    Stream every event in a time range as NDJSON or CSV, oldest first
+
+    Rows are read through a server-side cursor and written chunk by chunk,
+    so memory use does not grow with the size of the range.
+    """
+    if not EventOperations:
+        raise HTTPException(status_code=503, detail="Database not initialized")
+    start = to_naive_utc(start)
+    end = to_naive_utc(end) if end is not None else datetime.utcnow()
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+
+    chunks = EventOperations.iter_event_rows(
+        start_time=start,
+        end_time=end,
+        floor_id=floor_id,
+        vehicle_type=vehicle_type.value if vehicle_type else None,
+        direction=direction.value if direction else None,
+    )
+    filename = f"events-{start:%Y%m%dT%H%M%S}-{end:%Y%m%dT%H%M%S}.{format.value}"
+    return StreamingResponse(
+        stream_export(chunks, format.value),
+        media_type=EXPORT_MEDIA_TYPES[format.value],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@app.get("/reports/occupancy", response_model=OccupancyReportResponse)
+async def get_occupancy_report(
+    granularity: RollupGranularity = Query(default=RollupGranularity.hour, description="Rollup bucket width"),
+    hours: int = Query(24, ge=1, le=365*24, description="Buckets from last N hours"),
+    floor_id: int | None = Query(default=None, gt=0, description="Filter by floor ID"),
+):
+    """
+    Get per-floor occupancy and entry/exit counts over time
+
+    Served entirely from the occupancy rollup tables maintained at ingest time,
+    so long history ranges never scan the events table.
+    """
+    if not RollupOperations:
+        raise HTTPException(status_code=503, detail="Database not initialized")
+    if hours * 60 // BUCKET_MINUTES[TimeBucket(granularity.value)] > MAX_STATS_BUCKETS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many {granularity.value} buckets for {hours} hours (max {MAX_STATS_BUCKETS})",
+        )
+
+    try:
+        rollups = await AsyncRollupOperations.get_occupancy_series(
+            granularity=granularity.value,
+            hours=hours,
+            floor_id=floor_id,
+        )
+        return OccupancyReportResponse(
+            success=True,
+            granularity=granularity,
+            hours=hours,
+            points=[OccupancyRollupPoint.model_validate(rollup) for rollup in rollups],
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error building occupancy report: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@app.get("/stream/floors")
+async def stream_floors(
+    request: Request,
+    last_event_id: str | None = Query(default=None, description="Resume after this event id (same as Last-Event-ID)"),
+):
+    """
+    Server-Sent Events stream of floor occupancy changes and alert transitions
+
+    Starts with a `snapshot` event (floors and active alerts), then emits
+    `floor_delta`, `floor_removed`, `alert_raised` and `alert_cleared` events.
+    Reconnecting with `Last-Event-ID` replays missed changes from the in-memory
+    change log, or sends a fresh snapshot if they are no longer buffered.
+    """
+    if not change_log:
+        raise HTTPException(status_code=503, detail="Database not initialized")
+
+    async def snapshot() -> dict:
+        floors = await AsyncFloorOperations.get_all_active_floors()
+        return {
+            "floors": [FloorResponse.model_validate(floor).model_dump(mode="json") for floor in floors],
+            "alerts": list(active_alerts.values()),
+        }
+
+    return StreamingResponse(
+        change_event_stream(
+            change_log,
+            snapshot,
+            request.headers.get("last-event-id") or last_event_id,
+            request.is_disconnected,
+            keepalive_seconds=settings.sse_keepalive_seconds,
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.websocket("/ws")
+async def floors_websocket(websocket: WebSocket):
+    """
+    Push channel for live floor occupancy
+
+    Sends a `floors_update` snapshot on connect, then one `floor_delta` (or
+    `floor_removed`) message per committed floor change. Browsers cannot set
+    headers on WebSockets, so the API key may also be passed as `?api_key=`.
+    """
+    provided_key = websocket.headers.get(settings.api_key_header) or websocket.query_params.get("api_key")
+    if not is_valid_api_key(provided_key):
+        await websocket.close(code=1008)
+        return
+    if not floor_broadcaster:
+        await websocket.close(code=1011)
+        return
+
+    await websocket.accept()
+    # Subscribe before taking the snapshot so no change can fall between the two.
+    subscriber = floor_broadcaster.subscribe()
+    try:
+        floors = await AsyncFloorOperations.get_all_active_floors()
+        await websocket.send_json({
+            "type": "floors_update",
+            "version": floor_cache.version,
+            "data": {"floors": [FloorResponse.model_validate(floor).model_dump(mode="json") for floor in floors]},
+        })
+
+        async def send_updates():
+            while True:
+                message = await subscriber.queue.get()
+                if message is None:
+                    await websocket.close(code=1013)
+                    return
+                await websocket.send_text(message)
+
+        async def drain_client():
+            while True:
+                await websocket.receive_text()
+
+        tasks = [asyncio.create_task(send_updates()), asyncio.create_task(drain_client())]
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        for task in done:
+            exc = task.exception()
+            if exc is not None and not isinstance(exc, WebSocketDisconnect):
+                raise exc
+
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.warning(f"WebSocket connection error: {e}")
+    finally:
+        floor_broadcaster.unsubscribe(subscriber)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -24,6 +24,8 @@ def app_module(tmp_path, monkeypatch):
     monkeypatch.setenv("CORS_ALLOW_ORIGINS", "*")
     monkeypatch.setenv("CORS_ALLOW_METHODS", "GET,POST,PUT,PATCH,DELETE,OPTIONS")
     monkeypatch.setenv("CORS_ALLOW_HEADERS", "*")
+    monkeypatch.setenv("ARCHIVE_DIR", (Path(tmp_path) / "archive").as_posix())
+    monkeypatch.setenv("LOG_FILE", (Path(tmp_path) / "backend.log").as_posix())
 
     _clear_backend_modules()
     main_module = importlib.import_module("main")
@@ -83,3 +83,180 @@ def test_post_event_and_duplicate_idempotency(client, auth_headers):
     assert first.json()["success"] is True
     assert second.json()["success"] is True
     assert second.json()["message"].lower().startswith("duplicate")
+
+
+def test_post_events_batch_reports_per_item_outcomes(client, auth_headers):
+    base = {
+        "camera_id": "cam_api_batch_001",
+        "floor_id": 1,
+        "vehicle_type": "car",
+        "confidence": 0.97,
+    }
+    batch = {
+        "events": [
+            {**base, "track_id": "track_api_batch_001", "direction": "entry"},
+            {**base, "track_id": "track_api_batch_001", "direction": "entry"},
+            {**base, "track_id": "track_api_batch_002", "direction": "entry"},
+            {**base, "track_id": "track_api_batch_003", "direction": "entry", "floor_id": 999},
+        ]
+    }
+
+    response = client.post("/events/batch", json=batch, headers=auth_headers)
+    assert response.status_code == 200
+    payload = response.json()
+
+    assert payload["total"] == 4
+    assert payload["recorded"] == 2
+    assert payload["duplicates"] == 1
+    assert payload["rejected"] == 1
+    statuses = [item["status"] for item in payload["results"]]
+    assert statuses == ["recorded", "duplicate", "recorded", "floor_not_found"]
+    assert payload["results"][1]["event_id"] == payload["results"][0]["event_id"]
+    assert payload["results"][2]["current_vehicles"] == payload["results"][0]["current_vehicles"] + 1
+
+    empty = client.post("/events/batch", json={"events": []}, headers=auth_headers)
+    assert empty.status_code == 422
+
+
+def test_get_events_keyset_pagination_walks_all_pages(client, auth_headers):
+    base = {"camera_id": "cam_api_cursor_001", "floor_id": 1, "vehicle_type": "car", "confidence": 0.9}
+    batch = {
+        "events": [
+            {**base, "track_id": f"track_api_cursor_{idx}", "direction": "entry" if idx % 2 else "exit"}
+            for idx in range(12)
+        ]
+    }
+    assert client.post("/events/batch", json=batch, headers=auth_headers).status_code == 200
+
+    full = client.get("/events?hours=24&limit=1000", headers=auth_headers).json()
+    expected_ids = [event["id"] for event in full["events"]]
+
+    seen_ids = []
+    url = "/events?hours=24&limit=5&counts=none"
+    while True:
+        page = client.get(url, headers=auth_headers)
+        assert page.status_code == 200
+        payload = page.json()
+        assert payload["total_count"] is None
+        assert payload["filtered_count"] is None
+        seen_ids.extend(event["id"] for event in payload["events"])
+        if not payload["next_cursor"]:
+            break
+        url = f"/events?hours=24&limit=5&counts=none&cursor={payload['next_cursor']}"
+
+    assert seen_ids == expected_ids
+
+    invalid = client.get("/events?cursor=not-a-cursor", headers=auth_headers)
+    assert invalid.status_code == 400
+    combined = client.get(f"/events?offset=5&cursor={full['next_cursor'] or 'x'}", headers=auth_headers)
+    assert combined.status_code == 400
+
+
+def test_get_event_stats_breakdowns_and_time_buckets(client, auth_headers):
+    base = {"camera_id": "cam_api_stats_001", "floor_id": 1, "confidence": 0.9}
+    batch = {
+        "events": [
+            {**base, "track_id": "track_api_stats_1", "vehicle_type": "car", "direction": "entry"},
+            {**base, "track_id": "track_api_stats_2", "vehicle_type": "bus", "direction": "entry"},
+            {**base, "track_id": "track_api_stats_3", "vehicle_type": "car", "direction": "exit"},
+        ]
+    }
+    assert client.post("/events/batch", json=batch, headers=auth_headers).status_code == 200
+
+    response = client.get("/events/stats?hours=24&bucket=hour", headers=auth_headers)
+    assert response.status_code == 200
+    payload = response.json()
+
+    events = client.get("/events?hours=24&limit=1000", headers=auth_headers).json()["events"]
+    assert payload["total_events"] == len(events)
+    assert payload["entries"] == sum(1 for event in events if event["direction"] == "entry")
+    assert payload["by_direction"]["exit"] == payload["exits"]
+    assert sum(payload["by_vehicle_type"].values()) == payload["total_events"]
+    assert sum(floor["total"] for floor in payload["by_floor"]) == payload["total_events"]
+    assert sum(item["total"] for item in payload["buckets"]) == payload["total_events"]
+    assert all(item["bucket_start"].endswith(":00:00") for item in payload["buckets"])
+
+    filtered = client.get("/events/stats?hours=24&floor_id=1&vehicle_type=bus", headers=auth_headers).json()
+    assert filtered["total_events"] == sum(
+        1 for event in events if event["floor_id"] == 1 and event["vehicle_type"] == "bus"
+    )
+    assert [floor["floor_id"] for floor in filtered["by_floor"]] == [1]
+    assert filtered["buckets"] == []
+
+    too_many = client.get("/events/stats?hours=8760&bucket=minute", headers=auth_headers)
+    assert too_many.status_code == 400
+
+
+def test_get_occupancy_report_reads_rollups(client, auth_headers):
+    payload = {
+        "camera_id": "cam_api_rollup_001",
+        "floor_id": 3,
+        "track_id": "track_api_rollup_1",
+        "vehicle_type": "car",
+        "direction": "entry",
+        "confidence": 0.9,
+    }
+    assert client.post("/event", json=payload, headers=auth_headers).status_code == 200
+
+    response = client.get("/reports/occupancy?granularity=hour&hours=2&floor_id=3", headers=auth_headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["granularity"] == "hour"
+    assert sum(point["entries"] for point in body["points"]) == 1
+    assert all(point["floor_id"] == 3 for point in body["points"])
+    assert body["points"][-1]["occupancy_end"] is not None
+
+    assert client.get("/reports/occupancy?granularity=minute&hours=8760", headers=auth_headers).status_code == 400
+    assert client.get("/reports/occupancy").status_code in (401, 403)
+
+
+def test_export_events_streams_ndjson_and_csv(client, auth_headers, monkeypatch):
+    import csv
+    import io
+    import json
+    from datetime import datetime, timedelta
+
+    from app.core.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "export_chunk_size", 3)
+    start = (datetime.utcnow() - timedelta(hours=48)).isoformat()
+    expected = client.get("/events/history", params={"start": start, "limit": 1000}, headers=auth_headers).json()
+
+    response = client.get("/events/export", params={"start": start}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert "attachment" in response.headers["content-disposition"]
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(row["id"] for row in rows) == sorted(event["id"] for event in expected["events"])
+    assert [row["timestamp"] for row in rows] == sorted(row["timestamp"] for row in rows)
+
+    filtered = client.get(
+        "/events/export",
+        params={"start": start, "format": "csv", "direction": "exit"},
+        headers=auth_headers,
+    )
+    assert filtered.status_code == 200
+    assert filtered.headers["content-type"].startswith("text/csv")
+    records = list(csv.DictReader(io.StringIO(filtered.text)))
+    assert len(records) == sum(1 for event in expected["events"] if event["direction"] == "exit")
+    assert all(record["direction"] == "exit" for record in records)
+
+    assert client.get("/events/export", params={"start": start, "end": "2000-01-01T00:00:00"}, headers=auth_headers).status_code == 400
+
+
+def test_fast_json_list_responses_match_pydantic_serialization(client, auth_headers, monkeypatch):
+    from app.core.config import get_settings
+
+    settings = get_settings()
+    paths = ["/events?hours=48&limit=1000", "/events?hours=48&limit=3&counts=none", "/floors"]
+
+    monkeypatch.setattr(settings, "fast_json_responses", True)
+    fast = [client.get(path, headers=auth_headers) for path in paths]
+    monkeypatch.setattr(settings, "fast_json_responses", False)
+    slow = [client.get(path, headers=auth_headers) for path in paths]
+
+    for fast_response, slow_response in zip(fast, slow):
+        assert fast_response.status_code == slow_response.status_code == 200
+        assert fast_response.json() == slow_response.json()
+    assert fast[2].headers["etag"] == slow[2].headers["etag"]
+    assert len(fast[0].json()["events"]) > 0
@@ -77,3 +77,30 @@ async def test_load_concurrent_camera_events(app_module, auth_headers):
     assert floor_response.json()["current_vehicles"] == 200
     assert events_response.status_code == 200
     assert events_response.json()["filtered_count"] >= 200
+
+
+@pytest.mark.asyncio
+async def test_slow_database_call_does_not_block_event_loop(app_module, auth_headers, monkeypatch):
+    import threading
+
+    release = threading.Event()
+
+    def slow_filtered_events(**_kwargs):
+        release.wait(timeout=5)
+        return [], 0, 0
+
+    monkeypatch.setattr(app_module.EventOperations, "get_filtered_events", slow_filtered_events)
+
+    transport = ASGITransport(app=app_module.app)
+    async with AsyncClient(transport=transport, base_url="http://testserver") as ac:
+        slow_request = asyncio.create_task(ac.get("/events", headers=auth_headers))
+        live = await asyncio.wait_for(ac.get("/health/live"), timeout=2)
+
+        assert live.status_code == 200
+        assert not slow_request.done()
+
+        release.set()
+        slow_response = await slow_request
+
+    assert slow_response.status_code == 200
+    assert slow_response.json()["events"] == []
@@ -1,5 +1,5 @@
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from datetime import datetime
+from datetime import datetime, timedelta
 
 
 def _reset_floor_state(app_module, floor_id: int, *, total_slots: int, current_vehicles: int):
@@ -117,3 +117,213 @@ def test_concurrent_duplicate_record_event_is_thread_safe(app_module):
 
     assert duplicate_count >= 19
     assert event_count == 1
+
+
+def test_record_events_batch_applies_capacity_in_order(app_module):
+    from app.core.database_ops import EventOperations
+
+    _reset_floor_state(app_module, 1, total_slots=2, current_vehicles=1)
+    base_ts = datetime.utcnow()
+    events = [
+        {
+            "camera_id": "cam_batch_001",
+            "floor_id": 1,
+            "track_id": f"track_batch_{idx}",
+            "vehicle_type": "car",
+            "direction": "entry",
+            "confidence": 0.9,
+            "timestamp": base_ts,
+        }
+        for idx in range(3)
+    ]
+    events.append({**events[0], "direction": "exit", "track_id": "track_batch_exit"})
+
+    outcomes = EventOperations.record_events_batch(events)
+
+    assert [outcome["status"] for outcome in outcomes] == ["recorded", "floor_full", "floor_full", "recorded"]
+    assert outcomes[0]["current_vehicles"] == 2
+    assert outcomes[3]["current_vehicles"] == 1
+
+    replay = EventOperations.record_events_batch(events[:1])
+    assert replay[0]["status"] == "duplicate"
+    assert replay[0]["event"].id == outcomes[0]["event"].id
+    assert replay[0]["current_vehicles"] == 1
+
+    # uq_event_idempotency ignores floor_id: the same sighting on two floors is reported, not a 500.
+    clash = {**events[0], "track_id": "track_batch_clash", "timestamp": base_ts + timedelta(minutes=1)}
+    outcomes = EventOperations.record_events_batch([clash, {**clash, "floor_id": 2}])
+    assert [outcome["status"] for outcome in outcomes] == ["recorded", "conflict"]
+    assert outcomes[1]["total_slots"] is not None
+
+
+def test_event_lock_table_and_idempotency_cache_stay_bounded_under_real_ingestion(app_module, monkeypatch):
+    from app.core import database_ops, idempotency
+    from app.core.config import get_settings
+    from app.core.database_ops import EventOperations
+    from app.core.idempotency import IdempotencyCache
+
+    clock = [1000.0]
+    monkeypatch.setattr(idempotency, "monotonic", lambda: clock[0])
+    cache = IdempotencyCache(max_entries=200, ttl_seconds=60)
+    monkeypatch.setattr(database_ops, "idempotency_cache", cache)
+    for floor_id in (1, 2, 3):
+        _reset_floor_state(app_module, floor_id, total_slots=100000, current_vehicles=0)
+
+    base_ts = datetime.utcnow()
+    keys_seen = 0
+    for start in range(0, 3000, 500):
+        batch = [
+            {
+                "camera_id": f"cam_bound_{idx % 16}",
+                "floor_id": 1 + idx % 3,
+                "track_id": f"track_bound_{idx}",
+                "vehicle_type": "car",
+                "direction": "entry",
+                "confidence": 0.9,
+                "timestamp": base_ts + timedelta(milliseconds=idx),
+            }
+            for idx in range(start, start + 500)
+        ]
+        outcomes = EventOperations.record_events_batch(batch)
+        assert all(outcome["status"] == "recorded" for outcome in outcomes)
+        keys_seen += len(batch)
+        assert cache.stats()["size"] <= cache.max_entries
+        clock[0] += 1
+
+    _, _, is_duplicate = EventOperations.record_event(
+        camera_id="cam_bound_single",
+        floor_id=1,
+        track_id="track_bound_single",
+        vehicle_type="car",
+        direction="entry",
+        timestamp=base_ts + timedelta(seconds=10),
+    )
+    assert not is_duplicate
+    keys_seen += 1
+
+    # Far more keys than stripes went through the striped lock table without growing it.
+    assert keys_seen > get_settings().event_lock_stripes
+    assert len(EventOperations._event_locks) == get_settings().event_lock_stripes
+    stats = cache.stats()
+    assert stats["size"] == cache.max_entries
+    assert stats["evictions"] == keys_seen - cache.max_entries
+
+    # Entries older than the TTL are evicted on the next write.
+    clock[0] += 61
+    EventOperations.record_event(
+        camera_id="cam_bound_single",
+        floor_id=1,
+        track_id="track_bound_after_ttl",
+        vehicle_type="car",
+        direction="entry",
+        timestamp=base_ts + timedelta(seconds=20),
+    )
+    assert cache.stats()["size"] == 1
+
+
+def test_rollups_track_counts_and_occupancy_and_backfill_is_idempotent(app_module, monkeypatch):
+    from app.core.database_ops import EventOperations, RollupOperations
+
+    _reset_floor_state(app_module, 2, total_slots=50, current_vehicles=10)
+    minute = datetime.utcnow().replace(second=1, microsecond=0)
+
+    def event(track_id, direction):
+        return {
+            "camera_id": "cam_rollup_001",
+            "floor_id": 2,
+            "track_id": track_id,
+            "vehicle_type": "car",
+            "direction": direction,
+            "confidence": 0.9,
+            "timestamp": minute,
+        }
+
+    EventOperations.record_event(**event("track_rollup_1", "entry"))
+    EventOperations.record_events_batch(
+        [event("track_rollup_2", "entry"), event("track_rollup_3", "exit"), event("track_rollup_3", "exit")]
+    )
+
+    points = RollupOperations.get_occupancy_series(granularity="minute", hours=1, floor_id=2)
+    assert len(points) == 1
+    point = points[0]
+    assert point.bucket_start == minute.replace(second=0)
+    assert (point.entries, point.exits) == (2, 1)
+    assert (point.occupancy_min, point.occupancy_max, point.occupancy_end) == (11, 12, 11)
+
+    hourly = RollupOperations.get_occupancy_series(granularity="hour", hours=1, floor_id=2)
+    assert [(item.entries, item.exits) for item in hourly] == [(2, 1)]
+
+    RollupOperations.backfill_rollups(hours=1)
+    again = RollupOperations.get_occupancy_series(granularity="minute", hours=1, floor_id=2)
+    assert [
+        (item.entries, item.exits, item.occupancy_end) for item in again if item.bucket_start == point.bucket_start
+    ] == [(2, 1, 11)]
+
+    # A late event for that minute, ingested once the minute is over, adds to its counts but
+    # must not stamp today's floor occupancy onto the historical bucket.
+    from app.core import rollups
+
+    class _Later(datetime):
+        @classmethod
+        def utcnow(cls):
+            return minute + timedelta(minutes=2)
+
+    monkeypatch.setattr(rollups, "datetime", _Later)
+    EventOperations.record_events_batch([event("track_rollup_late", "entry")])
+    late = RollupOperations.get_occupancy_series(granularity="minute", hours=1, floor_id=2)
+    assert [
+        (item.entries, item.occupancy_min, item.occupancy_max, item.occupancy_end)
+        for item in late if item.bucket_start == point.bucket_start
+    ] == [(3, 11, 12, 11)]
+
+
+def test_cleanup_old_events_deletes_in_chunks(app_module):
+    from datetime import timedelta
+
+    from app.core.database import SessionLocal
+    from app.core.database_ops import EventOperations
+    from app.models.event import Direction, Event, VehicleType
+
+    old = datetime.utcnow() - timedelta(days=90)
+    session = SessionLocal()
+    try:
+        session.add_all(
+            Event(
+                camera_id="cam_retention_001",
+                floor_id=1,
+                track_id=f"track_retention_{idx}",
+                vehicle_type=VehicleType.car,
+                direction=Direction.entry,
+                confidence=0.9,
+                timestamp=old + timedelta(seconds=idx),
+            )
+            for idx in range(25)
+        )
+        session.commit()
+        remaining_before = session.query(Event).filter(Event.timestamp >= old + timedelta(days=30)).count()
+    finally:
+        session.close()
+
+    assert EventOperations.cleanup_old_events(days=60, chunk_size=10) == 25
+
+    session = SessionLocal()
+    try:
+        assert session.query(Event).filter(Event.camera_id == "cam_retention_001").count() == 0
+        assert session.query(Event).count() == remaining_before
+    finally:
+        session.close()
+
+
+def test_ensure_indexes_adds_model_indexes_to_existing_tables(app_module):
+    from sqlalchemy import inspect, text
+
+    from app.core.migrations import ensure_indexes
+
+    engine = app_module.engine
+    # A database created before the keyset pagination index existed.
+    with engine.begin() as connection:
+        connection.execute(text("DROP INDEX ix_event_timestamp_id"))
+
+    assert ensure_indexes() == ["ix_event_timestamp_id"]
+    assert "ix_event_timestamp_id" in {index["name"] for index in inspect(engine).get_indexes("events")}
+    assert ensure_indexes() == []
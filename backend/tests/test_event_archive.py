@@ -0,0 +1,154 @@
+from datetime import datetime, timedelta
+
+
+def _insert_events(count: int, start: datetime, camera_id: str, floor_id: int = 1):
+    from app.core.database import SessionLocal
+    from app.models.event import Direction, Event, VehicleType
+
+    session = SessionLocal()
+    try:
+        session.add_all(
+            Event(
+                camera_id=camera_id,
+                floor_id=floor_id,
+                track_id=f"{camera_id}_track_{idx}",
+                vehicle_type=VehicleType.bus if idx % 5 == 0 else VehicleType.car,
+                direction=Direction.entry if idx % 2 == 0 else Direction.exit,
+                confidence=0.5 + idx / (2 * count),
+                timestamp=start + timedelta(minutes=idx),
+            )
+            for idx in range(count)
+        )
+        session.commit()
+    finally:
+        session.close()
+
+
+def test_segment_round_trip_and_time_range_slicing(app_module):
+    from app.core.archive import decode_segment, encode_segment
+    from app.core.database import SessionLocal
+    from app.models.event import Event
+
+    start = datetime(2024, 3, 1, 8, 0, 0, 123456)
+    _insert_events(200, start, "cam_archive_codec")
+    session = SessionLocal()
+    try:
+        rows = session.query(Event).filter(Event.camera_id == "cam_archive_codec").order_by(Event.timestamp, Event.id).all()
+    finally:
+        session.close()
+
+    data = encode_segment(rows)
+    decoded = decode_segment(data)
+    assert [(e.id, e.track_id, e.vehicle_type, e.direction, e.timestamp, e.created_at) for e in decoded] == [
+        (e.id, e.track_id, e.vehicle_type, e.direction, e.timestamp, e.created_at) for e in rows
+    ]
+    assert [e.confidence for e in decoded] == [e.confidence for e in rows]
+
+    window = decode_segment(data, start + timedelta(minutes=10), start + timedelta(minutes=19))
+    assert [e.id for e in window] == [e.id for e in rows[10:20]]
+    assert decode_segment(data, datetime(2025, 1, 1), datetime(2025, 2, 1)) == []
+
+
+def test_archive_moves_cold_events_and_history_fans_out(client, auth_headers, app_module):
+    from app.core.archive import event_archive
+    from app.core.database import SessionLocal
+    from app.core.database_ops import EventOperations
+    from app.models.event import Event
+
+    cold_start = datetime.utcnow() - timedelta(days=120)
+    _insert_events(30, cold_start, "cam_archive_cold", floor_id=2)
+
+    assert EventOperations.archive_old_events(days=90, segment_rows=12) == 30
+    assert [segment["count"] for segment in event_archive.segments()] == [12, 12, 6]
+    session = SessionLocal()
+    try:
+        assert session.query(Event).filter(Event.camera_id == "cam_archive_cold").count() == 0
+    finally:
+        session.close()
+
+    recent = {
+        "camera_id": "cam_archive_hot",
+        "floor_id": 2,
+        "track_id": "track_archive_hot",
+        "vehicle_type": "car",
+        "direction": "entry",
+        "confidence": 0.9,
+    }
+    assert client.post("/event", json=recent, headers=auth_headers).status_code == 200
+
+    response = client.get(
+        "/events/history",
+        params={"start": (cold_start - timedelta(minutes=1)).isoformat(), "floor_id": 2, "limit": 1000},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    body = response.json()
+    cameras = [event["camera_id"] for event in body["events"]]
+    assert cameras.count("cam_archive_cold") == 30
+    assert "cam_archive_hot" in cameras
+    assert body["sources"]["archive"] == 30
+    timestamps = [event["timestamp"] for event in body["events"]]
+    assert timestamps == sorted(timestamps, reverse=True)
+
+    window = client.get(
+        "/events/history",
+        params={
+            "start": cold_start.isoformat(),
+            "end": (cold_start + timedelta(minutes=9)).isoformat(),
+            "direction": "entry",
+            "limit": 3,
+        },
+        headers=auth_headers,
+    ).json()
+    assert [event["track_id"] for event in window["events"]] == [
+        "cam_archive_cold_track_8", "cam_archive_cold_track_6", "cam_archive_cold_track_4"
+    ]
+
+    invalid = client.get(
+        "/events/history",
+        params={"start": datetime.utcnow().isoformat(), "end": cold_start.isoformat()},
+        headers=auth_headers,
+    )
+    assert invalid.status_code == 400
+
+
+def _write_segments(directory: str, worker: int, count: int) -> None:
+    from types import SimpleNamespace
+
+    from app.core.archive import EventArchive
+
+    archive = EventArchive(directory)
+    for idx in range(count):
+        timestamp = datetime(2024, 1, 1) + timedelta(minutes=worker * 100 + idx)
+        event = SimpleNamespace(
+            id=worker * 1000 + idx, camera_id="cam", floor_id=1, track_id=f"track_{worker}_{idx}",
+            vehicle_type="car", direction="entry", confidence=0.9, timestamp=timestamp, created_at=timestamp,
+        )
+        archive.write_segment([event])
+
+
+def test_archive_index_and_runs_are_serialized_across_processes(app_module, tmp_path):
+    import multiprocessing
+
+    from app.core.archive import EventArchive
+    from app.core.database_ops import EventOperations
+    from app.core import database_ops
+
+    # Separate processes each holding their own EventArchive must not lose index entries.
+    directory = (tmp_path / "shared_archive").as_posix()
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_write_segments, args=(directory, worker, 15)) for worker in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(30)
+        assert process.exitcode == 0
+    assert len(EventArchive(directory).segments()) == 60
+
+    # While another worker is archiving, a run leaves the rows alone instead of racing it.
+    _insert_events(5, datetime.utcnow() - timedelta(days=120), "cam_archive_busy")
+    other_worker = EventArchive(database_ops.event_archive.directory.as_posix())
+    with other_worker.archiver() as acquired:
+        assert acquired
+        assert EventOperations.archive_old_events(days=90) == 0
+    assert EventOperations.archive_old_events(days=90) == 5
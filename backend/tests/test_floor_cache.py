@@ -0,0 +1,172 @@
+from sqlalchemy import event, text
+
+
+def _capture_statements(engine):
+    statements = []
+
+    def before_cursor_execute(_conn, _cursor, statement, *_args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    return statements, lambda: event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def test_floor_reads_are_served_from_cache_without_queries(client, app_module, auth_headers):
+    client.get("/floors", headers=auth_headers)
+    statements, stop = _capture_statements(app_module.engine)
+    try:
+        floors = client.get("/floors", headers=auth_headers)
+        floor = client.get("/floors/1", headers=auth_headers)
+        recommend = client.get("/recommend", headers=auth_headers)
+    finally:
+        stop()
+
+    assert floors.status_code == 200
+    assert floor.status_code == 200
+    assert recommend.status_code == 200
+    assert not [statement for statement in statements if "floors" in statement.lower()]
+
+
+def test_record_event_writes_through_and_bumps_version(client, app_module, auth_headers):
+    from app.core.floor_cache import floor_cache
+
+    before = client.get("/floors/1", headers=auth_headers).json()["current_vehicles"]
+    version = floor_cache.version
+
+    response = client.post(
+        "/event",
+        json={
+            "camera_id": "cam_cache_001",
+            "floor_id": 1,
+            "track_id": "track_cache_001",
+            "vehicle_type": "car",
+            "direction": "entry",
+            "confidence": 0.9,
+        },
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 200
+    assert floor_cache.version > version
+    assert floor_cache.get(1).version == floor_cache.version
+    assert client.get("/floors/1", headers=auth_headers).json()["current_vehicles"] == before + 1
+
+
+def test_later_commit_with_earlier_updated_at_still_reaches_the_cache(client, app_module, auth_headers):
+    from dataclasses import replace
+    from datetime import timedelta
+
+    from app.core.floor_cache import floor_cache
+
+    before = client.get("/floors/1", headers=auth_headers).json()["current_vehicles"]
+    # updated_at is stamped client-side before commit, so a transaction that committed
+    # earlier can carry a later timestamp than the next one.
+    cached = floor_cache.get(1)
+    floor_cache._floors[1] = replace(cached, updated_at=cached.updated_at + timedelta(minutes=5))
+
+    for path in ("single", "batch"):
+        payload = {
+            "camera_id": "cam_cache_order",
+            "floor_id": 1,
+            "track_id": f"track_cache_order_{path}",
+            "vehicle_type": "car",
+            "direction": "entry",
+            "confidence": 0.9,
+        }
+        if path == "single":
+            assert client.post("/event", json=payload, headers=auth_headers).status_code == 200
+        else:
+            assert client.post("/events/batch", json={"events": [payload]}, headers=auth_headers).status_code == 200
+
+    assert floor_cache.get(1).current_vehicles == before + 2
+    assert client.get("/floors/1", headers=auth_headers).json()["current_vehicles"] == before + 2
+
+
+def test_reconcile_corrects_writes_made_outside_this_process(client, app_module, auth_headers):
+    from app.core.floor_cache import floor_cache
+
+    client.get("/floors", headers=auth_headers)
+    with app_module.engine.begin() as connection:
+        connection.execute(text("UPDATE floors SET current_vehicles = 0, total_slots = 77 WHERE id = 1"))
+
+    assert floor_cache.get(1).total_slots != 77
+    version = floor_cache.version
+
+    assert floor_cache.reconcile() == 1
+    assert floor_cache.version == version + 1
+    assert client.get("/floors/1", headers=auth_headers).json()["total_slots"] == 77
+    assert floor_cache.reconcile() == 0
+
+
+def test_reconcile_never_applies_rows_loaded_before_a_concurrent_write(client, app_module, auth_headers, monkeypatch):
+    import threading
+
+    from app.core.database_ops import EventOperations
+    from app.core.floor_cache import floor_cache
+
+    before = client.get("/floors/1", headers=auth_headers).json()["current_vehicles"]
+    seen = []
+
+    def record_floor_one(floor_id, snapshot, _version):
+        if floor_id == 1:
+            seen.append(snapshot.current_vehicles)
+
+    floor_cache.add_listener(record_floor_one)
+    load = floor_cache._loader
+
+    def load_then_write():
+        rows = load()
+        # An ingestion arriving between the load and the apply must wait for the reconcile.
+        writer = threading.Thread(
+            target=EventOperations.record_event,
+            args=("cam_reconcile", 1, "track_reconcile", "car", "entry"),
+        )
+        writer.start()
+        writer.join(timeout=1)
+        load_then_write.writer = writer
+        return rows
+
+    monkeypatch.setattr(floor_cache, "_loader", load_then_write)
+    floor_cache.reconcile()
+    load_then_write.writer.join(timeout=10)
+
+    assert floor_cache.get(1).current_vehicles == before + 1
+    assert seen == [before + 1]
+
+
+def test_floor_endpoints_answer_conditional_gets_from_the_cache_version(client, auth_headers, monkeypatch):
+    from app.core.database_ops import FloorOperations
+
+    first = client.get("/floors", headers=auth_headers)
+    etag = first.headers["etag"]
+    floor_one = client.get("/floors/1", headers=auth_headers).headers["etag"]
+    recommend = client.get("/recommend", headers=auth_headers).headers["etag"]
+
+    def unexpected(*_args, **_kwargs):
+        raise AssertionError("conditional hit must not read floors")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(FloorOperations, "get_all_active_floors", unexpected)
+        patch.setattr(FloorOperations, "get_ranked_floors", unexpected)
+        cached = client.get("/floors", headers={**auth_headers, "If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["etag"] == etag
+        assert client.get("/recommend", headers={**auth_headers, "If-None-Match": f'W/{recommend}'}).status_code == 304
+
+    payload = {
+        "camera_id": "cam_etag_001",
+        "floor_id": 2,
+        "track_id": "track_etag_001",
+        "vehicle_type": "car",
+        "direction": "entry",
+        "confidence": 0.9,
+    }
+    assert client.post("/event", json=payload, headers=auth_headers).status_code == 200
+
+    changed = client.get("/floors", headers={**auth_headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert client.get("/recommend", headers={**auth_headers, "If-None-Match": recommend}).status_code == 200
+    # Floor 1 did not change, so its own ETag still matches.
+    assert client.get("/floors/1", headers={**auth_headers, "If-None-Match": floor_one}).status_code == 304
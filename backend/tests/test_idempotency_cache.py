@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+WINDOW = timedelta(seconds=5)
+
+
+def _event(timestamp: datetime, event_id: int = 1):
+    return SimpleNamespace(id=event_id, timestamp=timestamp)
+
+
+def test_cache_verdicts_cold_new_and_duplicate(app_module):
+    from app.core.idempotency import IdempotencyCache, Verdict
+
+    cache = IdempotencyCache(max_entries=10, ttl_seconds=300, trust_misses=True)
+    key = ("cam_idem_001", "track_idem_001", 1, "entry")
+    now = datetime.utcnow()
+
+    # Windows reaching back before the cache started tracking must go to the database.
+    assert cache.lookup(key, now, WINDOW)[0] == Verdict.unknown
+
+    later = now + timedelta(seconds=30)
+    assert cache.lookup(key, later, WINDOW)[0] == Verdict.new
+
+    cache.record(key, _event(later, event_id=7))
+    verdict, event = cache.lookup(key, later + timedelta(seconds=2), WINDOW)
+    assert verdict == Verdict.duplicate
+    assert event.id == 7
+    assert cache.lookup(key, later + timedelta(seconds=20), WINDOW)[0] == Verdict.new
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["fallbacks"]) == (1, 2, 1)
+
+
+def test_eviction_is_bounded_and_never_reports_false_new(app_module):
+    from app.core.idempotency import IdempotencyCache, Verdict
+
+    cache = IdempotencyCache(max_entries=100, ttl_seconds=300, trust_misses=True)
+    base = datetime.utcnow() + timedelta(minutes=1)
+
+    for idx in range(1000):
+        cache.record(("cam", f"track_{idx}", 1, "entry"), _event(base + timedelta(milliseconds=idx), idx))
+
+    assert cache.stats()["size"] == 100
+    assert cache.stats()["evictions"] == 900
+    evicted_key = ("cam", "track_0", 1, "entry")
+    assert cache.lookup(evicted_key, base, WINDOW)[0] == Verdict.unknown
+    assert cache.lookup(("cam", "track_999", 1, "entry"), base + timedelta(milliseconds=999), WINDOW)[0] == Verdict.duplicate
+
+
+def test_retry_storm_is_answered_from_cache(client, app_module, auth_headers, monkeypatch):
+    from app.core.idempotency import idempotency_cache
+
+    # Pretend a single-worker process has been up long enough for the cache to be warm.
+    monkeypatch.setattr(idempotency_cache, "trust_misses", True)
+    monkeypatch.setattr(idempotency_cache, "_complete_since", datetime.utcnow() - timedelta(hours=1))
+    payload = {
+        "camera_id": "cam_idem_storm_001",
+        "floor_id": 1,
+        "track_id": "track_idem_storm_001",
+        "vehicle_type": "car",
+        "direction": "entry",
+        "confidence": 0.9,
+    }
+    before = idempotency_cache.stats()
+
+    responses = [client.post("/event", json=payload, headers=auth_headers) for _ in range(10)]
+
+    assert all(response.status_code == 200 for response in responses)
+    assert len({response.json()["event_id"] for response in responses}) == 1
+    after = idempotency_cache.stats()
+    assert after["hits"] - before["hits"] == 9
+    assert after["misses"] - before["misses"] == 1
+    assert after["fallbacks"] == before["fallbacks"]
+
+    metrics = client.get("/monitoring/metrics", headers=auth_headers).json()
+    assert metrics["idempotency_cache"]["hits"] == after["hits"]
+
+
+def test_misses_are_only_trusted_for_a_single_worker(app_module, monkeypatch):
+    from app.core import idempotency
+    from app.core.idempotency import IdempotencyCache, Verdict
+
+    assert idempotency.idempotency_cache.trust_misses is False
+    cache = IdempotencyCache(max_entries=10, ttl_seconds=300)
+    later = datetime.utcnow() + timedelta(seconds=30)
+    assert cache.lookup(("cam", "track", 1, "entry"), later, WINDOW)[0] == Verdict.unknown
+
+    monkeypatch.setattr(idempotency.settings, "idempotency_cache_trust_misses", True)
+    assert idempotency.trust_misses_enabled() is True
+    monkeypatch.setattr(idempotency.settings, "web_concurrency", 4)
+    assert idempotency.trust_misses_enabled() is False
+    monkeypatch.setattr(idempotency.settings, "web_concurrency", 1)
+    monkeypatch.setattr(idempotency.settings, "shared_state_path", "/tmp/smartpark_shared.db")
+    assert idempotency.trust_misses_enabled() is False
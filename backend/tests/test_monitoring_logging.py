@@ -49,3 +49,153 @@ def test_monitoring_alerts_include_error_rate_and_low_availability(client, app_m
     alert_codes = {item["code"] for item in payload["alerts"]}
     assert "HIGH_ERROR_RATE" in alert_codes
     assert "LOW_PARKING_AVAILABILITY" in alert_codes
+
+
+def test_latency_histograms_report_percentiles_and_tail_alerts(app_module, monkeypatch):
+    from app.core import monitoring as monitoring_module
+    from app.core.monitoring import LatencyHistogram, MonitoringState, MonitoringThresholds
+
+    histogram = LatencyHistogram()
+    for ms in range(1, 1001):
+        histogram.record(float(ms))
+    for fraction, exact in ((0.50, 500), (0.95, 950), (0.99, 990)):
+        assert exact <= histogram.percentile(fraction) <= exact * 1.1
+    assert histogram.summary()["max"] == 1000
+
+    clock = [1_000_000.0]
+    monkeypatch.setattr(monitoring_module, "time", lambda: clock[0])
+    thresholds = MonitoringThresholds(error_rate_threshold=0.5, latency_ms_threshold=400, low_availability_threshold=5)
+    monitoring = MonitoringState(thresholds, alert_window_seconds=60)
+    # 94 fast requests and 6 slow ones: the mean stays low but p95 is slow.
+    for idx in range(100):
+        monitoring.record_request(method="GET", route="/floors", status_code=200, duration_ms=900.0 if idx < 6 else 5.0)
+
+    snapshot = monitoring.snapshot()
+    assert snapshot["recent_window_seconds"] == 60
+    assert snapshot["recent_avg_latency_ms"] < 400
+    assert snapshot["recent_latency_ms"]["p50"] <= 5.5
+    assert snapshot["recent_latency_ms"]["p95"] >= 900
+    assert snapshot["route_latency_ms"]["GET /floors"]["count"] == 100
+    assert [alert["code"] for alert in monitoring.evaluate_alerts()] == ["HIGH_LATENCY"]
+
+    thresholds.latency_statistic = "mean"
+    assert monitoring.evaluate_alerts() == []
+    thresholds.latency_statistic = "p95"
+
+    # Two minutes later the slow requests have left the 1m window but not the 5m/15m ones.
+    clock[0] += 120
+    for _ in range(100):
+        monitoring.record_request(method="GET", route="/floors", status_code=200, duration_ms=5.0)
+    windows = monitoring.windows()
+    assert windows["1m"]["requests"] == 100
+    assert windows["1m"]["latency_ms"]["max"] == 5.0
+    assert windows["5m"]["requests"] == windows["15m"]["requests"] == 200
+    assert windows["5m"]["latency_ms"]["max"] == 900
+    assert monitoring.evaluate_alerts() == []
+    assert monitoring.snapshot()["route_latency_ms"]["GET /floors"]["max"] == 900
+
+    clock[0] += 900
+    assert monitoring.windows()["15m"]["requests"] == 0
+
+
+def test_route_metrics_keyed_by_template_with_bounded_keys(client, app_module, auth_headers):
+    from app.core.monitoring import MonitoringState, MonitoringThresholds
+
+    client.get("/floors/1", headers=auth_headers)
+    client.get("/floors/2", headers=auth_headers)
+    client.get("/floors/3")  # rejected before routing, still keyed by template
+    for idx in range(5):
+        client.get(f"/wp-admin/probe-{idx}.php", headers=auth_headers)
+
+    top_routes = dict(client.get("/monitoring/metrics", headers=auth_headers).json()["top_routes"])
+    assert top_routes["GET /floors/{floor_id}"] == 3
+    assert top_routes["<unmatched>"] == 5
+    assert not any("wp-admin" in route or route.endswith("/1") for route in top_routes)
+
+    thresholds = MonitoringThresholds(error_rate_threshold=0.5, latency_ms_threshold=400, low_availability_threshold=5)
+    monitoring = MonitoringState(thresholds, max_routes=3)
+    for idx in range(50):
+        monitoring.record_request(method="GET", route=f"/generated/{idx}", status_code=200, duration_ms=1.0)
+    snapshot = monitoring.snapshot()
+    assert len(snapshot["route_latency_ms"]) == 4
+    assert dict(snapshot["top_routes"])["<other>"] == 47
+
+
+def test_queue_logging_batches_writes_and_samples_info(app_module):
+    import io
+    import logging
+    import queue
+    import threading
+
+    from app.core.logging import BatchingQueueListener, DroppingQueueHandler, SamplingFilter
+
+    class CountingStream(io.StringIO):
+        writes = 0
+
+        def write(self, text):
+            CountingStream.writes += 1
+            return super().write(text)
+
+    stream = CountingStream()
+    target = logging.StreamHandler(stream)
+    target.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+    handler = DroppingQueueHandler(queue.Queue(maxsize=1000))
+    listener = BatchingQueueListener(handler.queue, [target], batch_size=500)
+
+    bench_logger = logging.getLogger("tests.queue_logging")
+    bench_logger.propagate = False
+    bench_logger.setLevel(logging.INFO)
+    bench_logger.addHandler(handler)
+    sampler = SamplingFilter(0.25)
+    bench_logger.addFilter(sampler)
+    try:
+        # Queue everything before the writer starts so it drains in one batch.
+        for idx in range(400):
+            bench_logger.info("request %d", idx)
+        bench_logger.warning("always kept")
+        listener.start()
+        listener.stop()
+    finally:
+        bench_logger.removeHandler(handler)
+
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 101
+    assert lines[0] == "INFO request 3"
+    assert lines[-1] == "WARNING always kept"
+    assert sampler.dropped == 300
+    assert CountingStream.writes == 1
+
+    full = DroppingQueueHandler(queue.Queue(maxsize=2))
+    for idx in range(5):
+        full.handle(logging.LogRecord("x", logging.INFO, __file__, 1, "msg %d", (idx,), None))
+    assert full.dropped == 3
+
+    # A warning waits for the writer to make room instead of being dropped.
+    drained = threading.Timer(0.1, full.queue.get_nowait)
+    drained.start()
+    full.handle(logging.LogRecord("x", logging.WARNING, __file__, 1, "kept", (), None))
+    drained.join()
+    assert full.dropped == 3
+    assert [record.getMessage() for record in list(full.queue.queue)] == ["msg 1", "kept"]
+
+
+def test_dropped_log_records_are_exported(client, auth_headers, monkeypatch):
+    import logging
+
+    from app.core.logging import ACCESS_LOGGER_NAME, DroppingQueueHandler, SamplingFilter
+
+    queue_handler = next(h for h in logging.getLogger().handlers if isinstance(h, DroppingQueueHandler))
+    monkeypatch.setattr(queue_handler, "dropped", 4)
+    sampler = SamplingFilter(0.5)
+    sampler.dropped = 7
+    access = logging.getLogger(ACCESS_LOGGER_NAME)
+    access.addFilter(sampler)
+    try:
+        metrics = client.get("/metrics", headers=auth_headers).text
+        snapshot = client.get("/monitoring/metrics", headers=auth_headers).json()
+    finally:
+        access.removeFilter(sampler)
+
+    assert 'smartpark_log_records_dropped_total{reason="queue_full"} 4' in metrics
+    assert snapshot["logging"]["dropped_records"]["queue_full"] == 4
+    assert snapshot["logging"]["dropped_records"]["sampled"] >= 7
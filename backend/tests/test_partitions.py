@@ -0,0 +1,129 @@
+from datetime import datetime
+
+import pytest
+
+
+class _Result:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def scalar(self):
+        return self._rows[0][0]
+
+
+class _RecordingConnection:
+    """Stands in for a PostgreSQL connection: answers catalog queries, records DDL."""
+
+    def __init__(self, partitions):
+        self.partitions = list(partitions)
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append(sql)
+        if "pg_inherits" in sql:
+            return _Result([(name,) for name in self.partitions])
+        if "reltuples" in sql:
+            return _Result([(10.0,)])
+        if sql == "SHOW server_version_num":
+            return _Result([(self.server_version_num,)])
+        return _Result([])
+
+
+class _RecordingEngine(_RecordingConnection):
+    """Engine-shaped variant: records each connect() with its isolation level."""
+
+    def __init__(self, partitions, server_version_num="160002", fail_on=None):
+        super().__init__(partitions)
+        self.server_version_num = server_version_num
+        self.fail_on = fail_on
+
+    def execute(self, statement, params=None):
+        result = super().execute(statement, params)
+        if self.fail_on and str(statement).startswith(self.fail_on):
+            raise RuntimeError("connection lost")
+        return result
+
+    def connect(self):
+        return self
+
+    def execution_options(self, **options):
+        self.statements.append(f"-- connect {options.get('isolation_level', 'default')}")
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.statements.append("-- close")
+        return False
+
+
+def test_partition_names_round_trip_to_their_ranges(app_module):
+    from app.core.partitions import next_period, partition_name, partition_range, period_start
+
+    december = period_start(datetime(2026, 12, 17, 8, 30), "monthly")
+    assert partition_name(december, "monthly") == "events_p2026_12"
+    assert partition_range("events_p2026_12") == (datetime(2026, 12, 1), datetime(2027, 1, 1))
+    assert next_period(december, "monthly") == datetime(2027, 1, 1)
+
+    day = period_start(datetime(2026, 2, 28, 23, 59), "daily")
+    assert partition_name(day, "daily") == "events_p2026_02_28"
+    assert partition_range("events_p2026_02_28") == (datetime(2026, 2, 28), datetime(2026, 3, 1))
+    assert partition_range("events_default") is None
+
+
+def test_ensure_partitions_creates_missing_future_periods(app_module):
+    from app.core.partitions import ensure_partitions
+
+    connection = _RecordingConnection(["events_default", "events_p2026_10"])
+    created = ensure_partitions(connection, "monthly", now=datetime(2026, 10, 17), ahead=2)
+
+    assert created == ["events_p2026_11", "events_p2026_12"]
+    assert any("FROM ('2026-12-01 00:00:00') TO ('2027-01-01 00:00:00')" in sql for sql in connection.statements)
+
+
+def test_drop_expired_partitions_only_drops_whole_periods_before_cutoff(app_module):
+    from app.core.partitions import drop_expired_partitions
+
+    engine = _RecordingEngine(["events_default", "events_p2026_07", "events_p2026_08", "events_p2026_09"])
+    removed = drop_expired_partitions(engine, cutoff=datetime(2026, 9, 15))
+
+    assert removed == 20
+    ddl = [sql for sql in engine.statements if sql.startswith(("ALTER", "DROP", "SET", "RESET", "--"))]
+    # Autocommit throughout, so each DETACH's lock on events ends with its own statement;
+    # no scan of the detached partition while it is held.
+    assert ddl == [
+        "-- connect AUTOCOMMIT",
+        "SET lock_timeout = '5s'",
+        "ALTER TABLE events DETACH PARTITION events_p2026_07",
+        "DROP TABLE events_p2026_07",
+        "ALTER TABLE events DETACH PARTITION events_p2026_08",
+        "DROP TABLE events_p2026_08",
+        "RESET lock_timeout",
+        "-- close",
+    ]
+    assert not any("count(*)" in sql or "events_p2026_09" in sql for sql in engine.statements)
+
+    # The session-level lock_timeout is reset before the connection returns to the pool,
+    # even when a step fails.
+    failing = _RecordingEngine(["events_p2026_07"], server_version_num="130011", fail_on="DROP TABLE")
+    with pytest.raises(RuntimeError):
+        drop_expired_partitions(failing, cutoff=datetime(2026, 9, 15))
+    assert failing.statements[-2:] == ["RESET lock_timeout", "-- close"]
+
+
+def test_drop_expired_partitions_detaches_concurrently_without_a_default_partition(app_module):
+    from app.core.partitions import drop_expired_partitions
+
+    engine = _RecordingEngine(["events_p2026_08", "events_p2026_10"])
+    drop_expired_partitions(engine, cutoff=datetime(2026, 9, 15))
+    assert "ALTER TABLE events DETACH PARTITION events_p2026_08 CONCURRENTLY" in engine.statements
+    assert not any("lock_timeout" in sql for sql in engine.statements)
+
+    old_server = _RecordingEngine(["events_p2026_08", "events_p2026_10"], server_version_num="130011")
+    drop_expired_partitions(old_server, cutoff=datetime(2026, 9, 15))
+    assert "ALTER TABLE events DETACH PARTITION events_p2026_08" in old_server.statements
@@ -0,0 +1,48 @@
+def _samples(text: str) -> dict:
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, _, value = line.rpartition(" ")
+            samples[name] = float(value)
+    return samples
+
+
+def test_metrics_endpoint_exposes_prometheus_text(client, auth_headers):
+    event = {
+        "camera_id": "cam_prom_001",
+        "floor_id": 1,
+        "track_id": "track_prom_001",
+        "vehicle_type": "car",
+        "direction": "entry",
+        "confidence": 0.95,
+    }
+    assert client.post("/event", json=event, headers=auth_headers).status_code == 200
+    assert client.post("/event", json=event, headers=auth_headers).status_code == 200
+    batch = {"events": [{**event, "track_id": "track_prom_002"}, {**event, "track_id": "track_prom_003"}]}
+    assert client.post("/events/batch", json=batch, headers=auth_headers).status_code == 200
+    client.get("/floors/2", headers=auth_headers)
+
+    assert client.get("/metrics").status_code == 401
+    response = client.get("/metrics", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    samples = _samples(response.text)
+
+    ingested = 'smartpark_events_ingested_total{floor_id="1",camera_id="cam_prom_001",direction="entry",result="%s"}'
+    assert samples[ingested % "recorded"] == 3
+    assert samples[ingested % "duplicate"] == 1
+
+    assert samples['smartpark_http_requests_total{method="POST",route="/event",status="200"}'] == 2
+    assert samples['smartpark_http_requests_total{method="GET",route="/floors/{floor_id}",status="200"}'] == 1
+    route = 'method="POST",route="/event"'
+    assert samples[f'smartpark_http_request_duration_seconds_bucket{{{route},le="+Inf"}}'] == 2
+    assert samples[f'smartpark_http_request_duration_seconds_count{{{route}}}'] == 2
+    assert samples['smartpark_db_query_duration_seconds_count{operation="insert"}'] >= 2
+
+    floor_vehicles = [value for name, value in samples.items() if name.startswith('smartpark_floor_vehicles{floor_id="1"')]
+    assert floor_vehicles and floor_vehicles[0] >= 3
+    assert "smartpark_idempotency_cache_hits_total" in samples
+
+    # Histogram buckets are cumulative.
+    buckets = [value for name, value in samples.items() if name.startswith(f"smartpark_http_request_duration_seconds_bucket{{{route}")]
+    assert buckets == sorted(buckets)
@@ -0,0 +1,86 @@
+def test_token_bucket_burst_refill_and_retry_after(app_module, monkeypatch):
+    from app.core import security
+    from app.core.security import InMemoryRateLimiter
+
+    clock = [1000.0]
+    monkeypatch.setattr(security, "monotonic", lambda: clock[0])
+
+    limiter = InMemoryRateLimiter(max_requests=3, window_seconds=30)
+    assert [limiter.check("10.0.0.1")[0] for _ in range(3)] == [True, True, True]
+
+    allowed, retry_after = limiter.check("10.0.0.1")
+    assert not allowed
+    assert retry_after == 10
+
+    # Other clients have their own bucket.
+    assert limiter.check("10.0.0.2") == (True, 0)
+
+    # One token refills every window / max_requests seconds.
+    clock[0] += 10
+    assert limiter.check("10.0.0.1") == (True, 0)
+    assert not limiter.check("10.0.0.1")[0]
+
+
+def test_overrides_and_idle_eviction(app_module, monkeypatch):
+    from app.core import security
+    from app.core.security import InMemoryRateLimiter, parse_rate_limit_overrides
+
+    clock = [1000.0]
+    monkeypatch.setattr(security, "monotonic", lambda: clock[0])
+
+    overrides = parse_rate_limit_overrides("camera-key:5, 10.0.0.9:1, broken")
+    assert overrides == {"camera-key": 5, "10.0.0.9": 1}
+
+    limiter = InMemoryRateLimiter(max_requests=2, window_seconds=60, overrides=overrides, shards=4)
+    assert sum(limiter.check("10.0.0.1", budget_key="camera-key")[0] for _ in range(10)) == 5
+    assert sum(limiter.check("10.0.0.9")[0] for _ in range(10)) == 1
+    assert sum(limiter.check(f"10.1.0.{idx}")[0] for idx in range(50)) == 50
+    assert limiter.tracked_clients() == 52
+
+    # Buckets idle for a full window are swept as their shard is next touched.
+    clock[0] += 61
+    for idx in range(50):
+        limiter.check(f"10.2.0.{idx}")
+    assert limiter.tracked_clients() == 50
+
+
+def test_middleware_returns_429_with_retry_after(app_module, client, auth_headers, monkeypatch):
+    # The middleware holds the limiter it was built with, so tighten that instance.
+    monkeypatch.setattr(app_module.rate_limiter, "max_requests", 2)
+    headers = auth_headers
+
+    assert client.get("/floors", headers=headers).status_code == 200
+    assert client.get("/floors", headers=headers).status_code == 200
+    response = client.get("/floors", headers=headers)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) == 30
+    # Public paths are never limited.
+    assert client.get("/health/live").status_code == 200
+
+
+def test_middleware_rejects_unauthenticated_and_records_server_errors(app_module, client, auth_headers):
+    response = client.get("/floors")
+    assert response.status_code == 401
+    assert response.json() == {
+        "success": False,
+        "error": "Authentication Error",
+        "detail": "Invalid or missing API key",
+        "status_code": 401,
+    }
+
+    # CORS preflight carries no API key and must reach CORSMiddleware.
+    preflight = client.options(
+        "/floors", headers={"Origin": "http://example.com", "Access-Control-Request-Method": "GET"}
+    )
+    assert preflight.status_code == 200
+
+    async def boom():
+        raise RuntimeError("boom")
+
+    app_module.app.add_api_route("/boom", boom)
+    assert client.get("/boom", headers=auth_headers).status_code == 500
+
+    snapshot = client.get("/monitoring/metrics", headers=auth_headers).json()
+    assert snapshot["status_counts"]["401"] >= 1
+    assert snapshot["status_counts"]["500"] == 1
+    assert dict(snapshot["top_routes"])["GET /boom"] == 1
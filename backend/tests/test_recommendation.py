@@ -0,0 +1,69 @@
+from datetime import datetime
+
+
+def _snapshot(floor_id: int, *, total_slots: int, current_vehicles: int, is_active: bool = True):
+    from app.core.floor_cache import FloorSnapshot
+
+    now = datetime.utcnow()
+    return FloorSnapshot(
+        id=floor_id,
+        name=f"Floor {floor_id}",
+        description=None,
+        total_slots=total_slots,
+        current_vehicles=current_vehicles,
+        is_active=is_active,
+        created_at=now,
+        updated_at=now,
+    )
+
+
+def _engine(policy: str, floors: list, weights: dict | None = None):
+    from app.core.recommendation import RecommendationEngine
+
+    engine = RecommendationEngine(policy=policy, floor_weights=weights)
+    for floor in floors:
+        engine.on_floor_change(floor.id, floor, 0)
+    return engine
+
+
+def test_ranking_policies_order_floors_differently(app_module):
+    floors = [
+        _snapshot(1, total_slots=100, current_vehicles=60),  # 40 free, 60%
+        _snapshot(2, total_slots=20, current_vehicles=2),  # 18 free, 10%
+        _snapshot(3, total_slots=50, current_vehicles=20),  # 30 free, 40%
+    ]
+
+    assert [f.id for f in _engine("most_free_slots", floors).top(3)] == [1, 3, 2]
+    assert [f.id for f in _engine("lowest_occupancy", floors).top(3)] == [2, 3, 1]
+    weighted = _engine("weighted_preference", floors, weights={2: 3.0, 1: 0.5})
+    assert [f.id for f in weighted.top(3)] == [2, 3, 1]
+
+
+def test_engine_updates_incrementally_and_drops_inactive_floors(app_module):
+    engine = _engine(
+        "most_free_slots",
+        [_snapshot(1, total_slots=50, current_vehicles=10), _snapshot(2, total_slots=50, current_vehicles=20)],
+    )
+    assert engine.top(1)[0].id == 1
+
+    for vehicles in range(11, 40):
+        engine.on_floor_change(1, _snapshot(1, total_slots=50, current_vehicles=vehicles), 0)
+    assert [f.id for f in engine.top(2)] == [2, 1]
+    assert engine.top(2)[1].current_vehicles == 39
+
+    engine.on_floor_change(2, _snapshot(2, total_slots=50, current_vehicles=20, is_active=False), 0)
+    assert [f.id for f in engine.top(5)] == [1]
+    engine.on_floor_change(1, None, 0)
+    assert engine.top(5) == []
+
+
+def test_recommend_endpoint_uses_policy_ranking_for_alternatives(client, auth_headers):
+    from app.core.floor_cache import floor_cache
+
+    response = client.get("/recommend", headers=auth_headers)
+    assert response.status_code == 200
+    payload = response.json()
+
+    ranked = sorted(floor_cache.get_all_active(), key=lambda f: (-f.available_slots, f.occupancy_percentage, f.id))
+    assert payload["recommended_floor"]["id"] == ranked[0].id
+    assert [f["id"] for f in payload["available_alternatives"]] == [f.id for f in ranked[1:4]]
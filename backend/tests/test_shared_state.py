@@ -0,0 +1,161 @@
+import multiprocessing
+import sqlite3
+import threading
+
+import pytest
+
+
+def _bump_counters(path: str, rounds: int) -> None:
+    from app.core.shared_state import SharedStateStore
+
+    store = SharedStateStore(path)
+    for _ in range(rounds):
+        store.increment([("hits:total", 1), ("hits:bytes", 10)])
+    store.close()
+
+
+def test_counters_are_atomic_across_processes(app_module, tmp_path):
+    from app.core.shared_state import SharedStateStore
+
+    path = str(tmp_path / "shared.db")
+    SharedStateStore(path).close()
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_bump_counters, args=(path, 200)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+
+    assert SharedStateStore(path).counters("hits:") == {"total": 800, "bytes": 8000}
+
+
+def test_shared_rate_limit_holds_across_workers(app_module, tmp_path):
+    from app.core.security import SharedRateLimiter
+    from app.core.shared_state import SharedStateStore
+
+    path = str(tmp_path / "shared.db")
+    # One limiter (and connection) per simulated worker, all on the same file.
+    limiters = [SharedRateLimiter(SharedStateStore(path), max_requests=50, window_seconds=3600) for _ in range(4)]
+    allowed = []
+
+    def hammer(limiter):
+        allowed.extend(limiter.check("10.0.0.1")[0] for _ in range(40))
+
+    threads = [threading.Thread(target=hammer, args=(limiter,)) for limiter in limiters]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(allowed) == 50
+    allowed_now, retry_after = limiters[0].check("10.0.0.1")
+    assert not allowed_now and retry_after >= 1
+    assert limiters[1].check("10.0.0.2") == (True, 0)
+    assert limiters[2].tracked_clients() == 2
+
+
+def test_monitoring_aggregates_across_workers(app_module, tmp_path, monkeypatch):
+    from app.core import monitoring as monitoring_module
+    from app.core.monitoring import MonitoringState, MonitoringThresholds
+    from app.core.shared_state import SharedStateStore
+
+    clock = [1_000_000.0]
+    monkeypatch.setattr(monitoring_module, "time", lambda: clock[0])
+    path = str(tmp_path / "shared.db")
+    thresholds = MonitoringThresholds(error_rate_threshold=0.1, latency_ms_threshold=500, low_availability_threshold=5)
+    workers = [MonitoringState(thresholds, shared_store=SharedStateStore(path)) for _ in range(2)]
+
+    for idx in range(30):
+        workers[idx % 2].record_request(
+            method="GET", route="/floors", status_code=500 if idx < 3 else 200, duration_ms=10.0
+        )
+    # Requests are only buffered in process until each worker flushes.
+    assert workers[0].snapshot()["recent_request_count"] == 0
+    for worker in workers:
+        worker.shared_store.flush()
+
+    for worker in workers:
+        snapshot = worker.snapshot()
+        assert snapshot["state_backend"] == "shared"
+        assert snapshot["recent_request_count"] == 30
+        assert snapshot["recent_5xx_count"] == 3
+        assert snapshot["windows"]["1m"]["latency_ms"]["max"] == 10.0
+        assert snapshot["status_counts"] == {"200": 27, "500": 3}
+        assert snapshot["top_routes"] == [("GET /floors", 30)]
+        assert snapshot["route_latency_ms"]["GET /floors"]["count"] == 30
+        assert snapshot["route_latency_ms"]["GET /floors"]["max"] == 10.0
+    assert [alert["code"] for alert in workers[1].evaluate_alerts()] == ["HIGH_ERROR_RATE"]
+
+    # Buckets older than the longest window drop out and are pruned from the file.
+    clock[0] += 901
+    workers[0].record_request(method="GET", route="/health", status_code=200, duration_ms=1.0)
+    workers[0].shared_store.flush()
+    snapshot = workers[1].snapshot()
+    assert snapshot["windows"]["15m"]["requests"] == 1
+    assert snapshot["recent_5xx_count"] == 0
+    assert snapshot["status_counts"] == {"200": 28, "500": 3}
+    assert len(SharedStateStore(path).window_counters(0)) == 1
+
+
+def test_ingestion_counts_shared_and_camera_labels_capped(app_module, tmp_path):
+    from app.core.metrics import IngestionMetrics
+    from app.core.shared_state import SharedStateStore
+
+    path = str(tmp_path / "shared.db")
+    workers = [IngestionMetrics(max_cameras=2, shared_store=SharedStateStore(path)) for _ in range(2)]
+    workers[0].record([(1, "cam|a", "entry", "recorded"), (1, "cam|a", "entry", "recorded")])
+    workers[1].record([(1, "cam|a", "entry", "recorded"), (2, "cam_b", "exit", "duplicate")])
+    workers[1].record([(2, "cam_c", "exit", "recorded")])
+    for worker in workers:
+        worker.shared_store.flush()
+
+    assert workers[0].counts() == {
+        (1, "cam|a", "entry", "recorded"): 3,
+        (2, "cam_b", "exit", "duplicate"): 1,
+        (2, "<other>", "exit", "recorded"): 1,
+    }
+
+
+def test_failed_flush_keeps_metrics_buffered(app_module, tmp_path, monkeypatch):
+    from app.core.shared_state import SharedStateStore
+
+    store = SharedStateStore(str(tmp_path / "shared.db"))
+    store.buffer(counters=[("hits:total", 2)], window_counters=[(5, "requests", 2)])
+
+    def locked():
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(store, "_write", locked)
+    with pytest.raises(sqlite3.OperationalError):
+        store.flush()
+    monkeypatch.undo()
+
+    store.buffer(counters=[("hits:total", 1)])
+    store.flush()
+    assert store.counters("hits:") == {"total": 3}
+    assert store.window_counters(0) == {5: {"requests": 2}}
+
+
+@pytest.fixture()
+def shared_state_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("SHARED_STATE_PATH", (tmp_path / "shared.db").as_posix())
+    monkeypatch.setenv("SHARED_STATE_FLUSH_MS", "60000")
+    monkeypatch.setenv("API_RATE_LIMIT_OVERRIDES", "test-api-key:3")
+    return tmp_path / "shared.db"
+
+
+def test_app_rate_limits_through_shared_store_and_flushes_metrics_on_shutdown(
+    shared_state_env, app_module, auth_headers
+):
+    from fastapi.testclient import TestClient
+
+    from app.core.shared_state import SharedStateStore
+
+    with TestClient(app_module.app) as client:
+        statuses = [client.get("/floors", headers=auth_headers).status_code for _ in range(4)]
+        assert statuses == [200, 200, 200, 429]
+        # Nothing has reached the file yet: metrics wait for the periodic flush.
+        assert SharedStateStore(str(shared_state_env)).counters("status:") == {}
+
+    assert SharedStateStore(str(shared_state_env)).counters("status:") == {"200": 3, "429": 1}
@@ -0,0 +1,161 @@
+import asyncio
+
+
+def _parse(frame: str) -> dict:
+    fields = dict(line.split(": ", 1) for line in frame.strip().splitlines() if not line.startswith(":"))
+    return fields
+
+
+def test_change_event_stream_resumes_from_last_event_id(app_module):
+    from app.core.change_log import ChangeLog
+    from app.core.sse import change_event_stream
+
+    async def scenario():
+        log = ChangeLog(capacity=3)
+        snapshots = []
+
+        async def snapshot():
+            snapshots.append(log.seq)
+            return {"floors": [], "alerts": []}
+
+        async def connected():
+            return False
+
+        stream = change_event_stream(log, snapshot, None, connected, keepalive_seconds=0.05)
+        first = _parse(await stream.__anext__())
+        assert first["event"] == "snapshot"
+
+        pending = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0.01)
+        log.append("floor_delta", {"floor": {"id": 1, "current_vehicles": 3}})
+        delta = _parse(await asyncio.wait_for(pending, 1))
+        assert delta["event"] == "floor_delta"
+        assert delta["id"] == log.cursor(1)
+        assert await stream.__anext__() == ": keepalive\n\n"
+        await stream.aclose()
+
+        log.append("alert_raised", {"code": "HIGH_LATENCY"})
+        resumed = change_event_stream(log, snapshot, delta["id"], connected, keepalive_seconds=0.05)
+        replay = _parse(await resumed.__anext__())
+        assert (replay["event"], replay["id"]) == ("alert_raised", log.cursor(2))
+        await resumed.aclose()
+
+        for idx in range(5):
+            log.append("floor_delta", {"floor": {"id": 2, "current_vehicles": idx}})
+        stale = change_event_stream(log, snapshot, delta["id"], connected, keepalive_seconds=0.05)
+        resync = _parse(await stale.__anext__())
+        assert resync["event"] == "snapshot"
+        assert resync["id"] == log.cursor(7)
+        await stale.aclose()
+
+        foreign = change_event_stream(log, snapshot, "other-epoch-7", connected, keepalive_seconds=0.05)
+        assert _parse(await foreign.__anext__())["event"] == "snapshot"
+        await foreign.aclose()
+        assert len(snapshots) == 3
+
+    asyncio.run(scenario())
+
+
+def test_alert_transitions_are_logged_once(app_module):
+    from app.core.change_log import change_log
+
+    start = change_log.seq
+    latency = {"code": "HIGH_LATENCY", "severity": "medium", "message": "slow"}
+    app_module.publish_alert_transitions([latency])
+    app_module.publish_alert_transitions([latency])
+    app_module.publish_alert_transitions([])
+
+    entries, resync = change_log.since(start, kinds={"alert_raised", "alert_cleared"})
+    assert resync is False
+    assert [(entry.kind, entry.data["code"]) for entry in entries] == [
+        ("alert_raised", "HIGH_LATENCY"),
+        ("alert_cleared", "HIGH_LATENCY"),
+    ]
+
+
+def test_floor_changes_are_logged_with_sequence_numbers(app_module):
+    from app.core.change_log import change_log
+    from app.core.database_ops import EventOperations
+
+    start = change_log.seq
+    EventOperations.record_event(
+        camera_id="cam_sse_001",
+        floor_id=2,
+        track_id="track_sse_001",
+        vehicle_type="car",
+        direction="entry",
+        confidence=0.9,
+    )
+    entries, resync = change_log.since(start, kinds={"floor_delta"})
+    assert resync is False
+    assert entries[-1].data["floor"]["id"] == 2
+    assert entries[-1].seq > start
+
+
+def test_floor_changes_feed_returns_deltas_and_signals_resync(client, auth_headers):
+    initial = client.get("/floors/changes", headers=auth_headers).json()
+    assert initial["resync_required"] is True
+    cursor = {"since": initial["seq"], "epoch": initial["epoch"]}
+
+    payload = {
+        "camera_id": "cam_changes_001",
+        "floor_id": 3,
+        "track_id": "track_changes_001",
+        "vehicle_type": "car",
+        "direction": "entry",
+        "confidence": 0.9,
+    }
+    assert client.post("/event", json=payload, headers=auth_headers).status_code == 200
+
+    feed = client.get("/floors/changes", params=cursor, headers=auth_headers).json()
+    assert feed["resync_required"] is False
+    assert [change["floor"]["id"] for change in feed["changes"]] == [3]
+    assert feed["seq"] == feed["changes"][-1]["seq"]
+
+    quiet = client.get(
+        "/floors/changes", params={"since": feed["seq"], "epoch": feed["epoch"], "wait": 0.2}, headers=auth_headers
+    ).json()
+    assert quiet["changes"] == []
+    assert quiet["seq"] == feed["seq"]
+
+    restarted = client.get("/floors/changes", params={"since": feed["seq"], "epoch": "stale"}, headers=auth_headers)
+    assert restarted.json()["resync_required"] is True
+    assert client.get("/floors/changes", params={"since": feed["seq"] + 100}, headers=auth_headers).json()["resync_required"] is True
+
+
+def test_floor_changes_without_epoch_resync_after_restart(client, app_module, auth_headers, monkeypatch):
+    from app.core.change_log import ChangeLog
+
+    before = client.get("/floors/changes", headers=auth_headers).json()
+    # A restart begins a new epoch whose sequence numbers start again from 0.
+    restarted = ChangeLog(capacity=100)
+    for _ in range(before["seq"] + 3):
+        restarted.append("floor_delta", {"floor": {"id": 1}})
+    monkeypatch.setattr(app_module, "change_log", restarted)
+
+    feed = client.get("/floors/changes", params={"since": before["seq"]}, headers=auth_headers).json()
+    assert feed["resync_required"] is True
+    assert feed["changes"] == []
+    assert feed["epoch"] == restarted.epoch
+
+
+def test_floor_changes_long_poll_wakes_on_new_change(app_module):
+    import asyncio
+
+    from app.core.change_log import change_log
+
+    async def scenario():
+        since = change_log.seq
+        waiter = asyncio.ensure_future(
+            app_module.get_floor_changes(since=since, epoch=change_log.epoch, wait=5)
+        )
+        await asyncio.sleep(0.05)
+        change_log.append("alert_raised", {"code": "HIGH_LATENCY"})
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+        change_log.append("floor_delta", {"floor": {"id": 1}})
+        response = await asyncio.wait_for(waiter, 1)
+        assert [change.type for change in response.changes] == ["floor_delta"]
+        assert response.seq == since + 2
+
+    asyncio.run(scenario())
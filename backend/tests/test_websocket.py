@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+
+def test_websocket_sends_snapshot_then_floor_deltas(client, auth_headers):
+    with client.websocket_connect("/ws?api_key=test-api-key") as websocket:
+        snapshot = websocket.receive_json()
+        assert snapshot["type"] == "floors_update"
+        floors = {floor["id"]: floor for floor in snapshot["data"]["floors"]}
+        assert 1 in floors
+
+        payload = {
+            "camera_id": "cam_ws_001",
+            "floor_id": 1,
+            "track_id": "track_ws_001",
+            "vehicle_type": "car",
+            "direction": "entry",
+            "confidence": 0.9,
+        }
+        assert client.post("/event", json=payload, headers=auth_headers).status_code == 200
+
+        delta = websocket.receive_json()
+        assert delta["type"] == "floor_delta"
+        assert delta["version"] > snapshot["version"]
+        floor = delta["data"]["floor"]
+        assert floor["id"] == 1
+        assert floor["current_vehicles"] == floors[1]["current_vehicles"] + 1
+        assert floor["available_slots"] == floor["total_slots"] - floor["current_vehicles"]
+
+    metrics = client.get("/monitoring/metrics", headers=auth_headers).json()
+    assert metrics["websocket"]["subscribers"] == 0
+    assert metrics["websocket"]["published"] >= 1
+
+
+def test_websocket_rejects_missing_api_key(client):
+    with pytest.raises(WebSocketDisconnect) as excinfo:
+        with client.websocket_connect("/ws") as websocket:
+            websocket.receive_json()
+    assert excinfo.value.code == 1008
+
+
+def test_broadcaster_drops_slow_subscribers_without_blocking_others(app_module):
+    from app.core.broadcast import FloorBroadcaster
+
+    async def scenario():
+        broadcaster = FloorBroadcaster(queue_size=2)
+        broadcaster.bind(asyncio.get_running_loop())
+        slow = broadcaster.subscribe()
+        fast = broadcaster.subscribe()
+
+        received = []
+        for idx in range(5):
+            broadcaster._fan_out(f"message-{idx}")
+            received.append(fast.queue.get_nowait())
+
+        assert received == [f"message-{idx}" for idx in range(5)]
+        assert slow.overflowed is True
+        assert slow.queue.get_nowait() is None
+        assert broadcaster.stats()["dropped_subscribers"] == 1
+
+    asyncio.run(scenario())
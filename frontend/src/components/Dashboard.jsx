@@ -23,6 +23,7 @@ const Dashboard = () => {
   const [wsConnected, setWsConnected] = useState(false);
   const alertHistoryRef = useRef({});
   const wsClientRef = useRef(null);
+  const wsConnectedRef = useRef(false);
 
   const floorsPollMs = Number(import.meta.env.VITE_FLOORS_POLL_MS || 5000);
   const eventsPollMs = Number(import.meta.env.VITE_EVENTS_POLL_MS || 5000);
@@ -50,12 +51,16 @@ const Dashboard = () => {
         setLoading(true);
       }
 
+      // While the WebSocket is live it pushes floor changes, so only the recommendation is polled.
+      const floorsLive = background && wsConnectedRef.current;
       const [floorsResponse, recommendationResponse] = await Promise.all([
-        floorsAPI.getFloors(),
+        floorsLive ? Promise.resolve(null) : floorsAPI.getFloors(),
         floorsAPI.getRecommendedFloor(),
       ]);
 
-      setFloors(floorsResponse.floors || []);
+      if (floorsResponse) {
+        setFloors(floorsResponse.floors || []);
+      }
       setRecommendation(recommendationResponse || null);
       setLastUpdated(new Date().toISOString());
       setOverviewError('');
@@ -106,13 +111,16 @@ const Dashboard = () => {
   useEffect(() => {
     wsClientRef.current = createRealtimeClient({
       onOpen: () => {
+        wsConnectedRef.current = true;
         setWsConnected(true);
         pushAlert('info', 'Realtime Connected', 'WebSocket realtime stream connected.', 'ws-connected');
       },
       onClose: () => {
+        wsConnectedRef.current = false;
         setWsConnected(false);
       },
       onError: () => {
+        wsConnectedRef.current = false;
         setWsConnected(false);
       },
       onMessage: (payload) => {
@@ -125,6 +133,24 @@ const Dashboard = () => {
           setOverviewError('');
         }
 
+        if (type === 'floor_delta' && data.floor) {
+          setFloors((prev) => {
+            const exists = prev.some((floor) => floor.id === data.floor.id);
+            if (!exists) {
+              return data.floor.is_active ? [...prev, data.floor] : prev;
+            }
+            return prev
+              .map((floor) => (floor.id === data.floor.id ? { ...floor, ...data.floor } : floor))
+              .filter((floor) => floor.is_active !== false);
+          });
+          setLastUpdated(new Date().toISOString());
+          setOverviewError('');
+        }
+
+        if (type === 'floor_removed' && data.floor_id !== undefined) {
+          setFloors((prev) => prev.filter((floor) => floor.id !== data.floor_id));
+        }
+
         if (type === 'recommendation_update' && data.recommendation) {
           setRecommendation(data.recommendation);
           setLastUpdated(new Date().toISOString());
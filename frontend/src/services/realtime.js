@@ -17,6 +17,9 @@ export const createRealtimeClient = ({ onMessage, onOpen, onClose, onError }) =>
   const wsBase = import.meta.env.VITE_WS_URL || toWebSocketUrl(baseApiUrl);
   const wsPath = import.meta.env.VITE_WS_PATH || '/ws';
   const reconnectMs = Number(import.meta.env.VITE_WS_RECONNECT_MS || 3000);
+  // Browsers cannot send custom headers on WebSocket upgrades, so the key travels as a query param.
+  const apiKey = import.meta.env.VITE_API_KEY || '';
+  const wsQuery = apiKey ? `?api_key=${encodeURIComponent(apiKey)}` : '';
 
   if (!enabled) {
     return {
@@ -43,7 +46,7 @@ export const createRealtimeClient = ({ onMessage, onOpen, onClose, onError }) =>
     }
 
     try {
-      socket = new WebSocket(`${wsBase}${wsPath}`);
+      socket = new WebSocket(`${wsBase}${wsPath}${wsQuery}`);
     } catch (err) {
       onError?.(err);
       scheduleReconnect();